@@ -0,0 +1,89 @@
+"""Сравнение возврата итогов боев из пула процессов: pickle против разделяемой памяти.
+
+Варианты:
+  pickle-логи   - воркер возвращает лог каждого боя (список строк), как делал бы
+                  наивный пул поверх Battle;
+  pickle-записи - воркер возвращает словарь итогов на каждый бой;
+  shared_memory - воркер пишет запись итога в общий блок, обратно идет только число.
+Для каждого варианта печатается время, боев в секунду и объем данных,
+прошедших через канал пула.
+
+Запуск: python -m benchmarks.shm_results [--battles N] [--processes P] [--chunk C]
+"""
+import argparse
+import multiprocessing
+import pickle
+import time
+from game.shm_results import simulate_shared, OUTCOME_CODES
+from game.simulation import Scenario, run_battle
+from game.tracing import TraceSampler
+
+SCENARIO = Scenario([("Warrior", "Артур", 10), ("Mage", "Мерлин", 10), ("Healer", "Эльза", 10)],
+                    ("Дракон Урлог", 8))
+
+
+def _chunk_logs(task):
+    scenario_data, seed_base, start, stop = task
+    scenario = Scenario.from_dict(scenario_data)
+    return [run_battle(scenario, seed_base + i).log for i in range(start, stop)]
+
+
+def _chunk_records(task):
+    scenario_data, seed_base, start, stop = task
+    scenario = Scenario.from_dict(scenario_data)
+    trace = TraceSampler()
+    records = []
+    for i in range(start, stop):
+        battle = run_battle(scenario, seed_base + i, trace=trace)
+        alive = [char for char in battle.party if char.hp > 0]
+        records.append({'seed': seed_base + i, 'scenario': 0, 'outcome': OUTCOME_CODES[battle.outcome],
+                        'rounds': battle.round_number, 'boss_hp': battle.boss.hp,
+                        'party_hp': sum(char.hp for char in alive), 'party_alive': len(alive)})
+    return records
+
+
+def _tasks(battles, chunk):
+    return [(SCENARIO.to_dict(), 0, start, min(start + chunk, battles)) for start in range(0, battles, chunk)]
+
+
+def _run_pickle(function, battles, processes, chunk):
+    count = 0
+    with multiprocessing.Pool(processes) as pool:
+        for result in pool.imap_unordered(function, _tasks(battles, chunk)):
+            count += len(result)
+    return count
+
+
+def _transferred(function, battles, chunk):
+    """Объем через канал пула: размер pickle одной задачи, умноженный на число задач."""
+    tasks = _tasks(battles, chunk)
+    return len(pickle.dumps(function(tasks[0]), pickle.HIGHEST_PROTOCOL)) * len(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=250)
+    args = parser.parse_args()
+
+    for label, function in (("pickle-логи", _chunk_logs), ("pickle-записи", _chunk_records)):
+        start = time.perf_counter()
+        count = _run_pickle(function, args.battles, args.processes, args.chunk)
+        elapsed = time.perf_counter() - start
+        transferred = _transferred(function, args.battles, args.chunk)
+        print(f"{label:14} {elapsed:7.2f} с  {count / elapsed:9,.0f} боев/с  {transferred / 1e6:8.2f} МБ через канал")
+
+    start = time.perf_counter()
+    with simulate_shared(SCENARIO, args.battles, args.processes, chunk=args.chunk) as results:
+        summary = results.summary()
+    elapsed = time.perf_counter() - start
+    transferred = len(_tasks(args.battles, args.chunk)) * len(pickle.dumps(args.chunk, pickle.HIGHEST_PROTOCOL))
+    print(f"{'shared_memory':14} {elapsed:7.2f} с  {args.battles / elapsed:9,.0f} боев/с  "
+          f"{transferred / 1e6:8.2f} МБ через канал")
+    print(f"побед {summary['win_rate']:.1%}, раундов в среднем {summary['rounds_mean']:.2f}, "
+          f"прервано {summary['timeouts'] + summary['stalemates']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Замер выделений памяти в цикле ходов: сборки мусора и память на один ход.
+
+Для каждого хода наблюдатель фиксирует, сколько памяти ход удержал (лог, эффекты)
+и пик памяти внутри хода относительно его начала (tracemalloc).
+
+Запуск: python -m benchmarks.turn_allocations [--battles N]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from game.battle import BattleObserver
+from game.simulation import Scenario, run_battle
+
+SCENARIO = Scenario([("Warrior", "Артур", 10), ("Mage", "Мерлин", 10), ("Healer", "Эльза", 10),
+                     ("Warrior", "Ланселот", 10)], ("Дракон Урлог", 8))
+
+
+class TurnMemoryProbe(BattleObserver):
+    """Считает удержанную и пиковую память каждого хода."""
+
+    def __init__(self):
+        self.turns = 0
+        self.retained = 0
+        self.peak = 0
+        self.in_turn = False
+        self._start = 0
+
+    def on_turn_start(self, battle, actor):
+        self.in_turn = True
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def on_turn_end(self, battle, actor):
+        current, peak = tracemalloc.get_traced_memory()
+        self.in_turn = False
+        self.turns += 1
+        self.retained += current - self._start
+        self.peak += peak - self._start
+
+
+def run(battles: int):
+    collections = [0, 0]  # всего и начатых внутри хода
+
+    def on_gc(phase, info):
+        if phase == "start":
+            collections[0] += 1
+            collections[1] += probe.in_turn
+
+    # Замер скорости без tracemalloc
+    source = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(battles):
+        run_battle(SCENARIO, source=source)
+    elapsed = time.perf_counter() - start
+
+    probe = TurnMemoryProbe()
+    source = random.Random(0)
+    gc.callbacks.append(on_gc)
+    tracemalloc.start()
+    for _ in range(battles):
+        run_battle(SCENARIO, source=source, observers=[probe])
+    tracemalloc.stop()
+    gc.callbacks.remove(on_gc)
+
+    turns = max(probe.turns, 1)
+    print(f"боев: {battles}, ходов: {probe.turns}, {battles / elapsed:,.0f} боев/с")
+    print(f"сборок мусора: {collections[0]} ({collections[0] * 10000 / turns:.1f} на 10k ходов), "
+          f"из них внутри ходов: {collections[1]}")
+    print(f"на ход: удерживается {probe.retained / turns:.0f} Б, пик {probe.peak / turns:.0f} Б")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--battles", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.battles)
+
+
+if __name__ == "__main__":
+    main()
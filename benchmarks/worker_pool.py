@@ -0,0 +1,101 @@
+"""Время импорта, запуска воркеров и коротких заданий: пул на задание против WarmPool.
+
+Замеры:
+  импорт       - import game.simulation в чистом интерпретаторе (медиана по запускам);
+  пул на задание - multiprocessing.Pool создается под каждое задание из --battles боев
+                 (spawn - импорт в каждом воркере, fork - копия уже импортировавшего родителя);
+  WarmPool     - запуск постоянного пула до готовности воркеров, затем задания
+                 того же размера через уже прогретых воркеров;
+  в процессе   - те же бои последовательно в текущем процессе.
+Итоги заданий сверяются между вариантами.
+
+Запуск: python -m benchmarks.worker_pool [--battles 200] [--jobs 20] [--processes P]
+"""
+import argparse
+import multiprocessing
+import statistics
+import subprocess
+import sys
+import time
+from game.campaign import ScenarioResult, run_scenario_unit
+from game.simulation import Scenario
+from game.workers import WarmPool, scenario_key
+
+SCENARIO = Scenario([("Warrior", "Артур", 10), ("Mage", "Мерлин", 10), ("Healer", "Эльза", 10)],
+                    ("Дракон Урлог", 8))
+
+IMPORT_PROBE = ("import time; t = time.perf_counter(); import game.simulation; "
+                "print(time.perf_counter() - t)")
+
+
+def _import_time(runs: int) -> float:
+    times = [float(subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True,
+                                  text=True, check=True).stdout) for _ in range(runs)]
+    return statistics.median(times)
+
+
+def _cold_unit(task):
+    scenario_data, start, stop = task
+    return run_scenario_unit(Scenario.from_dict(scenario_data), 0, start, stop).to_dict()
+
+
+def _cold_job(method: str, battles: int, processes: int) -> ScenarioResult:
+    chunk = max(1, -(-battles // processes))
+    tasks = [(SCENARIO.to_dict(), start, min(start + chunk, battles)) for start in range(0, battles, chunk)]
+    result = ScenarioResult()
+    with multiprocessing.get_context(method).Pool(processes) as pool:
+        for part in pool.imap(_cold_unit, tasks):
+            result.merge(ScenarioResult.from_dict(part))
+    return result
+
+
+def _timed(function, repeats: int):
+    times = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=20, help="заданий на вариант")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+    processes = args.processes or multiprocessing.cpu_count()
+
+    print(f"импорт game.simulation: {_import_time(5) * 1000:7.1f} мс")
+
+    cold_results = []
+    for method in ('spawn', 'fork'):
+        if method not in multiprocessing.get_all_start_methods():
+            continue
+        cold, result = _timed(lambda: _cold_job(method, args.battles, processes), max(1, args.jobs // 4))
+        cold_results.append(result)
+        print(f"пул на задание ({method}, {processes} воркеров): {cold * 1000:7.1f} мс на {args.battles} боев")
+
+    start = time.perf_counter()
+    pool = WarmPool(processes)
+    ready = pool.wait_ready()
+    spawn = time.perf_counter() - start
+    try:
+        warm, warm_result = _timed(lambda: pool.simulate(SCENARIO, args.battles), args.jobs)
+    finally:
+        pool.close()
+    print(f"WarmPool ({pool.method}): запуск до готовности {spawn * 1000:7.1f} мс "
+          f"(из них ожидание воркеров {ready * 1000:.1f} мс)")
+    print(f"WarmPool: {warm * 1000:7.1f} мс на {args.battles} боев, медиана по {args.jobs} заданиям")
+
+    serial, serial_result = _timed(lambda: run_scenario_unit(SCENARIO, 0, 0, args.battles), args.jobs)
+    print(f"в процессе: {serial * 1000:7.1f} мс на {args.battles} боев")
+
+    same = all(result.outcomes == serial_result.outcomes for result in cold_results + [warm_result])
+    print(f"исходы совпадают: {'да' if same else 'НЕТ'} ({serial_result.outcomes}), "
+          f"ключ сценария {len(scenario_key(SCENARIO))} символов")
+
+
+if __name__ == "__main__":
+    main()
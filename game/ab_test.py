@@ -0,0 +1,174 @@
+import argparse
+import math
+import multiprocessing
+import time
+from array import array
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+from game.fuzz import generate_case
+from game.policies import BOSS_POLICIES, PARTY_POLICIES, Policy
+from game.simulation import DEFAULT_LIMITS, Scenario, run_battle
+from game.tracing import TraceSampler
+
+# --- A/B-сравнение политик на общих случайных числах ---
+# Обе политики играют одни и те же пары (сценарий, seed): бой i идет на сценарии
+# i % len(scenarios) с seed base_seed + i под политикой A и под политикой B.
+# Пока политики принимают одинаковые решения, бои пары совпадают бросок в бросок,
+# и итоги пары сильно коррелированы. Поэтому разница оценивается по парным
+# разностям d_i = B_i - A_i: дисперсия Var(d) = Var(A) + Var(B) - 2 Cov(A, B)
+# меньше, чем Var(A) + Var(B) у независимых выборок, и для той же ширины
+# интервала нужно во столько же раз меньше боев (variance_reduction).
+# Политики задаются строками ("пати" или "пати/босс", см. game/policies.py),
+# чтобы их можно было передать воркерам пула.
+
+
+class PairedDifference:
+    """Парная разница средних B - A с доверительным интервалом.
+
+    Для сравнения считается и интервал, который дали бы независимые выборки того же размера.
+    """
+
+    def __init__(self, a: Sequence[float], b: Sequence[float], confidence: float = 0.95):
+        n = len(a)
+        if n != len(b) or n < 2:
+            raise ValueError("нужны две выборки одинаковой длины, не меньше двух пар")
+        self.n = n
+        self.confidence = confidence
+        self.mean_a = sum(a) / n
+        self.mean_b = sum(b) / n
+        self.diff = self.mean_b - self.mean_a
+        var_a = sum((x - self.mean_a) ** 2 for x in a) / (n - 1)
+        var_b = sum((y - self.mean_b) ** 2 for y in b) / (n - 1)
+        cov = sum((x - self.mean_a) * (y - self.mean_b) for x, y in zip(a, b)) / (n - 1)
+        var_d = max(0.0, var_a + var_b - 2 * cov)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.se = math.sqrt(var_d / n)
+        self.se_unpaired = math.sqrt((var_a + var_b) / n)
+        self.ci = (self.diff - z * self.se, self.diff + z * self.se)
+        self.ci_unpaired = (self.diff - z * self.se_unpaired, self.diff + z * self.se_unpaired)
+        self.correlation = cov / math.sqrt(var_a * var_b) if var_a > 0 and var_b > 0 else 0.0
+        # Во сколько раз меньше боев нужно парному сравнению для той же ширины интервала
+        self.variance_reduction = (var_a + var_b) / var_d if var_d > 0 else math.inf
+
+    @property
+    def significant(self) -> bool:
+        """Интервал не содержит ноль."""
+        return self.ci[0] > 0 or self.ci[1] < 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'n': self.n, 'mean_a': self.mean_a, 'mean_b': self.mean_b, 'diff': self.diff,
+                'ci': self.ci, 'ci_unpaired': self.ci_unpaired, 'correlation': self.correlation,
+                'variance_reduction': self.variance_reduction, 'significant': self.significant}
+
+
+def _play_chunk(task: Tuple) -> Tuple[array, array, array, array]:
+    spec_a, spec_b, scenarios_data, base_seed, start, stop, limits = task
+    scenarios = [Scenario.from_dict(data) for data in scenarios_data]
+    policies = (Policy.parse(spec_a), Policy.parse(spec_b))
+    trace = TraceSampler()  # лог не нужен - важны только итоги
+    wins = (array('b'), array('b'))
+    rounds = (array('i'), array('i'))
+    for index in range(start, stop):
+        scenario = scenarios[index % len(scenarios)]
+        for arm, policy in enumerate(policies):
+            battle = run_battle(scenario, base_seed + index, observers=[policy], trace=trace, limits=limits)
+            wins[arm].append(battle.outcome == 'victory')
+            rounds[arm].append(battle.round_number)
+    return wins[0], wins[1], rounds[0], rounds[1]
+
+
+class ABReport:
+    """Итоги A/B-сравнения: парные разницы доли побед и длины боя."""
+
+    def __init__(self, policy_a: str, policy_b: str, scenarios: int, win: PairedDifference,
+                 rounds: PairedDifference, a_only: int, b_only: int, elapsed: float):
+        self.policy_a = policy_a
+        self.policy_b = policy_b
+        self.scenarios = scenarios
+        self.battles = win.n  # пар боев
+        self.win = win
+        self.rounds = rounds
+        self.a_only = a_only  # пары, где победила только A
+        self.b_only = b_only  # пары, где победила только B
+        self.elapsed = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'policy_a': self.policy_a, 'policy_b': self.policy_b, 'scenarios': self.scenarios,
+                'battles': self.battles, 'win': self.win.to_dict(), 'rounds': self.rounds.to_dict(),
+                'a_only': self.a_only, 'b_only': self.b_only, 'elapsed': self.elapsed}
+
+    def __str__(self) -> str:
+        win, rounds = self.win, self.rounds
+        level = f"{win.confidence:.0%}"
+        return "\n".join([
+            f"A = {self.policy_a}, B = {self.policy_b}: {self.battles} пар боев на {self.scenarios} сценариях, "
+            f"{self.elapsed:.1f} с",
+            f"  доля побед: A {win.mean_a:.2%}, B {win.mean_b:.2%}, B - A = {win.diff:+.2%} "
+            f"[{win.ci[0]:+.2%}, {win.ci[1]:+.2%}] ({level}{', значимо' if win.significant else ''})",
+            f"    без пар интервал был бы [{win.ci_unpaired[0]:+.2%}, {win.ci_unpaired[1]:+.2%}]; "
+            f"корреляция {win.correlation:.2f}, боев нужно меньше в {win.variance_reduction:.1f} раза",
+            f"    победила только A: {self.a_only}, только B: {self.b_only}",
+            f"  раундов: A {rounds.mean_a:.2f}, B {rounds.mean_b:.2f}, B - A = {rounds.diff:+.2f} "
+            f"[{rounds.ci[0]:+.2f}, {rounds.ci[1]:+.2f}] ({level}{', значимо' if rounds.significant else ''})",
+            f"    без пар интервал был бы [{rounds.ci_unpaired[0]:+.2f}, {rounds.ci_unpaired[1]:+.2f}]; "
+            f"корреляция {rounds.correlation:.2f}, боев нужно меньше в {rounds.variance_reduction:.1f} раза",
+        ])
+
+
+def ab_test(policy_a: str, policy_b: str, scenarios: List[Scenario], battles: int, base_seed: int = 0,
+            processes: Optional[int] = None, chunk: int = 250, limits=DEFAULT_LIMITS,
+            confidence: float = 0.95) -> ABReport:
+    """Проводит battles пар боев политик A и B на общих seed и сравнивает итоги.
+
+    processes=1 - без пула процессов.
+    """
+    Policy.parse(policy_a), Policy.parse(policy_b)  # неизвестные имена - ошибка до запуска пула
+    started = time.perf_counter()
+    data = [scenario.to_dict() for scenario in scenarios]
+    tasks = [(policy_a, policy_b, data, base_seed, start, min(start + chunk, battles), limits)
+             for start in range(0, battles, chunk)]
+    if processes == 1:
+        results = list(map(_play_chunk, tasks))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(_play_chunk, tasks)
+    wins_a, wins_b, rounds_a, rounds_b = array('b'), array('b'), array('i'), array('i')
+    for chunk_wins_a, chunk_wins_b, chunk_rounds_a, chunk_rounds_b in results:
+        wins_a.extend(chunk_wins_a)
+        wins_b.extend(chunk_wins_b)
+        rounds_a.extend(chunk_rounds_a)
+        rounds_b.extend(chunk_rounds_b)
+    a_only = sum(1 for x, y in zip(wins_a, wins_b) if x and not y)
+    b_only = sum(1 for x, y in zip(wins_a, wins_b) if y and not x)
+    return ABReport(policy_a, policy_b, len(scenarios), PairedDifference(wins_a, wins_b, confidence),
+                    PairedDifference(rounds_a, rounds_b, confidence), a_only, b_only,
+                    time.perf_counter() - started)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="A/B-сравнение политик ИИ на общих случайных числах")
+    parser.add_argument("policy_a", help=f"пати[/босс]; пати: {', '.join(PARTY_POLICIES)}, "
+                                         f"босс: {', '.join(BOSS_POLICIES)} или модуль:атрибут")
+    parser.add_argument("policy_b")
+    parser.add_argument("--party", default=None, help="Класс:Имя:Уровень через запятую (по умолчанию - "
+                                                      "случайные сценарии, как в game.fuzz)")
+    parser.add_argument("--boss", default="Дракон Урлог:5", help="Имя:Уровень")
+    parser.add_argument("--scenarios", type=int, default=50, help="число случайных сценариев")
+    parser.add_argument("--battles", type=int, default=20000, help="пар боев")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--confidence", type=float, default=0.95)
+    args = parser.parse_args(argv)
+
+    if args.party:
+        party = [(c, n, int(l)) for c, n, l in (item.split(":") for item in args.party.split(","))]
+        boss_name, boss_level = args.boss.rsplit(":", 1)
+        scenarios = [Scenario(party, (boss_name, int(boss_level)))]
+    else:
+        scenarios = [generate_case(args.seed, index).scenario for index in range(args.scenarios)]
+    print(ab_test(args.policy_a, args.policy_b, scenarios, args.battles, args.seed, args.processes,
+                  confidence=args.confidence))
+
+
+if __name__ == "__main__":
+    main()
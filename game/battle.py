@@ -1,9 +1,22 @@
+from collections import deque
+from itertools import islice
+from time import perf_counter
 from game.characters import Healer, Warrior
-import random
-from typing import List, Iterator
-from game.core import Character
+from game.skills import EffectPool, EFFECT_POOL
+from game.tracing import TraceSampler, TRACE_OFF, TRACE_RING, TRACE_FULL
+from game import rng
+from typing import TYPE_CHECKING, Callable, List, Iterator, Optional
+from game.core import Character, notify_state
 from game.exceptions import CharacterDeadError, InvalidTargetError
 
+if TYPE_CHECKING:
+    from game.events import EventBus, EventHooks
+    from game.render import ConsoleRenderer
+    from game.metrics import BattleMetrics
+
+# Навыки поддержки, которые ИИ пати не использует как атакующие
+SUPPORT_SKILLS = frozenset(('heal', 'divine_shield'))
+
 
 class TurnOrder:
     """Итератор для определения порядка ходов на основе ловкости."""
@@ -12,6 +25,26 @@ class TurnOrder:
         # Сортируем участников по ловкости (по убыванию)
         self.participants = sorted(participants, key=lambda char: char.agility, reverse=True)
         self.index = 0
+        self._pending = []  # Добавленные участники вступают с начала следующего раунда
+
+    def add(self, participant: Character):
+        """Добавляет участника (например, миньона); он походит начиная со следующего раунда."""
+        self._pending.append(participant)
+
+    def members(self) -> Iterator[Character]:
+        """Все участники, включая еще не вступивших в очередь."""
+        yield from self.participants
+        yield from self._pending
+
+    def remove(self, participant: Character):
+        """Убирает участника из очереди, не сбивая текущую позицию раунда."""
+        if participant in self._pending:
+            self._pending.remove(participant)
+            return
+        position = self.participants.index(participant)
+        del self.participants[position]
+        if position < self.index:
+            self.index -= 1
 
     def __iter__(self) -> Iterator[Character]:
         return self
@@ -19,9 +52,15 @@ class TurnOrder:
     def __next__(self) -> Character:
         if self.index >= len(self.participants):
             self.index = 0  # Сбрасываем индекс для нового раунда
-            # Проверяем, есть ли живые участники
-            alive_participants = [p for p in self.participants if p.is_alive]
-            if not alive_participants:
+            if self._pending:
+                self.participants.extend(self._pending)
+                self._pending.clear()
+                self.participants.sort(key=lambda char: char.agility, reverse=True)
+            # Проверяем, есть ли живые участники (без промежуточного списка)
+            for p in self.participants:
+                if p.is_alive:
+                    break
+            else:
                 raise StopIteration
         # Берем следующего участника
         participant = self.participants[self.index]
@@ -33,42 +72,195 @@ class TurnOrder:
 
 
 class EffectManager:
-    """Класс для управления эффектами на персонажах."""
+    """Класс для управления эффектами на персонажах.
+
+    Истекшие эффекты возвращаются в пул, откуда их берут навыки при следующем наложении.
+    """
 
-    @staticmethod
-    def apply_end_of_turn_effects(character: Character) -> List[str]:
-        """Применяет эффекты конца хода к персонажу и возвращает список сообщений."""
-        results = []
+    def __init__(self, pool: Optional[EffectPool] = EFFECT_POOL):
+        self.pool = pool
+
+    def apply_end_of_turn_effects(self, character: Character, results: Optional[List[str]] = None) -> List[str]:
+        """Применяет эффекты конца хода к персонажу и возвращает список сообщений.
+
+        results - переиспользуемый список для сообщений (очищается перед заполнением).
+        """
+        if results is None:
+            results = []
+        else:
+            results.clear()
         if not character.is_alive:
             return results
-        if hasattr(character, 'active_effects'):
-            # Проходим по копии списка, чтобы безопасно удалять элементы
-            for effect in character.active_effects[:]:
+        effects = character.active_effects
+        if effects:
+            # Проходим по индексу без копии списка; истекшие эффекты удаляются на месте
+            i = 0
+            while i < len(effects):
+                effect = effects[i]
                 effect_message = effect.apply_end_of_turn_effect(character)
                 if effect_message:
                     results.append(effect_message)
                 effect.decrease_duration()
                 if effect.is_expired():
-                    character.active_effects.remove(effect)
+                    del effects[i]
                     results.append(effect.apply_end_effect(character))
+                    if character._events is not None:
+                        character._events.effect_expired(character, effect.name, effect)
+                    if self.pool is not None:
+                        self.pool.release(effect)
+                else:
+                    i += 1
+            notify_state(character, 'effects')
         return results
 
+    def release_all(self, character: Character):
+        """Снимает с персонажа оставшиеся эффекты и возвращает их в пул (после боя)."""
+        effects = character.active_effects
+        if not effects:
+            return
+        if self.pool is not None:
+            for effect in effects:
+                self.pool.release(effect)
+        effects.clear()
+        notify_state(character, 'effects')
+
+
+class BattleObserver:
+    """Наблюдатель за ходом боя. Подклассы переопределяют только нужные методы."""
+
+    def on_battle_start(self, battle: 'Battle'):
+        """Вызывается перед первым ходом."""
+        pass
+
+    def on_turn_start(self, battle: 'Battle', actor: Character):
+        """Вызывается перед ходом участника."""
+        pass
+
+    def on_turn_end(self, battle: 'Battle', actor: Character):
+        """Вызывается после каждого хода (включая пропущенный из-за оглушения)."""
+        pass
+
+    def on_battle_end(self, battle: 'Battle'):
+        """Вызывается после окончания боя."""
+        pass
+
+
+class BattleLimits:
+    """Ограничения длины боя; проверяются в начале каждого раунда.
+
+    max_rounds - не больше стольких раундов, time_budget - секунд реального времени
+    (оба завершают бой исходом "timeout"); stall_rounds - столько раундов подряд
+    без чистого прогресса по HP (ни одна из сторон не опустилась ниже своего минимума
+    HP за бой) завершают бой исходом "stalemate". None - ограничения нет.
+    """
+
+    def __init__(self, max_rounds: Optional[int] = None, time_budget: Optional[float] = None,
+                 stall_rounds: Optional[int] = None):
+        self.max_rounds = max_rounds
+        self.time_budget = time_budget
+        self.stall_rounds = stall_rounds
+
+    def __repr__(self) -> str:
+        return (f"BattleLimits(max_rounds={self.max_rounds!r}, time_budget={self.time_budget!r}, "
+                f"stall_rounds={self.stall_rounds!r})")
+
 
 class Battle:
     """Основной класс, управляющий ходом боя."""
 
-    def __init__(self, party: List[Character], boss: Character):
+    def __init__(self, party: List[Character], boss: Character,
+                 observers: Optional[List[BattleObserver]] = None, verbose: bool = True,
+                 trace: Optional[TraceSampler] = None, metrics: Optional['BattleMetrics'] = None,
+                 limits: Optional[BattleLimits] = None, events: Optional['EventBus'] = None,
+                 renderer: Optional['ConsoleRenderer'] = None,
+                 party_policy: Optional[Callable[['Battle', Character], str]] = None):
         self.party = party
         self.boss = boss
         self.turn_order = TurnOrder(self.party + [self.boss])
         self.round_number = 0
         self.effect_manager = EffectManager()
+        self._effect_messages: List[str] = []  # Переиспользуемый буфер сообщений эффектов
         self.log = []  # Лог боя
+        # "victory" или "defeat" после окончания боя; "timeout" или "stalemate" - бой прерван limits
+        self.outcome = None
+        self.observers = list(observers) if observers else []
+        # ConsoleRenderer - вывод кадрами вместо print на каждое сообщение
+        self.renderer = renderer
+        self._emit = print
+        if renderer is not None:
+            self.observers.append(renderer)
+            self._emit = renderer.write
+        self._minions = []  # Миньоны босса, уже добавленные в очередь ходов
+        self._minion_version = getattr(boss, 'minion_version', 0)
+        self.verbose = verbose  # False - бой без вывода на экран (симуляции, воспроизведение)
+        # Политика выборочной трассировки; None - лог пишется всегда.
+        # verbose выводит на экран только те сообщения, что попадают в лог.
+        self.trace = trace
+        self.trace_mode = TRACE_FULL
+        self.trace_dropped = 0  # сообщений, вытесненных из кольцевого буфера до повышения
+        self._logging = True  # False - сообщения хода не форматируются
+        self._ring = None
+        self._ring_total = 0
+        self.metrics = metrics  # BattleMetrics; None - без метрик
+        self.limits = limits  # BattleLimits; None - бой идет до победы одной из сторон
+        self.stop_reason = None  # "rounds", "time" или "stall", если бой прерван limits
+        self._started = 0.0
+        self._best_hp = (0, 0)  # минимальное HP (пати, сторона босса) за бой
+        self._progress_round = 0
+        self.events = events  # EventBus; обработчики разрешаются один раз в start()
+        self.hooks: Optional['EventHooks'] = None
+        self.actor: Optional[Character] = None  # чей сейчас ход (источник событий урона и лечения)
+        # Ход героя: policy(battle, character) -> str (game/policies.py); None - _choose_party_action
+        self.party_policy = party_policy
+
+    @property
+    def traced(self) -> bool:
+        """Записан ли полный лог этого боя."""
+        return self.trace_mode == TRACE_FULL
+
+    @property
+    def messages_logged(self) -> int:
+        """Сколько сообщений записано с начала боя (в лог или в кольцевой буфер до повышения)."""
+        if self._ring is not None:
+            return self._ring_total
+        return self.trace_dropped + len(self.log)
+
+    def recent_messages(self, count: int) -> List[str]:
+        """Последние count сообщений из лога или кольцевого буфера (не больше, чем там хранится)."""
+        if count <= 0:
+            return []
+        store = self._ring if self._ring is not None else self.log
+        return list(islice(store, max(len(store) - count, 0), None))
 
     def _log_event(self, event: str):
-        """Добавляет событие в лог и выводит на экран."""
-        self.log.append(event)
-        print(event)
+        """Добавляет событие в лог и выводит на экран (или в кольцевой буфер до повышения)."""
+        if self.trace_mode == TRACE_FULL:
+            self.log.append(event)
+            if self.verbose:
+                self._emit(event)
+        elif self._ring is not None:
+            self._ring.append(event)
+            self._ring_total += 1
+
+    def _begin_trace(self):
+        if self.trace is None:
+            return
+        self.trace_mode = self.trace.start(self)
+        if self.trace_mode == TRACE_RING:
+            self._ring = deque(maxlen=self.trace.ring_size)
+            self._ring_total = 0
+        self._logging = self.trace_mode != TRACE_OFF
+
+    def _check_promotion(self):
+        """Повышает бой до полного лога, если сработал предикат политики."""
+        if self.trace_mode == TRACE_RING and self.trace.should_promote(self):
+            self.trace_mode = TRACE_FULL
+            self.trace_dropped = self._ring_total - len(self._ring)
+            self.log.extend(self._ring)
+            if self.verbose:
+                for event in self._ring:
+                    self._emit(event)
+            self._ring = None
 
     def _is_valid_target(self, user: Character, target: Character, skill_type: str = "attack") -> bool:
         """Проверяет, является ли цель валидной для навыка."""
@@ -90,35 +282,112 @@ class Battle:
     def check_win_conditions(self) -> bool:
         """Проверяет условия окончания боя. Возвращает True, если бой окончен."""
         if not self.boss.is_alive:
+            self.outcome = "victory"
             self._log_event(f">>> Победа! {self.boss.name} повержен! <<<")
             return True
-        if all(not char.is_alive for char in self.party):
-            self._log_event(f">>> Поражение! Все члены пати мертвы. <<<")
-            return True
+        for char in self.party:
+            if char.is_alive:
+                return False
+        self.outcome = "defeat"
+        self._log_event(f">>> Поражение! Все члены пати мертвы. <<<")
+        return True
+
+    def _limit_reached(self) -> bool:
+        """Проверка limits в начале раунда. Возвращает True, если бой прерван."""
+        limits = self.limits
+        if limits.max_rounds is not None and self.round_number >= limits.max_rounds:
+            return self._stop("timeout", "rounds", f"достигнут лимит раундов ({limits.max_rounds})")
+        if limits.time_budget is not None and perf_counter() - self._started > limits.time_budget:
+            return self._stop("timeout", "time", f"исчерпан лимит времени {limits.time_budget:g} с")
+        if limits.stall_rounds is not None:
+            party_hp = 0
+            for char in self.party:
+                party_hp += char.hp
+            boss_hp = self.boss.hp
+            for minion in self._minions:
+                boss_hp += minion.hp
+            best_party, best_boss = self._best_hp
+            if party_hp < best_party or boss_hp < best_boss:
+                self._best_hp = (min(party_hp, best_party), min(boss_hp, best_boss))
+                self._progress_round = self.round_number
+            elif self.round_number - self._progress_round >= limits.stall_rounds:
+                return self._stop("stalemate", "stall",
+                                  f"{limits.stall_rounds} раундов без прогресса по HP")
         return False
 
+    def _stop(self, outcome: str, reason: str, message: str) -> bool:
+        self.outcome = outcome
+        self.stop_reason = reason
+        self._log_event(f">>> Ничья: {message}. <<<")
+        return True
+
     def start(self):
         """Запускает основной игровой цикл."""
-        self._log_event("=== НАЧАЛО БОЯ ===")
-        self._log_event(f"Пати: {[char.name for char in self.party]} против Босса: {self.boss.name}")
+        # Сообщения босса (LoggerMixin) идут в лог боя, а не напрямую в print;
+        # после боя прежний приемник возвращается, чтобы босс не держал законченный бой
+        previous_sink = self.boss.log_sink
+        self.boss.log_sink = self._log_event
+        self.boss.metrics = metrics = self.metrics
+        if metrics is not None:
+            metrics.battle_started()
+        self._begin_trace()
+        if self._logging:
+            self._log_event("=== НАЧАЛО БОЯ ===")
+            self._log_event(f"Пати: {[char.name for char in self.party]} против Босса: {self.boss.name}")
+        for observer in self.observers:
+            observer.on_battle_start(self)
+        hooks = self.hooks = self.events.resolve(self) if self.events is not None else None
+        on_turn_end = None
+        if hooks is not None:
+            on_turn_end = hooks.on_turn_end
+            if hooks.tracks_participants:
+                for char in self.turn_order.members():
+                    char._events = hooks
+        limits = self.limits
+        if limits is not None:
+            self._started = perf_counter()
+            self._best_hp = (float('inf'), float('inf'))
 
         # Основной цикл раундов
         for current_actor in self.turn_order:
             if self.check_win_conditions():
                 break
+            if limits is not None and self.turn_order.index == 1 and self._limit_reached():
+                break
+
+            for observer in self.observers:
+                observer.on_turn_start(self, current_actor)
+            if metrics is not None:
+                turn_started = perf_counter()
 
             # Начало раунда, если первый участник в порядке хода
             if self.turn_order.index == 1:
                 self.round_number += 1
-                self._log_event(f"\n--- Раунд {self.round_number} ---")
+                if self._logging:
+                    self._log_event(f"\n--- Раунд {self.round_number} ---")
 
-            self._log_event(f"\nХод {current_actor.name}:")
+            if self._logging:
+                self._log_event(f"\nХод {current_actor.name}:")
+            current_actor.last_action = None
+            self.actor = current_actor
 
             # Проверяем оглушение
-            if hasattr(current_actor, 'stunned') and current_actor.stunned:
-                self._log_event(f"  {current_actor.name} оглушен и пропускает ход!")
+            if current_actor.stunned:
+                if self._logging:
+                    self._log_event(f"  {current_actor.name} оглушен и пропускает ход!")
                 current_actor.stunned = False
+                notify_state(current_actor, 'stunned')
+                if current_actor._events is not None:
+                    current_actor._events.effect_expired(current_actor, 'stun')
                 current_actor._end_turn()
+                if metrics is not None:
+                    metrics.turn_finished(None, perf_counter() - turn_started)
+                for observer in self.observers:
+                    observer.on_turn_end(self, current_actor)
+                if on_turn_end is not None:
+                    on_turn_end(self, current_actor)
+                if self._ring is not None:
+                    self._check_promotion()
                 continue
 
             # Ход персонажа пати
@@ -129,23 +398,60 @@ class Battle:
                 self._handle_boss_turn(current_actor)
 
             # Применяем эффекты конца хода для текущего действующего лица
-            effect_messages = self.effect_manager.apply_end_of_turn_effects(current_actor)
-            for msg in effect_messages:
-                self._log_event(f"  [Эффект] {msg}")
+            if metrics is not None and current_actor.is_alive:
+                for effect in current_actor.active_effects:
+                    metrics.effect_tick(effect.name)
+            effect_messages = self.effect_manager.apply_end_of_turn_effects(current_actor, self._effect_messages)
+            if self._logging:
+                for msg in effect_messages:
+                    self._log_event(f"  [Эффект] {msg}")
+            if metrics is not None:
+                metrics.turn_finished(current_actor.last_action, perf_counter() - turn_started)
+
+            for observer in self.observers:
+                observer.on_turn_end(self, current_actor)
+            if on_turn_end is not None:
+                on_turn_end(self, current_actor)
+            if self._ring is not None:
+                self._check_promotion()
 
             # Проверяем условия после хода
             if self.check_win_conditions():
                 break
 
         self._log_event("\n=== БОЙ ОКОНЧЕН ===")
+        if self._ring is not None:
+            self._check_promotion()
+        for observer in self.observers:
+            observer.on_battle_end(self)
+        self._ring = None
+        if self.trace is not None:
+            self.trace.finish(self)
+        if metrics is not None:
+            metrics.battle_finished(self.outcome)
+        self.boss.log_sink = previous_sink
+        self.actor = None
+        if hooks is not None and hooks.tracks_participants:
+            for char in self.turn_order.members():
+                char._events = None
+        # Слоты миньонов и оставшиеся эффекты возвращаются в общие пулы для следующих боев
+        if self._minions:
+            self.boss.dismiss_minions()
+        for char in self.turn_order.members():
+            self.effect_manager.release_all(char)
 
     def _handle_party_member_turn(self, character: Character):
         """Обрабатывает ход члена пати."""
         try:
             if character.is_alive:
                 # Умный ИИ для пати: выбирает действие в зависимости от ситуации
-                action_result = self._choose_party_action(character)
-                self._log_event(f"  {action_result}")
+                policy = self.party_policy
+                if policy is None:
+                    action_result = self._choose_party_action(character)
+                else:
+                    action_result = policy(self, character)
+                if self._logging:
+                    self._log_event(f"  {action_result}")
         except CharacterDeadError:
             self._log_event(f"  {character.name} мертв и не может действовать.")
         except InvalidTargetError as e:
@@ -162,14 +468,16 @@ class Battle:
         is_healer = isinstance(character, Healer)
         is_tank = isinstance(character, Warrior)
 
-        # Находим цели
-        alive_allies = [char for char in self.party if char != character and char.is_alive]
-        wounded_allies = [char for char in alive_allies if char.hp < char.hp * 0.6]  # Союзники с HP < 60%
+        # Находим самого раненого живого союзника (HP < 60%) за один проход без списков
+        target = None
+        for char in self.party:
+            if char is not character and char.is_alive and char.hp < char.hp * 0.6:
+                if target is None or char.hp < target.hp:
+                    target = char
 
         # Логика для целителя
-        if is_healer and wounded_allies:
+        if is_healer and target is not None:
             # Целитель лечит раненых союзников
-            target = min(wounded_allies, key=lambda char: char.hp)
             if hasattr(character, 'skills') and 'heal' in character.skills:
                 skill = character.skills['heal']
                 if not character.is_skill_on_cooldown('heal') and character.mp >= skill.mp_cost:
@@ -179,29 +487,28 @@ class Battle:
         # Логика для танка (воина)
         if is_tank and hasattr(character, 'skills') and 'divine_shield' in character.skills:
             # Танк защищает самого раненого союзника
-            if wounded_allies:
-                target = min(wounded_allies, key=lambda char: char.hp)
+            if target is not None:
                 skill = character.skills['divine_shield']
                 if not character.is_skill_on_cooldown('divine_shield') and character.mp >= skill.mp_cost:
                     if self._is_valid_target(character, target, "shield"):
                         return character.use_skill(target, 'divine_shield')
 
-        # Все атакуют босса (если он жив)
+        # Все атакуют босса (если он жив); воины сначала разбираются с миньонами
         if self.boss.is_alive:
+            enemy = self._choose_enemy_target(character)
             # 70% шанс использовать базовую атаку, 30% - навык
-            if random.random() < 0.7 or not hasattr(character, 'skills'):
-                return character.basic_attack(self.boss)
+            if rng.random() < 0.7 or not hasattr(character, 'skills'):
+                return character.basic_attack(enemy)
             else:
                 # Ищем доступный атакующий навык (не лечение/щит)
-                attack_skills = [sk_name for sk_name in character.skills.keys()
-                                 if sk_name not in ['heal', 'divine_shield']]
-                for skill_name in attack_skills:
-                    skill = character.skills[skill_name]
+                for skill_name, skill in character.skills.items():
+                    if skill_name in SUPPORT_SKILLS:
+                        continue
                     if (not character.is_skill_on_cooldown(skill_name) and
                             character.mp >= skill.mp_cost):
-                        return character.use_skill(self.boss, skill_name)
+                        return character.use_skill(enemy, skill_name)
                 # Если нет доступных атакующих навыков - базовая атака
-                return character.basic_attack(self.boss)
+                return character.basic_attack(enemy)
         else:
             return f"{character.name} ищет цель, но все враги повержены!"
 
@@ -209,8 +516,34 @@ class Battle:
         """Обрабатывает ход босса."""
         try:
             action_result = boss.take_turn(self.party)
-            self._log_event(f"  {action_result}")
+            if self._logging:
+                self._log_event(f"  {action_result}")
         except CharacterDeadError:
             self._log_event(f"  {boss.name} мертв и не может действовать.")
         # Завершаем ход босса
-        boss._end_turn()
\ No newline at end of file
+        boss._end_turn()
+        self._sync_minions()
+
+    def _sync_minions(self):
+        """Приводит очередь ходов в соответствие с текущими миньонами босса."""
+        version = getattr(self.boss, 'minion_version', 0)
+        if version == self._minion_version:
+            return
+        self._minion_version = version
+        tracked = self.hooks if self.hooks is not None and self.hooks.tracks_participants else None
+        for minion in self._minions:
+            self.turn_order.remove(minion)
+            minion._events = None
+        self._minions.clear()
+        for minion in self.boss.minions:
+            self.turn_order.add(minion)
+            self._minions.append(minion)
+            minion._events = tracked
+
+    def _choose_enemy_target(self, character: Character) -> Character:
+        """Цель атаки героя: воины сначала добивают миньонов, остальные бьют босса."""
+        if isinstance(character, Warrior):
+            for minion in self._minions:
+                if minion.is_alive:
+                    return minion
+        return self.boss
\ No newline at end of file
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import tempfile
+from typing import Dict, Any, List, Optional, Tuple
+from game.simulation import Scenario, run_battle
+from game.stats import StatsAggregator, BattleStatsCollector
+from game.tracing import TraceSampler
+
+# --- Долгие кампании с контрольными точками ---
+# Кампания - набор сценариев по battles_per_scenario боев в каждом. Бои режутся на
+# единицы работы по unit_size боев одного сценария. Seed боя зависит только от
+# номера сценария и номера боя (как в record_campaign), поэтому позиция в потоке
+# случайности сценария - это просто номер следующего боя.
+# После каждой единицы (или каждых checkpoint_every единиц) состояние атомарно
+# записывается в файл: временный файл рядом, fsync, os.replace. При перезапуске
+# кампания продолжается со следующей незавершенной единицы, а итоговые результаты
+# совпадают с результатами непрерывного прогона (статистика единицы собирается
+# отдельно и сливается в итог в том же порядке).
+
+CHECKPOINT_VERSION = 1
+
+
+def atomic_write_json(path: str, data: Dict[str, Any]):
+    """Записывает JSON так, что в path всегда лежит либо старая, либо новая версия целиком."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # fsync каталога, чтобы переименование пережило падение системы
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class Campaign:
+    """Описание кампании: сценарии, число боев, базовый seed и размер единицы работы."""
+
+    def __init__(self, scenarios: List[Scenario], battles_per_scenario: int,
+                 base_seed: int = 0, unit_size: int = 1000):
+        if battles_per_scenario < 1 or unit_size < 1:
+            raise ValueError("battles_per_scenario и unit_size должны быть положительными")
+        self.scenarios = list(scenarios)
+        self.battles_per_scenario = battles_per_scenario
+        self.base_seed = base_seed
+        self.unit_size = unit_size
+
+    def battle_seed(self, scenario_id: int, battle: int) -> int:
+        return self.base_seed + scenario_id * self.battles_per_scenario + battle
+
+    def units(self) -> List[Tuple[int, int, int]]:
+        """Единицы работы по порядку: (номер сценария, первый бой, конец диапазона)."""
+        return [(scenario_id, start, min(start + self.unit_size, self.battles_per_scenario))
+                for scenario_id in range(len(self.scenarios))
+                for start in range(0, self.battles_per_scenario, self.unit_size)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'scenarios': [scenario.to_dict() for scenario in self.scenarios],
+                'battles_per_scenario': self.battles_per_scenario,
+                'base_seed': self.base_seed, 'unit_size': self.unit_size}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Campaign':
+        return cls([Scenario.from_dict(s) for s in data['scenarios']], data['battles_per_scenario'],
+                   data.get('base_seed', 0), data.get('unit_size', 1000))
+
+
+class ScenarioResult:
+    """Итоги одного сценария: исходы и потоковая статистика боев."""
+
+    def __init__(self):
+        self.battles = 0
+        self.outcomes: Dict[str, int] = {}
+        self.stats = StatsAggregator()
+
+    def merge(self, other: 'ScenarioResult'):
+        self.battles += other.battles
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+        self.stats.merge(other.stats)
+
+    @property
+    def win_rate(self) -> float:
+        return self.outcomes.get('victory', 0) / self.battles if self.battles else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'battles': self.battles, 'outcomes': self.outcomes, 'stats': self.stats.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ScenarioResult':
+        result = cls()
+        result.battles = data['battles']
+        result.outcomes = dict(data['outcomes'])
+        result.stats = StatsAggregator.from_dict(data['stats'])
+        return result
+
+
+def run_scenario_unit(scenario: Scenario, seed_base: int, start: int, stop: int,
+                      trace: Optional[TraceSampler] = None) -> ScenarioResult:
+    """Проводит бои [start, stop) сценария с seed = seed_base + номер боя и возвращает их итоги."""
+    result = ScenarioResult()
+    collector = BattleStatsCollector(result.stats)
+    if trace is None:
+        trace = TraceSampler()  # бои кампании идут без лога
+    for battle_index in range(start, stop):
+        battle = run_battle(scenario, seed_base + battle_index, observers=[collector], trace=trace)
+        result.battles += 1
+        result.outcomes[battle.outcome] = result.outcomes.get(battle.outcome, 0) + 1
+    return result
+
+
+class CampaignRunner:
+    """Проводит кампанию по единицам работы, записывая контрольную точку в checkpoint_path.
+
+    Если файл уже существует, прогон продолжается с места остановки; описание
+    кампании в файле должно совпадать с переданным (или campaign=None - взять из файла).
+    """
+
+    def __init__(self, checkpoint_path: str, campaign: Optional[Campaign] = None, checkpoint_every: int = 1):
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.next_unit = 0
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get('version') != CHECKPOINT_VERSION:
+                raise ValueError(f"Неподдерживаемая версия контрольной точки: {state.get('version')}")
+            saved = Campaign.from_dict(state['campaign'])
+            if campaign is not None and campaign.to_dict() != saved.to_dict():
+                raise ValueError("Контрольная точка относится к другой кампании")
+            self.campaign = saved
+            self.next_unit = state['next_unit']
+            self.results = [ScenarioResult.from_dict(r) for r in state['results']]
+            self._check_positions(state['positions'])
+        elif campaign is None:
+            raise FileNotFoundError(f"Нет контрольной точки {checkpoint_path} и не задана кампания")
+        else:
+            self.campaign = campaign
+            self.results = [ScenarioResult() for _ in campaign.scenarios]
+        self._units = self.campaign.units()
+        self._trace = TraceSampler()
+
+    def positions(self) -> List[int]:
+        """Номер следующего боя (позиция в потоке seed) для каждого сценария."""
+        positions = [0] * len(self.campaign.scenarios)
+        for scenario_id, _, stop in self._units_done():
+            positions[scenario_id] = stop
+        return positions
+
+    def _units_done(self):
+        return self.campaign.units()[:self.next_unit]
+
+    def _check_positions(self, positions: List[int]):
+        if positions != self.positions():
+            raise ValueError("Контрольная точка повреждена: позиции потоков не совпадают с единицами работы")
+
+    @property
+    def finished(self) -> bool:
+        return self.next_unit >= len(self._units)
+
+    def run_unit(self, scenario_id: int, start: int, stop: int) -> ScenarioResult:
+        """Проводит бои [start, stop) сценария и возвращает их итоги."""
+        return run_scenario_unit(self.campaign.scenarios[scenario_id], self.campaign.battle_seed(scenario_id, 0),
+                                 start, stop, self._trace)
+
+    def run(self, max_units: Optional[int] = None) -> bool:
+        """Проводит оставшиеся единицы (не больше max_units). True, если кампания завершена."""
+        done = 0
+        while not self.finished and (max_units is None or done < max_units):
+            scenario_id, start, stop = self._units[self.next_unit]
+            self.results[scenario_id].merge(self.run_unit(scenario_id, start, stop))
+            self.next_unit += 1
+            done += 1
+            # При плановой остановке (max_units) точка пишется всегда
+            if self.finished or done == max_units or self.next_unit % self.checkpoint_every == 0:
+                self.save()
+        return self.finished
+
+    def save(self):
+        atomic_write_json(self.checkpoint_path, {
+            'version': CHECKPOINT_VERSION,
+            'campaign': self.campaign.to_dict(),
+            'next_unit': self.next_unit,
+            'positions': self.positions(),
+            'results': [result.to_dict() for result in self.results],
+        })
+
+    def summary(self) -> List[Dict[str, Any]]:
+        rows = []
+        for scenario, result in zip(self.campaign.scenarios, self.results):
+            rounds = result.stats.metrics.get('rounds')
+            rows.append({'scenario': repr(scenario), 'battles': result.battles, 'win_rate': result.win_rate,
+                         'timeouts': result.outcomes.get('timeout', 0),
+                         'stalemates': result.outcomes.get('stalemate', 0),
+                         'rounds_mean': rounds.mean if rounds else None,
+                         'rounds_p90': rounds.quantile(0.9) if rounds else None})
+        return rows
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Кампания боев с контрольными точками")
+    parser.add_argument("checkpoint", help="файл контрольной точки (если есть - продолжить)")
+    parser.add_argument("--spec", help="JSON с описанием кампании: scenarios, battles_per_scenario, "
+                                       "base_seed, unit_size")
+    parser.add_argument("--checkpoint-every", type=int, default=1, help="записывать точку каждые N единиц")
+    args = parser.parse_args(argv)
+
+    campaign = None
+    if args.spec:
+        with open(args.spec, encoding="utf-8") as f:
+            campaign = Campaign.from_dict(json.load(f))
+    runner = CampaignRunner(args.checkpoint, campaign, args.checkpoint_every)
+    total = len(runner.campaign.units())
+    if runner.next_unit:
+        print(f"Продолжение с единицы {runner.next_unit + 1} из {total}")
+    while not runner.run(max_units=args.checkpoint_every):
+        print(f"Готово единиц: {runner.next_unit}/{total}", flush=True)
+    for row in runner.summary():
+        print(f"{row['scenario']}: боев {row['battles']}, побед {row['win_rate']:.1%}, "
+              f"раундов в среднем {row['rounds_mean']:.1f}, p90 {row['rounds_p90']:.1f}, "
+              f"прервано по лимиту {row['timeouts']}, пат {row['stalemates']}")
+
+
+if __name__ == "__main__":
+    main()
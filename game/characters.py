@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-import random
-from typing import List, Dict
+from time import perf_counter
+from game import rng
+from typing import List, Dict, Optional
 from game.core import Character, CritMixin
-from game.skills import Skill, Effect, PoisonEffect, ShieldEffect
-from game.exceptions import NotEnoughMPError, SkillOnCooldownError, CharacterDeadError, InvalidTargetError
+from game.skills import Skill, Effect
+from game.skill_specs import SpecSkill
+from game.exceptions import SkillOnCooldownError, CharacterDeadError
+from game.minions import MINION_POOL, MINION_NAMES, Minion
 
 # Базовые характеристики по уровням
 BASE_STATS = {
@@ -13,9 +16,14 @@ BASE_STATS = {
     20: {'hp': 300, 'mp': 150, 'strength': 30, 'agility': 30, 'intellect': 30}
 }
 
+# Множители босса к базовым характеристикам уровня
+BOSS_MULTIPLIERS = {'hp': 3.0, 'mp': 2.0, 'strength': 2.0, 'agility': 1.5, 'intellect': 1.8}
+# Подобранные множители по уровням босса (game/tuner.py); уровни без записи - BOSS_MULTIPLIERS
+BOSS_LEVEL_MULTIPLIERS: Dict[int, Dict[str, float]] = {}
 
-def get_scaled_stats(level: int) -> dict:
-    """Возвращает характеристики, масштабированные под уровень."""
+
+def _interpolate_stats(level: int) -> dict:
+    """Характеристики уровня: интерполяция между ближайшими уровнями BASE_STATS."""
     levels = sorted(BASE_STATS.keys())
     if level <= levels[0]:
         return BASE_STATS[levels[0]]
@@ -39,200 +47,83 @@ def get_scaled_stats(level: int) -> dict:
     return BASE_STATS[levels[0]]
 
 
-# --- Навыки для игровых классов ---
-class SwingSword(Skill):
-    """Простая атака мечом для Воина."""
+# Характеристики всех уровней считаются один раз при импорте (воркеры forkserver
+# получают таблицу от сервера готовой); словари таблицы только для чтения
+SCALED_STATS = {level: _interpolate_stats(level) for level in range(min(BASE_STATS), max(BASE_STATS) + 1)}
 
-    def __init__(self):
-        super().__init__(name="Swing Sword", mp_cost=0, cooldown=0)
-
-    def use(self, user: Character, target: Character) -> str:
-        if not target.is_alive:
-            raise InvalidTargetError("Нельзя атаковать мертвого персонажа!")
-        base_damage = user.strength + random.randint(1, 5)
-        # Проверка на крит от пользователя (если он имеет CritMixin)
-        if isinstance(user, CritMixin) and user._check_crit():
-            base_damage = int(base_damage * user.crit_multiplier)
-            target.hp -= base_damage
-            return f"{user.name} наносит критический удар мечом {target.name} на {base_damage} урона!"
-        else:
-            target.hp -= base_damage
-            return f"{user.name} атакует мечом {target.name} и наносит {base_damage} урона."
+
+def get_scaled_stats(level: int) -> dict:
+    """Возвращает характеристики, масштабированные под уровень (не изменять)."""
+    stats = SCALED_STATS.get(level)
+    return stats if stats is not None else _interpolate_stats(level)
 
 
-class HeavySlam(Skill):
-    """Мощный удар воина."""
+# --- Навыки для игровых классов ---
+# Поведение навыков задано таблицей game/data/skills.json (см. game/skill_specs.py)
+class SwingSword(SpecSkill):
+    """Простая атака мечом для Воина."""
+    spec_id = "swing_sword"
 
-    def __init__(self):
-        super().__init__(name="Heavy Slam", mp_cost=10, cooldown=3)
 
-    def use(self, user, target):
-        if not target.is_alive:
-            raise InvalidTargetError("Нельзя атаковать мертвого персонажа!")
-        if user.mp < self.mp_cost:
-            raise NotEnoughMPError(f"Не хватает маны для использования {self.name}.")
-        user.mp -= self.mp_cost
-        damage = user.strength * 2 + random.randint(3, 7)
-        target.hp -= damage
-        return f"{user.name} обрушивает на {target.name} сокрушительный удар на {damage} урона!"
+class HeavySlam(SpecSkill):
+    """Мощный удар воина."""
+    spec_id = "heavy_slam"
 
 
-class Fireball(Skill):
+class Fireball(SpecSkill):
     """Огненный шар для Мага."""
+    spec_id = "fireball"
 
-    def __init__(self):
-        super().__init__(name="Fireball", mp_cost=15, cooldown=2)
-
-    def use(self, user: Character, target: Character) -> str:
-        if not target.is_alive:
-            raise InvalidTargetError("Нельзя атаковать мертвого персонажа!")
-        if user.mp < self.mp_cost:
-            raise NotEnoughMPError(f"Не хватает маны для использования {self.name}. Нужно {self.mp_cost} MP.")
-        user.mp -= self.mp_cost
-        base_damage = user.intellect + random.randint(5, 10)
-        target.hp -= base_damage
-        # Шанс поджечь цель (эффект яда)
-        if random.random() < 0.3:  # 30% шанс
-            poison_effect = PoisonEffect(damage_per_turn=3, duration=3)
-            if not hasattr(target, 'active_effects'):
-                target.active_effects = []
-            target.active_effects.append(poison_effect)
-            return (f"{user.name} запускает огненный шар в {target.name} и наносит {base_damage} урона! "
-                    f"{poison_effect.apply_start_effect(target)}")
-        return f"{user.name} запускает огненный шар в {target.name} и наносит {base_damage} урона."
-
-
-class ArcaneMissile(Skill):
-    """Магические снаряды для Мага."""
 
-    def __init__(self):
-        super().__init__(name="Arcane Missile", mp_cost=10, cooldown=2)
-
-    def use(self, user, target):
-        if not target.is_alive:
-            raise InvalidTargetError("Нельзя атаковать мертвого персонажа!")
-        if user.mp < self.mp_cost:
-            raise NotEnoughMPError(f"Не хватает маны для использования {self.name}.")
-        user.mp -= self.mp_cost
-        damage = user.intellect + random.randint(3, 6)
-        # Несколько снарядов
-        missile_count = 3
-        total_damage = 0
-        for i in range(missile_count):
-            total_damage += damage
-            target.hp -= damage
-        return f"{user.name} выпускает {missile_count} магических снаряда в {target.name} на общий урон {total_damage}!"
-
-
-class Heal(Skill):
-    """Лечение для Целителя."""
+class ArcaneMissile(SpecSkill):
+    """Магические снаряды для Мага."""
+    spec_id = "arcane_missile"
 
-    def __init__(self):
-        super().__init__(name="Heal", mp_cost=20, cooldown=3)
 
-    def use(self, user: Character, target: Character) -> str:
-        if user.mp < self.mp_cost:
-            raise NotEnoughMPError(f"Не хватает маны для использования {self.name}. Нужно {self.mp_cost} MP.")
-        heal_amount = user.intellect + random.randint(8, 12)
-        target.hp += heal_amount
-        user.mp -= self.mp_cost
-        return f"{user.name} лечит {target.name} на {heal_amount} HP."
+class Heal(SpecSkill):
+    """Лечение для Целителя."""
+    spec_id = "heal"
 
 
-class DivineShield(Skill):
+class DivineShield(SpecSkill):
     """Божественный щит для Целителя."""
-
-    def __init__(self):
-        super().__init__(name="Divine Shield", mp_cost=25, cooldown=4)
-
-    def use(self, user, target):
-        if user.mp < self.mp_cost:
-            raise NotEnoughMPError(f"Не хватает маны для использования {self.name}.")
-        user.mp -= self.mp_cost
-        shield_effect = ShieldEffect(shield_strength=20, duration=2)
-        if not hasattr(target, 'active_effects'):
-            target.active_effects = []
-        target.active_effects.append(shield_effect)
-        return f"{user.name} наделяет {target.name} божественным щитом! {shield_effect.apply_start_effect(target)}"
+    spec_id = "divine_shield"
 
 
 # --- Навыки для Босса ---
-class DragonBreath(Skill):
+class DragonBreath(SpecSkill):
     """Дыхание дракона - урон по площади с шансом поджечь."""
-
-    def __init__(self):
-        super().__init__(name="Dragon Breath", mp_cost=30, cooldown=3)
-
-    def use(self, user: Character, target: Character) -> str:
-        return "Дракон готовится к дыханию!"
+    spec_id = "dragon_breath"
 
 
-class TailSwipe(Skill):
+class TailSwipe(SpecSkill):
     """Удар хвостом - высокий урон одной цели с шансом оглушения."""
+    spec_id = "tail_swipe"
 
-    def __init__(self):
-        super().__init__(name="Tail Swipe", mp_cost=15, cooldown=2)
 
-    def use(self, user: Character, target: Character) -> str:
-        if not target.is_alive:
-            raise InvalidTargetError("Нельзя атаковать мертвого персонажа!")
-        damage = user.strength * 2 + random.randint(5, 10)
-        target.hp -= damage
-        # Шанс оглушения (пропуск хода)
-        if random.random() < 0.25:  # 25% шанс
-            target.stunned = True
-            return f"{user.name} бьет хвостом {target.name} на {damage} урона и оглушает его!"
-        return f"{user.name} бьет хвостом {target.name} на {damage} урона!"
-
-
-class WingBuffet(Skill):
+class WingBuffet(SpecSkill):
     """Удар крылом - отталкивание и урон всем целям."""
+    spec_id = "wing_buffet"
 
-    def __init__(self):
-        super().__init__(name="Wing Buffet", mp_cost=20, cooldown=2)
-
-    def use(self, user: Character, target: Character) -> str:
-        return "Дракон взмахивает крыльями!"
 
-
-class FearRoar(Skill):
+class FearRoar(SpecSkill):
     """Рык страха - снижение характеристик пати."""
+    spec_id = "fear_roar"
 
-    def __init__(self):
-        super().__init__(name="Fear Roar", mp_cost=25, cooldown=4)
-
-    def use(self, user: Character, target: Character) -> str:
-        return "Дракон издает устрашающий рык!"
 
-
-class SummonMinions(Skill):
+class SummonMinions(SpecSkill):
     """Призыв миньонов - добавляет временных помощников."""
+    spec_id = "summon_minions"
 
-    def __init__(self):
-        super().__init__(name="Summon Minions", mp_cost=40, cooldown=5)
-
-    def use(self, user: Character, target: Character) -> str:
-        return "Дракон призывает миньонов на помощь!"
 
-
-class MeteorShower(Skill):
+class MeteorShower(SpecSkill):
     """Метеоритный дождь - очень мощная АОЕ атака."""
+    spec_id = "meteor_shower"
 
-    def __init__(self):
-        super().__init__(name="Meteor Shower", mp_cost=50, cooldown=4)
-
-    def use(self, user: Character, target: Character) -> str:
-        return "Дракон призывает метеоритный дождь!"
 
-
-class Earthquake(Skill):
+class Earthquake(SpecSkill):
     """Землетрясение - урон и снижение характеристик."""
-
-    def __init__(self):
-        super().__init__(name="Earthquake", mp_cost=40, cooldown=3)
-
-    def use(self, user: Character, target: Character) -> str:
-        return "Дракон вызывает землетрясение!"
+    spec_id = "earthquake"
 
 
 # --- Игровые классы персонажей ---
@@ -259,6 +150,7 @@ class Warrior(Character, CritMixin):
         }
 
     def basic_attack(self, target: Character) -> str:
+        self.last_action = "attack"
         return self.skills["attack"].use(self, target)
 
     def use_skill(self, target: Character, skill_name: str = "heavy_slam") -> str:
@@ -267,6 +159,7 @@ class Warrior(Character, CritMixin):
         skill = self.skills[skill_name]
         if self.is_skill_on_cooldown(skill_name):
             raise SkillOnCooldownError(f"Навык {skill_name} на перезарядке.")
+        self.last_action = skill_name
         result = skill.use(self, target)
         self._put_skill_on_cooldown(skill_name, skill.cooldown)
         return result
@@ -292,6 +185,7 @@ class Mage(Character):
         }
 
     def basic_attack(self, target: Character) -> str:
+        self.last_action = "attack"
         return self.skills["attack"].use(self, target)
 
     def use_skill(self, target: Character, skill_name: str = "arcane_missile") -> str:
@@ -300,6 +194,7 @@ class Mage(Character):
         skill = self.skills[skill_name]
         if self.is_skill_on_cooldown(skill_name):
             raise SkillOnCooldownError(f"Навык {skill_name} на перезарядке.")
+        self.last_action = skill_name
         result = skill.use(self, target)
         self._put_skill_on_cooldown(skill_name, skill.cooldown)
         return result
@@ -325,6 +220,7 @@ class Healer(Character):
         }
 
     def basic_attack(self, target: Character) -> str:
+        self.last_action = "attack"
         return self.skills["attack"].use(self, target)
 
     def use_skill(self, target: Character, skill_name: str = "divine_shield") -> str:
@@ -333,6 +229,7 @@ class Healer(Character):
         skill = self.skills[skill_name]
         if self.is_skill_on_cooldown(skill_name):
             raise SkillOnCooldownError(f"Навык {skill_name} на перезарядке.")
+        self.last_action = skill_name
         result = skill.use(self, target)
         self._put_skill_on_cooldown(skill_name, skill.cooldown)
         return result
@@ -341,6 +238,10 @@ class Healer(Character):
 # --- Класс Босса ---
 class Boss(Character):
     """Класс Босса. Меняет фазы в зависимости от HP и использует различные навыки."""
+    basic_attack_name = 'Boss Attack'
+    minion_pool = MINION_POOL
+    metrics = None  # BattleMetrics текущего боя (выставляет Battle)
+    PHASE_STRATEGIES = {1: 'aggressive', 2: 'aoe', 3: 'enraged'}
 
     class Strategy(ABC):
         @abstractmethod
@@ -349,35 +250,43 @@ class Boss(Character):
 
     class AggressiveStrategy(Strategy):
         def execute(self, boss: 'Boss', party: List[Character]) -> str:
-            if random.random() < 0.8:
+            if rng.random() < 0.8:
                 return boss.use_random_skill(party)
             else:
                 return boss.basic_attack_random_target(party)
 
     class AOEStrategy(Strategy):
         def execute(self, boss: 'Boss', party: List[Character]) -> str:
-            if random.random() < 0.9:
+            if rng.random() < 0.9:
                 return boss.use_aoe_skill(party)
             else:
                 return boss.basic_attack_random_target(party)
 
     class EnragedStrategy(Strategy):
         def execute(self, boss: 'Boss', party: List[Character]) -> str:
-            if random.random() < 0.95:
+            if rng.random() < 0.95:
                 return boss.use_powerful_skill(party)
             else:
                 return boss.basic_attack_random_target(party)
 
-    def __init__(self, name: str, level: int = 5):
+    AOE_SKILLS = ("dragon_breath", "wing_buffet", "meteor_shower", "earthquake")
+    POWERFUL_SKILLS = ("meteor_shower", "earthquake", "dragon_breath", "summon_minions")
+
+    def __init__(self, name: str, level: int = 5, multipliers: Optional[Dict[str, float]] = None):
         super().__init__(name, level)
 
         base_stats = get_scaled_stats(level)
+        # multipliers - явные множители (подбор баланса), иначе таблица уровня или значения по умолчанию
+        if multipliers is None:
+            multipliers = BOSS_LEVEL_MULTIPLIERS.get(level, BOSS_MULTIPLIERS)
+        else:
+            multipliers = {**BOSS_MULTIPLIERS, **multipliers}
 
-        self.hp = int(base_stats['hp'] * 3.0)
-        self.mp = int(base_stats['mp'] * 2.0)
-        self.strength = int(base_stats['strength'] * 2.0)
-        self.agility = int(base_stats['agility'] * 1.5)
-        self.intellect = int(base_stats['intellect'] * 1.8)
+        self.hp = int(base_stats['hp'] * multipliers['hp'])
+        self.mp = int(base_stats['mp'] * multipliers['mp'])
+        self.strength = int(base_stats['strength'] * multipliers['strength'])
+        self.agility = int(base_stats['agility'] * multipliers['agility'])
+        self.intellect = int(base_stats['intellect'] * multipliers['intellect'])
 
         self.max_hp = self.hp
 
@@ -398,191 +307,97 @@ class Boss(Character):
         }
         self._current_strategy = self._strategies['aggressive']
 
-        self.minions = []
+        self.minions: List[Minion] = []  # живые и павшие миньоны текущего призыва (слоты пула)
+        self.minion_version = 0  # растет при каждом изменении состава миньонов
         self.phase = 1
+        # Переиспользуемые буферы хода: живые цели и имена доступных навыков
+        self._alive: List[Character] = []
+        self._available: List[str] = []
+
+    def _alive_targets(self, party: List[Character]) -> List[Character]:
+        """Заполняет буфер живых целей (без создания нового списка)."""
+        alive = self._alive
+        alive.clear()
+        for char in party:
+            if char.is_alive:
+                alive.append(char)
+        return alive
+
+    def _available_skills(self, skill_names) -> List[str]:
+        """Заполняет буфер именами готовых навыков из skill_names (порядок сохраняется)."""
+        available = self._available
+        available.clear()
+        skills = self.skills
+        for skill_name in skill_names:
+            skill = skills.get(skill_name)
+            if (skill and not self.is_skill_on_cooldown(skill_name) and
+                    self.mp >= skill.mp_cost):
+                available.append(skill_name)
+        return available
+
+    def _use_chosen(self, available: List[str], alive_targets: List[Character]) -> str:
+        skill_name = rng.choice(available)
+        skill = self.skills[skill_name]
+        self.last_action = skill_name
+        self.mp -= skill.mp_cost
+        self._put_skill_on_cooldown(skill_name, skill.cooldown)
+        return self._cast(skill, alive_targets)
 
     def basic_attack(self, target: Character) -> str:
-        damage = self.strength + random.randint(5, 12)
+        self.last_action = "attack"
+        damage = self.strength + rng.randint(5, 12)
         target.hp -= damage
         return f"{self.name} яростно атакует {target.name} и наносит {damage} урона!"
 
     def basic_attack_random_target(self, party: List[Character]) -> str:
-        alive_targets = [char for char in party if char.is_alive]
+        alive_targets = self._alive_targets(party)
         if not alive_targets:
             return "Все цели уже мертвы!"
-        target = random.choice(alive_targets)
+        target = rng.choice(alive_targets)
         return self.basic_attack(target)
 
     def use_skill(self, target: Character, skill_name: str = "") -> str:
         return self.use_random_skill([target] if target else [])
 
     def use_random_skill(self, party: List[Character]) -> str:
-        alive_targets = [char for char in party if char.is_alive]
+        alive_targets = self._alive_targets(party)
         if not alive_targets:
             return "Все цели мертвы!"
 
-        available_skills = []
-        for skill_name, skill in self.skills.items():
-            if (not self.is_skill_on_cooldown(skill_name) and
-                    self.mp >= skill.mp_cost):
-                available_skills.append((skill_name, skill))
-
+        available_skills = self._available_skills(self.skills)
         if not available_skills:
             return self.basic_attack_random_target(party)
 
-        skill_name, skill = random.choice(available_skills)
-        self.mp -= skill.mp_cost
-        self._put_skill_on_cooldown(skill_name, skill.cooldown)
-
-        if skill_name == "dragon_breath":
-            return self._use_dragon_breath(alive_targets)
-        elif skill_name == "tail_swipe":
-            target = random.choice(alive_targets)
-            return skill.use(self, target)
-        elif skill_name == "wing_buffet":
-            return self._use_wing_buffet(alive_targets)
-        elif skill_name == "fear_roar":
-            return self._use_fear_roar(alive_targets)
-        elif skill_name == "summon_minions":
-            return self._use_summon_minions()
-        elif skill_name == "meteor_shower":
-            return self._use_meteor_shower(alive_targets)
-        elif skill_name == "earthquake":
-            return self._use_earthquake(alive_targets)
-        else:
-            target = random.choice(alive_targets)
-            return skill.use(self, target)
+        return self._use_chosen(available_skills, alive_targets)
 
     def use_aoe_skill(self, party: List[Character]) -> str:
-        alive_targets = [char for char in party if char.is_alive]
+        alive_targets = self._alive_targets(party)
         if not alive_targets:
             return "Все цели мертвы!"
 
-        aoe_skills = ["dragon_breath", "wing_buffet", "meteor_shower", "earthquake"]
-        available_aoe_skills = []
-
-        for skill_name in aoe_skills:
-            skill = self.skills.get(skill_name)
-            if (skill and not self.is_skill_on_cooldown(skill_name) and
-                    self.mp >= skill.mp_cost):
-                available_aoe_skills.append((skill_name, skill))
-
+        available_aoe_skills = self._available_skills(self.AOE_SKILLS)
         if available_aoe_skills:
-            skill_name, skill = random.choice(available_aoe_skills)
-            self.mp -= skill.mp_cost
-            self._put_skill_on_cooldown(skill_name, skill.cooldown)
-
-            if skill_name == "dragon_breath":
-                return self._use_dragon_breath(alive_targets)
-            elif skill_name == "wing_buffet":
-                return self._use_wing_buffet(alive_targets)
-            elif skill_name == "meteor_shower":
-                return self._use_meteor_shower(alive_targets)
-            elif skill_name == "earthquake":
-                return self._use_earthquake(alive_targets)
+            return self._use_chosen(available_aoe_skills, alive_targets)
         else:
             return self.use_random_skill(party)
 
     def use_powerful_skill(self, party: List[Character]) -> str:
-        alive_targets = [char for char in party if char.is_alive]
+        alive_targets = self._alive_targets(party)
         if not alive_targets:
             return "Все цели мертвы!"
 
-        powerful_skills = ["meteor_shower", "earthquake", "dragon_breath", "summon_minions"]
-        available_powerful_skills = []
-
-        for skill_name in powerful_skills:
-            skill = self.skills.get(skill_name)
-            if (skill and not self.is_skill_on_cooldown(skill_name) and
-                    self.mp >= skill.mp_cost):
-                available_powerful_skills.append((skill_name, skill))
-
+        available_powerful_skills = self._available_skills(self.POWERFUL_SKILLS)
         if available_powerful_skills:
-            skill_name, skill = random.choice(available_powerful_skills)
-            self.mp -= skill.mp_cost
-            self._put_skill_on_cooldown(skill_name, skill.cooldown)
-
-            if skill_name == "dragon_breath":
-                return self._use_dragon_breath(alive_targets)
-            elif skill_name == "meteor_shower":
-                return self._use_meteor_shower(alive_targets)
-            elif skill_name == "earthquake":
-                return self._use_earthquake(alive_targets)
-            elif skill_name == "summon_minions":
-                return self._use_summon_minions()
+            return self._use_chosen(available_powerful_skills, alive_targets)
         else:
             return self.use_aoe_skill(party)
 
-    def _use_dragon_breath(self, targets: List[Character]) -> str:
-        results = []
-        for target in targets:
-            damage = self.intellect + random.randint(15, 25)
-            target.hp -= damage
-            results.append(f"{target.name} получает {damage} урона от дыхания")
-
-            if random.random() < 0.6:
-                poison_effect = PoisonEffect(damage_per_turn=8, duration=3)
-                if not hasattr(target, 'active_effects'):
-                    target.active_effects = []
-                target.active_effects.append(poison_effect)
-                results.append(f"и горит!")
-
-        return f"{self.name} извергает пламя! " + ". ".join(results)
-
-    def _use_wing_buffet(self, targets: List[Character]) -> str:
-        results = []
-        for target in targets:
-            damage = self.strength // 2 + random.randint(8, 15)
-            target.hp -= damage
-            results.append(f"{target.name} отброшен на {damage} урона")
-
-            if random.random() < 0.5:
-                target.agility = max(1, target.agility - 8)
-                results.append(f"и дезориентирован")
-
-        return f"{self.name} взмахивает крыльями! " + ". ".join(results)
-
-    def _use_fear_roar(self, targets: List[Character]) -> str:
-        results = []
-        for target in targets:
-            target.strength = max(1, target.strength - 5)
-            target.intellect = max(1, target.intellect - 5)
-            target.agility = max(1, target.agility - 3)
-            results.append(f"{target.name} напуган")
-
-        return f"{self.name} издает ужасающий рык! " + ". ".join(results) + ". Характеристики снижены!"
-
-    def _use_summon_minions(self) -> str:
-        minion_count = random.randint(2, 4)
-        self.minions = [f"Миньон {i + 1}" for i in range(minion_count)]
-        return f"{self.name} призывает {minion_count} миньонов! Они присоединятся к атаке в следующем раунде."
-
-    def _use_meteor_shower(self, targets: List[Character]) -> str:
-        results = []
-        for target in targets:
-            damage = self.intellect * 2 + random.randint(20, 35)
-            target.hp -= damage
-            results.append(f"{target.name} получает {damage} урона от метеоритов")
-
-            if random.random() < 0.4:
-                target.stunned = True
-                results.append(f"и оглушен")
-
-        return f"{self.name} призывает метеоритный дождь! " + ". ".join(results)
-
-    def _use_earthquake(self, targets: List[Character]) -> str:
-        results = []
-        for target in targets:
-            damage = self.strength + random.randint(10, 20)
-            target.hp -= damage
-
-            target.strength = max(1, target.strength - 4)
-            target.intellect = max(1, target.intellect - 4)
-            target.agility = max(1, target.agility - 6)
-
-            results.append(f"{target.name} получает {damage} урона и ослаблен")
-
-        return f"{self.name} вызывает землетрясение! " + ". ".join(results)
+    def _cast(self, skill: Skill, alive_targets: List[Character]) -> str:
+        """Применяет навык по его форме цели: одиночные - по случайной живой цели."""
+        if getattr(skill, 'target_shape', 'single') == 'single':
+            target = rng.choice(alive_targets)
+            return skill.use(self, target)
+        return skill.use_on(self, alive_targets)
 
     def choose_strategy(self, party: List[Character]):
         hp_percentage = self.hp / self.max_hp
@@ -590,46 +405,51 @@ class Boss(Character):
         if hp_percentage < 0.2:
             self._current_strategy = self._strategies['enraged']
             if self.phase != 3:
-                self.phase = 3
+                self._enter_phase(3)
                 self.log(f"{self.name} впадает в ЯРОСТЬ! Его атаки становятся смертоносными!")
         elif hp_percentage < 0.5:
             self._current_strategy = self._strategies['aoe']
             if self.phase != 2:
-                self.phase = 2
+                self._enter_phase(2)
                 self.log(f"{self.name} впадает в ярость и начинает атаковать всех сразу!")
         else:
             self._current_strategy = self._strategies['aggressive']
             if self.phase != 1:
-                self.phase = 1
+                self._enter_phase(1)
+
+    def _enter_phase(self, phase: int):
+        if self.metrics is not None:
+            self.metrics.phase_transition(self.phase, phase)
+        previous, self.phase = self.phase, phase
+        if self._events is not None:
+            self._events.phase_changed(self, previous, phase)
 
     def take_turn(self, party: List[Character]) -> str:
         if not self.is_alive:
             raise CharacterDeadError("Босс мертв и не может действовать.")
 
         self.choose_strategy(party)
+        if self.metrics is None:
+            return self._current_strategy.execute(self, party)
+        started = perf_counter()
         result = self._current_strategy.execute(self, party)
-
-        if self.minions:
-            minion_attack = self._minions_attack(party)
-            if minion_attack:
-                result += " " + minion_attack
-
+        self.metrics.boss_turn(self.PHASE_STRATEGIES[self.phase], perf_counter() - started)
         return result
 
-    def _minions_attack(self, party: List[Character]) -> str:
-        alive_targets = [char for char in party if char.is_alive]
-        if not alive_targets or not self.minions:
-            return ""
-
-        results = []
+    def summon_minions(self, count: int):
+        """Призывает count миньонов вместо прежних. Слоты берутся из пула."""
+        self.dismiss_minions()
+        hp = 10 + self.level * 2
+        for i in range(count):
+            self.minions.append(self.minion_pool.acquire(MINION_NAMES[i], hp=hp, strength=5,
+                                                         agility=8, damage_min=5, damage_max=10))
+        self.minion_version += 1
+
+    def dismiss_minions(self):
+        """Возвращает всех миньонов в пул."""
+        if not self.minions:
+            return
         for minion in self.minions:
-            target = random.choice(alive_targets)
-            damage = random.randint(5, 10)
-            target.hp -= damage
-            results.append(f"{minion} атакует {target.name} на {damage} урона")
-
-        if random.random() < 0.3:
-            self.minions = []
-            results.append("Миньоны исчезают!")
-
-        return ". ".join(results)
\ No newline at end of file
+            self.minion_pool.release(minion)
+        self.minions.clear()
+        self.minion_version += 1
@@ -0,0 +1,300 @@
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.managers import BaseManager
+from typing import Dict, Any, List, Optional, Tuple
+from game.campaign import Campaign, ScenarioResult, run_scenario_unit
+from game.simulation import Scenario
+
+# --- Распределенные кампании: координатор и воркеры ---
+# Координатор держит очередь единиц работы кампании (game/campaign.py) и отдает
+# их воркерам через multiprocessing.managers по TCP. Воркер берет единицу в аренду,
+# проводит бои и возвращает итоги единицы (ScenarioResult.to_dict), пока фоновый
+# поток продлевает аренду. Аренда без продления дольше lease_timeout считается
+# потерянной (воркер упал или пропал из сети), и единица возвращается в начало
+# очереди. Повторные сдачи одной единицы игнорируются. Итоги сливаются строго
+# в порядке номеров единиц, поэтому результат совпадает с CampaignRunner
+# на одной машине.
+# Менеджер распаковывает (unpickle) все, что ему присылают, поэтому ключ
+# аутентификации обязателен и без значения по умолчанию: в CLI - --authkey или
+# переменная окружения AUTHKEY_ENV. Координатор по умолчанию слушает только localhost.
+
+DEFAULT_PORT = 50055
+AUTHKEY_ENV = 'RPG_CLUSTER_AUTHKEY'
+
+
+class Coordinator:
+    """Очередь единиц работы с арендой и итогами. Методы вызываются воркерами через прокси."""
+
+    def __init__(self, campaign: Campaign, lease_timeout: float = 30.0):
+        self.campaign = campaign
+        self.lease_timeout = lease_timeout
+        self._units = campaign.units()
+        self._queue = deque(range(len(self._units)))
+        self._leases: Dict[int, Tuple[str, float]] = {}  # единица -> (воркер, срок аренды)
+        self._completed: Dict[int, ScenarioResult] = {}  # сданы, но еще не слиты по порядку
+        self._merged = 0  # единицы [0, _merged) уже слиты в results
+        self.results = [ScenarioResult() for _ in campaign.scenarios]
+        self.requeued = 0
+        self.workers: Dict[str, int] = {}  # воркер -> сданных единиц
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def _reap(self, now: float):
+        for unit, (worker, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[unit]
+                self._queue.appendleft(unit)
+                self.requeued += 1
+
+    def lease(self, worker: str) -> Dict[str, Any]:
+        """Следующая единица: {'status': 'work', ...}, 'wait' (все в аренде) или 'done'."""
+        with self._lock:
+            now = time.monotonic()
+            self._reap(now)
+            self.workers.setdefault(worker, 0)
+            if not self._queue:
+                return {'status': 'done' if self._done.is_set() else 'wait', 'retry': self.lease_timeout / 4}
+            unit = self._queue.popleft()
+            self._leases[unit] = (worker, now + self.lease_timeout)
+            scenario_id, start, stop = self._units[unit]
+            return {'status': 'work', 'unit': unit, 'scenario': self.campaign.scenarios[scenario_id].to_dict(),
+                    'start': start, 'stop': stop, 'seed_base': self.campaign.battle_seed(scenario_id, 0)}
+
+    def heartbeat(self, worker: str) -> int:
+        """Продлевает все аренды воркера; возвращает их число."""
+        with self._lock:
+            deadline = time.monotonic() + self.lease_timeout
+            extended = 0
+            for unit, (owner, _) in self._leases.items():
+                if owner == worker:
+                    self._leases[unit] = (worker, deadline)
+                    extended += 1
+            return extended
+
+    def complete(self, worker: str, unit: int, result: Dict[str, Any]) -> bool:
+        """Принимает итоги единицы. False - единица уже сдана (дубликат после переназначения)."""
+        with self._lock:
+            if unit < self._merged or unit in self._completed:
+                return False
+            self._leases.pop(unit, None)
+            if unit in self._queue:
+                self._queue.remove(unit)  # аренда истекла, но воркер все же успел
+            self._completed[unit] = ScenarioResult.from_dict(result)
+            self.workers[worker] = self.workers.get(worker, 0) + 1
+            while self._merged in self._completed:
+                scenario_id = self._units[self._merged][0]
+                self.results[scenario_id].merge(self._completed.pop(self._merged))
+                self._merged += 1
+            if self._merged == len(self._units):
+                self._done.set()
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._reap(time.monotonic())
+            return {'units': len(self._units), 'merged': self._merged, 'completed': len(self._completed),
+                    'leased': len(self._leases), 'queued': len(self._queue), 'requeued': self.requeued,
+                    'workers': dict(self.workers)}
+
+    def is_finished(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class _WorkerManager(BaseManager):
+    pass
+
+
+_WorkerManager.register('coordinator')
+
+
+class CoordinatorServer:
+    """TCP-сервер менеджера в фоновом потоке процесса координатора.
+
+    Цикл приема соединений свой: Server.serve_forever рассчитан на отдельный процесс
+    менеджера - при выходе он подменяет sys.stdout/sys.stderr и вызывает sys.exit.
+    """
+
+    def __init__(self, coordinator: Coordinator, address: Tuple[str, int], authkey: bytes):
+        manager_class = type('CoordinatorManager', (BaseManager,), {})
+        manager_class.register('coordinator', callable=lambda: coordinator)
+        self.coordinator = coordinator
+        self._server = manager_class(address=address, authkey=authkey).get_server()
+        self.address = self._server.address
+        # Событие остановки нужно и циклам обслуживания клиентов (Server.serve_client) -
+        # выставляем его до запуска потока
+        self._stop = self._server.stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._accept, name="coordinator", daemon=True)
+        self._thread.start()
+
+    def _accept(self):
+        while not self._stop.is_set():
+            try:
+                connection = self._server.listener.accept()
+            except OSError:
+                continue  # сбой входящего соединения; после close() цикл завершится
+            if self._stop.is_set():
+                connection.close()
+                break
+            threading.Thread(target=self._server.handle_request, args=(connection,), daemon=True).start()
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        # accept() не прерывается закрытием сокета из другого потока - будим его соединением
+        host, port = self.address
+        try:
+            socket.create_connection(('127.0.0.1' if host in ('0.0.0.0', '') else host, port), timeout=1).close()
+        except OSError:
+            pass
+        self._server.listener.close()
+        self._thread.join(timeout=5)
+
+    def __enter__(self) -> 'CoordinatorServer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def connect(address: Tuple[str, int], authkey: bytes, retries: int = 20):
+    """Прокси координатора; пока сервер не поднялся, подключение повторяется."""
+    for attempt in range(retries):
+        manager = _WorkerManager(address=address, authkey=authkey)
+        try:
+            manager.connect()
+            return manager.coordinator()
+        except ConnectionRefusedError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(0.5)
+
+
+def run_worker(address: Tuple[str, int], authkey: bytes, worker_id: Optional[str] = None,
+               heartbeat_interval: float = 5.0) -> int:
+    """Цикл воркера: аренда, бои, сдача итогов. Возвращает число сданных единиц."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    coordinator = connect(address, authkey)
+    stop = threading.Event()
+
+    def beat():
+        # Прокси сам открывает отдельное соединение для этого потока
+        while not stop.wait(heartbeat_interval):
+            try:
+                coordinator.heartbeat(worker_id)
+            except (EOFError, OSError):
+                return
+
+    threading.Thread(target=beat, name="heartbeat", daemon=True).start()
+    units = 0
+    try:
+        while True:
+            try:
+                task = coordinator.lease(worker_id)
+            except (EOFError, OSError):
+                break  # координатор завершился
+            if task['status'] == 'done':
+                break
+            if task['status'] == 'wait':
+                time.sleep(task['retry'])
+                continue
+            result = run_scenario_unit(Scenario.from_dict(task['scenario']), task['seed_base'],
+                                       task['start'], task['stop'])
+            if coordinator.complete(worker_id, task['unit'], result.to_dict()):
+                units += 1
+    finally:
+        stop.set()
+    return units
+
+
+def _worker_process(address, authkey, worker_id, heartbeat_interval):
+    run_worker(address, authkey, worker_id, heartbeat_interval)
+
+
+def start_workers(count: int, address: Tuple[str, int], authkey: bytes,
+                  heartbeat_interval: float = 5.0, prefix: Optional[str] = None) -> List[multiprocessing.Process]:
+    """Запускает count процессов-воркеров на этой машине."""
+    prefix = prefix or socket.gethostname()
+    processes = []
+    for i in range(count):
+        process = multiprocessing.Process(target=_worker_process, name=f"worker-{i}",
+                                          args=(address, authkey, f"{prefix}-{i}", heartbeat_interval))
+        process.start()
+        processes.append(process)
+    return processes
+
+
+def run_distributed(campaign: Campaign, workers: int = 2, lease_timeout: float = 30.0,
+                    address: Tuple[str, int] = ('127.0.0.1', 0), authkey: Optional[bytes] = None) -> Coordinator:
+    """Координатор и workers локальных воркеров на localhost; возвращает координатор с итогами.
+
+    Без authkey для прогона создается случайный ключ - воркеры получают его при запуске.
+    """
+    authkey = authkey or os.urandom(32)
+    coordinator = Coordinator(campaign, lease_timeout)
+    with CoordinatorServer(coordinator, address, authkey) as server:
+        processes = start_workers(workers, server.address, authkey, heartbeat_interval=lease_timeout / 4)
+        coordinator.wait()
+        for process in processes:
+            process.join()
+    return coordinator
+
+
+def _parse_address(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or '127.0.0.1', int(port)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Распределенная кампания боев: координатор и воркеры")
+    parser.add_argument("--authkey", default=os.environ.get(AUTHKEY_ENV),
+                        help=f"общий секрет координатора и воркеров (или переменная окружения {AUTHKEY_ENV})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("coordinator", help="раздавать единицы кампании")
+    serve.add_argument("--spec", required=True, help="JSON с описанием кампании (как у game.campaign)")
+    serve.add_argument("--bind", default=f"127.0.0.1:{DEFAULT_PORT}",
+                       help="хост:порт; для воркеров с других машин - внешний адрес, например 0.0.0.0:50055")
+    serve.add_argument("--lease-timeout", type=float, default=30.0)
+    serve.add_argument("--output", help="куда записать итоги (JSON)")
+
+    work = commands.add_parser("worker", help="брать единицы у координатора")
+    work.add_argument("--connect", required=True, help="хост:порт координатора")
+    work.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    work.add_argument("--heartbeat", type=float, default=5.0)
+
+    args = parser.parse_args(argv)
+    if not args.authkey:
+        parser.error(f"нужен ключ: --authkey или переменная окружения {AUTHKEY_ENV}")
+    authkey = args.authkey.encode("utf-8")
+    if args.command == "coordinator":
+        with open(args.spec, encoding="utf-8") as f:
+            campaign = Campaign.from_dict(json.load(f))
+        coordinator = Coordinator(campaign, args.lease_timeout)
+        with CoordinatorServer(coordinator, _parse_address(args.bind), authkey):
+            while not coordinator.wait(10):
+                print(coordinator.status(), flush=True)
+            # Даем воркерам забрать статус 'done' перед закрытием сервера
+            time.sleep(min(args.lease_timeout / 4, 5))
+        print(coordinator.status())
+        for scenario, result in zip(campaign.scenarios, coordinator.results):
+            print(f"{scenario!r}: боев {result.battles}, побед {result.win_rate:.1%}")
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump([result.to_dict() for result in coordinator.results], f, ensure_ascii=False)
+    else:
+        for process in start_workers(args.processes, _parse_address(args.connect), authkey, args.heartbeat):
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
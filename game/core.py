@@ -10,6 +10,10 @@ class BoundedStat:
         self.max_value = max_value
         # Создаем уникальное имя для хранения значения в экземпляре
         self.private_name = f"_{id(self)}"
+        self.name = self.private_name
+
+    def __set_name__(self, owner: Any, name: str) -> None:
+        self.name = name  # имя характеристики для наблюдателя состояния
 
     def __get__(self, obj: Any, objtype: Any = None) -> float:
         return getattr(obj, self.private_name, self.max_value)
@@ -21,6 +25,34 @@ class BoundedStat:
             # Для простоты ограничим.
             value = max(self.min_value, min(value, self.max_value))
         setattr(obj, self.private_name, value)
+        watcher = obj._state_watcher
+        if watcher is not None:
+            watcher.changed(obj, self.name)
+
+
+class HealthStat(BoundedStat):
+    """HP: кроме проверки границ сообщает шине событий боя (game/events.py) об уроне, лечении и смерти."""
+
+    def __set__(self, obj: Any, value: float) -> None:
+        if not (self.min_value <= value <= self.max_value):
+            value = max(self.min_value, min(value, self.max_value))
+        events = obj._events
+        if events is None:
+            setattr(obj, self.private_name, value)
+        else:
+            old = getattr(obj, self.private_name, self.max_value)
+            setattr(obj, self.private_name, value)
+            events.hp_changed(obj, old, value)
+        watcher = obj._state_watcher
+        if watcher is not None:
+            watcher.changed(obj, self.name)
+
+
+def notify_state(obj: Any, component: Any) -> None:
+    """Сообщает наблюдателю состояния (StateHasher), что часть состояния obj изменилась."""
+    watcher = obj._state_watcher
+    if watcher is not None:
+        watcher.changed(obj, component)
 
 
 # --- Миксины ---
@@ -30,25 +62,37 @@ class CritMixin:
     crit_multiplier: float = 1.5
 
     def _check_crit(self) -> bool:
-        import random
-        return random.random() < self.crit_chance
+        from game import rng
+        return rng.random() < self.crit_chance
 
 
 class LoggerMixin:
     """Миксин для простого логирования действий."""
+    # Куда отправлять сообщения (например, Battle._log_event); None - печать на экран
+    log_sink = None
+
     def log(self, message: str):
-        print(f"[{self.__class__.__name__}] {message}")
+        line = f"[{self.__class__.__name__}] {message}"
+        if self.log_sink is not None:
+            self.log_sink(line)
+        else:
+            print(line)
 
 
 # --- Базовый класс Human ---
 class Human(LoggerMixin):
     """Базовый класс для всех людей в игре."""
     # Используем дескрипторы для валидации
-    hp = BoundedStat(0, 100)
+    hp = HealthStat(0, 100)
     mp = BoundedStat(0, 100)
     strength = BoundedStat(1, 30)
     agility = BoundedStat(1, 30)
     intellect = BoundedStat(1, 30)
+    # Наблюдатель изменений состояния (game/state_hash.py); None - изменения никто не отслеживает
+    _state_watcher = None
+    # Обработчики событий текущего боя (game/events.py); None - подписчиков нет
+    _events = None
+    stunned = False  # пропускает следующий ход
 
     def __init__(self, name: str, level: int = 1):
         self.name = name
@@ -80,6 +124,8 @@ class Character(Human, ABC):
     def __init__(self, name: str, level: int = 1):
         super().__init__(name, level)
         self._cooldowns = {}  # Словарь для отслеживания кулдаунов навыков {skill_name: rounds_left}
+        self.active_effects = []  # Наложенные эффекты (Effect); истекшие снимает EffectManager
+        self.last_action = None  # Имя последнего использованного навыка ("attack" - базовая атака)
 
     @abstractmethod
     def basic_attack(self, target: 'Character') -> str:
@@ -97,10 +143,14 @@ class Character(Human, ABC):
             self._cooldowns[skill] -= 1
             if self._cooldowns[skill] <= 0:
                 del self._cooldowns[skill]
+            if self._state_watcher is not None:
+                self._state_watcher.changed(self, ('cooldown', skill))
 
     def _put_skill_on_cooldown(self, skill_name: str, cooldown: int):
         """Помещает навык на перезарядку."""
         self._cooldowns[skill_name] = cooldown
+        if self._state_watcher is not None:
+            self._state_watcher.changed(self, ('cooldown', skill_name))
 
     def is_skill_on_cooldown(self, skill_name: str) -> bool:
         """Проверяет, находится ли навык на перезарядке."""
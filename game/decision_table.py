@@ -0,0 +1,363 @@
+import argparse
+import time
+from bisect import bisect_right
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from game import rng
+from game.battle import Battle, BattleObserver, SUPPORT_SKILLS
+from game.characters import Boss, Healer, Warrior
+from game.events import EventBus
+from game.policies import WOUNDED_HP, Policy, PartyPolicy
+from game.simulation import CHARACTER_CLASSES, Scenario, run_battle
+from game.tracing import TraceSampler
+
+# --- Скомпилированные таблицы решений ИИ пати ---
+# Состояние героя сводится к дискретным признакам: класс, полоса своего HP, полоса
+# MP, полоса HP самого раненого живого союзника, фаза босса и биты готовности
+# навыков (не на перезарядке и хватает MP). Для каждой комбинации признаков
+# решение считается заранее, и в бою ход героя - это вычисление индекса и одно
+# обращение к списку. Решение - (порог, действие, запасное действие): при пороге
+# бросается rng.random() < порог, как в _choose_party_action, поэтому таблица,
+# скомпилированная из текущей эвристики, дает те же бои бросок в бросок.
+# Таблицу можно построить из правила над признаками (compile_table, эвристика -
+# heuristic_rule) или перенять у любой политики пати, например поисковой, по ее
+# решениям в боях (distill).
+# Полоса самого раненого союзника ведется инкрементально по событиям урона и
+# лечения (game/events.py), а не проходом по пати на каждый ход, поэтому цена
+# решения не растет с размером пати. Если таблица от этого признака не зависит,
+# события не подключаются вовсе.
+
+HP_BANDS = (30, WOUNDED_HP, 85)  # границы полос HP: < 30, < 60, < 85, остальное
+MP_BANDS = (20, 50, 80)
+NO_ALLY = len(HP_BANDS) + 1  # полоса союзника, когда живых союзников нет
+PHASES = (1, 2, 3)
+
+ENEMY = 'enemy'  # цель - противник (_choose_enemy_target)
+ALLY = 'ally'  # цель - самый раненый союзник
+BASIC = 'basic'  # базовая атака (у целителя - лечение)
+SKILL = 'skill'
+
+Action = Tuple[str, Optional[str], str]  # (BASIC или SKILL, имя навыка, ENEMY или ALLY)
+Decision = Tuple[Optional[float], Action, Action]  # (порог броска или None, действие, запасное)
+
+
+class Features:
+    """Признаки одной клетки таблицы (аргумент правила compile_table)."""
+
+    def __init__(self, cls: type, skills: Tuple[str, ...], hp_band: int, mp_band: int,
+                 ally_band: int, phase: int, ready: Tuple[bool, ...]):
+        self.cls = cls
+        self.skills = skills  # имена навыков класса в порядке словаря skills
+        self.hp_band = hp_band
+        self.mp_band = mp_band
+        self.ally_band = ally_band  # NO_ALLY - живых союзников нет
+        self.phase = phase
+        self.ready = ready  # готовность навыков, по порядку skills
+
+    def is_ready(self, skill_name: str) -> bool:
+        return skill_name in self.skills and self.ready[self.skills.index(skill_name)]
+
+    @property
+    def ally_wounded(self) -> bool:
+        return self.ally_band < HP_BANDS.index(WOUNDED_HP) + 1
+
+
+def class_skills(cls: type) -> Tuple[Tuple[str, int], ...]:
+    """Навыки класса (имя, стоимость MP) по порядку; берутся у прототипа героя."""
+    prototype = cls("Прототип", 1)
+    return tuple((name, skill.mp_cost) for name, skill in prototype.skills.items())
+
+
+def heuristic_rule(features: Features) -> Decision:
+    """Battle._choose_party_action, выраженная через признаки."""
+    if features.ally_wounded:
+        if issubclass(features.cls, Healer) and features.is_ready('heal'):
+            action = (SKILL, 'heal', ALLY)
+            return None, action, action
+        if issubclass(features.cls, Warrior) and features.is_ready('divine_shield'):
+            action = (SKILL, 'divine_shield', ALLY)
+            return None, action, action
+    basic = (BASIC, None, ENEMY)
+    for skill_name, ready in zip(features.skills, features.ready):
+        if ready and skill_name not in SUPPORT_SKILLS:
+            return 0.7, basic, (SKILL, skill_name, ENEMY)
+    return 0.7, basic, basic
+
+
+class AllyTracker:
+    """Живые герои пати по полосам HP; обновляется событиями урона и лечения."""
+
+    def __init__(self, party: Sequence):
+        self.party = {id(char) for char in party}
+        self.bands: List[Dict] = [{} for _ in range(len(HP_BANDS) + 1)]  # dict - порядок детерминирован
+        self.band_of: Dict[int, int] = {}
+        for char in party:
+            self.update(char)
+
+    def update(self, char):
+        key = id(char)
+        if key not in self.party:
+            return
+        old = self.band_of.pop(key, None)
+        if old is not None:
+            del self.bands[old][char]
+        if char.hp > 0:
+            band = bisect_right(HP_BANDS, char.hp)
+            self.band_of[key] = band
+            self.bands[band][char] = None
+
+    def lowest(self, exclude) -> Tuple[int, Optional[object]]:
+        """Полоса и герой из самой низкой полосы, кроме exclude; (NO_ALLY, None) - никого."""
+        for band, members in enumerate(self.bands):
+            for char in members:
+                if char is not exclude:
+                    return band, char
+        return NO_ALLY, None
+
+
+class TablePolicy(BattleObserver):
+    """Политика пати по таблице решений: policy(battle, character) -> str.
+
+    Подключается через Policy (game/policies.py), которая вызывает on_battle_start.
+    Классы героев вне таблицы ходят по _choose_party_action.
+    """
+
+    def __init__(self, table: List[Decision], classes: Dict[type, Tuple[int, Tuple[Tuple[int, str, int], ...]]],
+                 tracks_allies: bool):
+        self.table = table
+        self.classes = classes  # класс -> (смещение в таблице, ((бит, навык, стоимость MP), ...))
+        self.tracks_allies = tracks_allies
+        self._tracker: Optional[AllyTracker] = None
+        self._battle: Optional[Battle] = None
+        self._bus = EventBus()  # своя шина для боев без шины событий
+        self._bus.subscribe('on_damage', self._hp_changed)
+        self._bus.subscribe('on_heal', self._hp_changed)
+
+    def _hp_changed(self, battle: Battle, target, amount: int, source):
+        if battle is self._battle:
+            self._tracker.update(target)
+
+    def on_battle_start(self, battle: Battle):
+        self._battle = battle
+        if not self.tracks_allies:
+            return
+        self._tracker = AllyTracker(battle.party)
+        if battle.events is None:
+            battle.events = self._bus
+        else:  # шина вызывающего: подписка только на время боя
+            battle.events.subscribe('on_damage', self._hp_changed)
+            battle.events.subscribe('on_heal', self._hp_changed)
+
+    def on_battle_end(self, battle: Battle):
+        if battle is not self._battle:
+            return
+        if self.tracks_allies:
+            if battle.events is self._bus:
+                battle.events = None
+            else:
+                battle.events.unsubscribe('on_damage', self._hp_changed)
+                battle.events.unsubscribe('on_heal', self._hp_changed)
+        self._battle = self._tracker = None
+
+    def index(self, battle: Battle, character) -> int:
+        """Номер клетки таблицы для хода character."""
+        offset, skills = self.classes[type(character)]
+        mp = character.mp
+        cooldowns = character._cooldowns
+        bits = 0
+        for bit, skill_name, cost in skills:
+            if mp >= cost and cooldowns.get(skill_name, 0) <= 0:
+                bits |= bit
+        ally_band = self._tracker.lowest(character)[0] if self.tracks_allies else NO_ALLY
+        return (offset + bits + _STRIDE_PHASE * (battle.boss.phase - 1) + _STRIDE_ALLY * ally_band
+                + _STRIDE_MP * bisect_right(MP_BANDS, mp) + _STRIDE_HP * bisect_right(HP_BANDS, character.hp))
+
+    def __call__(self, battle: Battle, character) -> str:
+        if type(character) not in self.classes:
+            return battle._choose_party_action(character)
+        threshold, action, fallback = self.table[self.index(battle, character)]
+        if action[2] is ENEMY and not battle.boss.is_alive:
+            return f"{character.name} ищет цель, но все враги повержены!"
+        if threshold is not None and not rng.random() < threshold:
+            action = fallback
+        kind, skill_name, target_kind = action
+        if target_kind is ENEMY:
+            target = battle._choose_enemy_target(character)
+        else:
+            target = self._tracker.lowest(character)[1]
+        if kind is BASIC:
+            return character.basic_attack(target)
+        return character.use_skill(target, skill_name)
+
+
+# Шаги индекса: биты готовности младшие, затем фаза, полоса союзника, MP, HP, класс
+MAX_SKILLS = 2
+_STRIDE_PHASE = 1 << MAX_SKILLS
+_STRIDE_ALLY = _STRIDE_PHASE * len(PHASES)
+_STRIDE_MP = _STRIDE_ALLY * (NO_ALLY + 1)
+_STRIDE_HP = _STRIDE_MP * (len(MP_BANDS) + 1)
+_STRIDE_CLASS = _STRIDE_HP * (len(HP_BANDS) + 1)
+
+
+def compile_table(rule: Callable[[Features], Decision],
+                  classes: Sequence[type] = tuple(CHARACTER_CLASSES.values())) -> TablePolicy:
+    """Вычисляет rule для всех комбинаций признаков и возвращает политику-таблицу."""
+    table: List[Decision] = []
+    class_map = {}
+    tracks_allies = False
+    for class_index, cls in enumerate(classes):
+        skills = class_skills(cls)
+        if len(skills) > MAX_SKILLS:
+            raise ValueError(f"У класса {cls.__name__} больше {MAX_SKILLS} навыков")
+        names = tuple(name for name, _ in skills)
+        class_map[cls] = (class_index * _STRIDE_CLASS,
+                          tuple((1 << bit, name, cost) for bit, (name, cost) in enumerate(skills)))
+        for hp_band in range(len(HP_BANDS) + 1):
+            for mp_band in range(len(MP_BANDS) + 1):
+                for ally_band in range(NO_ALLY + 1):
+                    for phase in PHASES:
+                        for bits in range(1 << MAX_SKILLS):
+                            ready = tuple(bool(bits >> bit & 1) for bit in range(len(skills)))
+                            decision = rule(Features(cls, names, hp_band, mp_band, ally_band, phase, ready))
+                            table.append(decision)
+                            if decision[1][2] == ALLY or decision[2][2] == ALLY:
+                                tracks_allies = True
+    # Полоса союзника нужна и тогда, когда от нее зависит выбор решения
+    if not tracks_allies:
+        for start in range(0, len(table), _STRIDE_MP):
+            cells = table[start:start + _STRIDE_MP]
+            if any(cells[i] != cells[i % _STRIDE_ALLY] for i in range(len(cells))):
+                tracks_allies = True
+                break
+    return TablePolicy(table, class_map, tracks_allies)
+
+
+class _Recorder:
+    """Обертка политики: запоминает клетку таблицы и выбранное действие каждого хода."""
+
+    def __init__(self, policy: PartyPolicy, table: TablePolicy):
+        self.policy = policy
+        self.table = table
+        self.counts: Dict[int, Counter] = {}
+
+    def __call__(self, battle: Battle, character) -> str:
+        if type(character) not in self.table.classes:
+            return self.policy(battle, character)
+        index = self.table.index(battle, character)
+        attack_cooldown = character._cooldowns.get('attack', 0)
+        targets = []
+        # На время хода методы действий героя подменяются обертками, запоминающими цель
+        for method in ('basic_attack', 'use_skill'):
+            setattr(character, method, self._capturing(getattr(character, method), targets))
+        try:
+            result = self.policy(battle, character)
+        finally:
+            del character.basic_attack, character.use_skill
+        name = character.last_action
+        if name is not None and targets:
+            target_kind = ALLY if any(targets[-1] is char for char in battle.party) else ENEMY
+            # Навык "attack" отличается от базовой атаки только тем, что ставит перезарядку
+            if name == 'attack' and character._cooldowns.get('attack', 0) <= attack_cooldown:
+                action = (BASIC, None, target_kind)
+            else:
+                action = (SKILL, name, target_kind)
+            self.counts.setdefault(index, Counter())[action] += 1
+        return result
+
+    @staticmethod
+    def _capturing(method, targets: list):
+        def capture(target, *args, **kwargs):
+            targets.append(target)
+            return method(target, *args, **kwargs)
+        return capture
+
+
+def distill(policy: PartyPolicy, scenarios: Sequence[Scenario], battles: int, base_seed: int = 0,
+            fallback: Optional[TablePolicy] = None) -> TablePolicy:
+    """Таблица, повторяющая решения policy (например, поисковой) в battles боях сценариев.
+
+    В клетке - два самых частых действия политики с порогом по их частотам; клетки,
+    которые не встретились в боях, берутся из fallback (по умолчанию - эвристика).
+    """
+    fallback = fallback or HEURISTIC_TABLE
+    probe = TablePolicy(fallback.table, fallback.classes, True)
+    recorder = _Recorder(policy, probe)
+    observer = _RecordingPolicy(recorder, probe)
+    trace = TraceSampler()
+    for index in range(battles):
+        run_battle(scenarios[index % len(scenarios)], base_seed + index, observers=[observer], trace=trace)
+    table = list(fallback.table)
+    for index, counts in recorder.counts.items():
+        (first, first_count), *rest = counts.most_common(2)
+        if rest:
+            second, second_count = rest[0]
+            table[index] = (first_count / (first_count + second_count), first, second)
+        else:
+            table[index] = (None, first, first)
+    tracks_allies = fallback.tracks_allies or any(decision[1][2] == ALLY or decision[2][2] == ALLY
+                                                  for decision in table)
+    return TablePolicy(table, fallback.classes, tracks_allies)
+
+
+class _RecordingPolicy(BattleObserver):
+    def __init__(self, recorder: _Recorder, probe: TablePolicy):
+        self.recorder = recorder
+        self.probe = probe
+
+    def on_battle_start(self, battle: Battle):
+        self.probe.on_battle_start(battle)
+        battle.party_policy = self.recorder
+
+    def on_battle_end(self, battle: Battle):
+        self.probe.on_battle_end(battle)
+
+
+# Политика пати "table" в реестре game/policies.py
+HEURISTIC_TABLE = compile_table(heuristic_rule)
+
+
+def main(argv: Optional[List[str]] = None):
+    from game.fuzz import fingerprint, generate_case
+
+    parser = argparse.ArgumentParser(description="Проверка и замер таблицы решений против эвристики")
+    parser.add_argument("--battles", type=int, default=2000)
+    parser.add_argument("--raid", type=int, nargs="*", default=[4, 50, 200, 500],
+                        help="размеры пати для замера цены решения")
+    args = parser.parse_args(argv)
+
+    cases = [generate_case(0, index) for index in range(args.battles)]
+    policy = Policy('table')
+    mismatches = sum(fingerprint(run_battle(case.scenario, case.seed, limits=None)) !=
+                     fingerprint(run_battle(case.scenario, case.seed, observers=[policy], limits=None))
+                     for case in cases)
+    print(f"таблица: {len(HEURISTIC_TABLE.table)} клеток, расхождений с эвристикой: {mismatches} из {len(cases)}")
+
+    # Цена одного решения: ход каждого героя большой пати, босс не умирает
+    classes = list(CHARACTER_CLASSES)
+    ally_policy = compile_table(_triage_rule)
+    for size in args.raid:
+        party = [CHARACTER_CLASSES[classes[i % len(classes)]](f"Герой {i}", 5) for i in range(size)]
+        battle = Battle(party, Boss("Дракон Урлог", 10), verbose=False, trace=TraceSampler())
+        ally_policy.on_battle_start(battle)
+        timings = []
+        for label, decide in (("эвристика", Battle._choose_party_action), ("таблица", HEURISTIC_TABLE),
+                              ("таблица с союзниками", ally_policy)):
+            started = time.perf_counter()
+            for char in party:
+                battle.boss.hp = 100
+                char._cooldowns.clear()
+                decide(battle, char)
+            timings.append(f"{label} {(time.perf_counter() - started) / size * 1e6:.2f} мкс")
+        print(f"пати {size}: " + ", ".join(timings))
+
+
+def _triage_rule(features: Features) -> Decision:
+    """Правило для замера: целитель при раненом союзнике тратит ход на него."""
+    if issubclass(features.cls, Healer) and features.ally_wounded:
+        action = (BASIC, None, ALLY)
+        return None, action, action
+    return heuristic_rule(features)
+
+
+if __name__ == "__main__":
+    main()
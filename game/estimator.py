@@ -0,0 +1,218 @@
+import argparse
+import math
+import multiprocessing
+from statistics import NormalDist
+from typing import Dict, Any, List, Optional, Tuple
+from game.simulation import Scenario, run_battle
+from game.tracing import TraceSampler
+
+# --- Адаптивная оценка доли побед с ранней остановкой ---
+# Бои сценария идут пачками по batch; после каждой пачки оценка проверяет два
+# правила остановки:
+#   1) ширина доверительного интервала Уилсона <= width;
+#   2) последовательный тест Вальда (SPRT) "сбалансирован или нет": полоса баланса
+#      [threshold - margin, threshold + margin], две пары гипотез на ее краях с
+#      зоной безразличия indifference. Тест у верхнего края решает, выше ли доля
+#      побед полосы (сценарий слишком легкий), тест у нижнего - ниже ли (слишком
+#      трудный); если оба отвечают "нет" - сценарий сбалансирован.
+# Легкие клетки останавливаются через сотни боев, бюджет уходит спорным.
+# Seed боя i сценария - base_seed + i, поэтому оценки воспроизводимы.
+
+EASY = "easy"
+HARD = "hard"
+BALANCED = "balanced"
+
+
+def wilson_interval(wins: int, n: int, confidence: float = 0.95) -> Tuple[float, float]:
+    """Доверительный интервал Уилсона для доли побед."""
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = wins / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class _SPRT:
+    """Тест Вальда для p0 против p1 (p1 > p0 или p1 < p0) по числу побед и поражений."""
+
+    def __init__(self, p0: float, p1: float, alpha: float, beta: float):
+        p0 = min(max(p0, 1e-6), 1 - 1e-6)
+        p1 = min(max(p1, 1e-6), 1 - 1e-6)
+        self.win_llr = math.log(p1 / p0)
+        self.loss_llr = math.log((1 - p1) / (1 - p0))
+        self.upper = math.log((1 - beta) / alpha)  # принять H1
+        self.lower = math.log(beta / (1 - alpha))  # принять H0
+
+    def decide(self, wins: int, losses: int) -> Optional[bool]:
+        """True - принята H1, False - принята H0, None - данных пока мало."""
+        llr = wins * self.win_llr + losses * self.loss_llr
+        if llr >= self.upper:
+            return True
+        if llr <= self.lower:
+            return False
+        return None
+
+
+class WinRateEstimate:
+    """Состояние оценки одного сценария: счет побед, интервал и решение об остановке."""
+
+    def __init__(self, scenario: Scenario, width: Optional[float] = 0.05, confidence: float = 0.95,
+                 threshold: Optional[float] = None, margin: float = 0.1, indifference: float = 0.03,
+                 alpha: float = 0.05, beta: float = 0.05, min_battles: int = 100, max_battles: int = 20000,
+                 base_seed: int = 0):
+        self.scenario = scenario
+        self.width = width
+        self.confidence = confidence
+        self.min_battles = min_battles
+        self.max_battles = max_battles
+        self.base_seed = base_seed
+        self.battles = 0
+        self.wins = 0
+        self.decision: Optional[str] = None  # EASY, HARD, BALANCED или None
+        self.stop_reason: Optional[str] = None
+        self._upper = self._lower = None
+        if threshold is not None:
+            high, low = threshold + margin, threshold - margin
+            self._upper = _SPRT(high - indifference, high + indifference, alpha, beta)
+            self._lower = _SPRT(low + indifference, low - indifference, alpha, beta)
+
+    @property
+    def rate(self) -> float:
+        return self.wins / self.battles if self.battles else 0.0
+
+    @property
+    def interval(self) -> Tuple[float, float]:
+        return wilson_interval(self.wins, self.battles, self.confidence)
+
+    @property
+    def done(self) -> bool:
+        return self.stop_reason is not None
+
+    def next_seeds(self, batch: int) -> range:
+        """Seed следующей пачки (с учетом лимита max_battles)."""
+        start = self.base_seed + self.battles
+        return range(start, start + min(batch, self.max_battles - self.battles))
+
+    def add(self, wins: int, battles: int):
+        """Учитывает пачку боев и проверяет правила остановки."""
+        self.wins += wins
+        self.battles += battles
+        if self.done:
+            return
+        if self.battles >= self.min_battles:
+            self._check_stop()
+        if not self.done and self.battles >= self.max_battles:
+            self.stop_reason = "budget"
+
+    def _check_stop(self):
+        if self._upper is not None:
+            losses = self.battles - self.wins
+            above = self._upper.decide(self.wins, losses)
+            below = self._lower.decide(self.wins, losses)
+            if above:
+                self.decision, self.stop_reason = EASY, "sprt"
+            elif below:
+                self.decision, self.stop_reason = HARD, "sprt"
+            elif above is False and below is False:
+                self.decision, self.stop_reason = BALANCED, "sprt"
+        if not self.done and self.width is not None:
+            low, high = self.interval
+            if high - low <= self.width:
+                self.stop_reason = "width"
+
+    def to_dict(self) -> Dict[str, Any]:
+        low, high = self.interval
+        return {'scenario': self.scenario.to_dict(), 'battles': self.battles, 'wins': self.wins,
+                'rate': self.rate, 'ci_low': low, 'ci_high': high,
+                'decision': self.decision, 'stop_reason': self.stop_reason}
+
+
+def _count_wins(task: Tuple[Dict[str, Any], int, int]) -> Tuple[int, int]:
+    scenario_data, start, stop = task
+    scenario = Scenario.from_dict(scenario_data)
+    trace = TraceSampler()
+    wins = 0
+    for seed in range(start, stop):
+        if run_battle(scenario, seed, trace=trace).outcome == "victory":
+            wins += 1
+    return wins, stop - start
+
+
+def estimate_many(estimates: List[WinRateEstimate], batch: int = 100, processes: Optional[int] = None,
+                  total_budget: Optional[int] = None) -> List[WinRateEstimate]:
+    """Ведет все оценки по кругу, выдавая пачку каждой неостановленной клетке.
+
+    processes > 1 - пачки раунда считаются пулом процессов. total_budget - общий
+    лимит боев на все клетки (оставшиеся клетки останавливаются с причиной "budget").
+    """
+    pool = multiprocessing.Pool(processes) if processes and processes > 1 else None
+    spent = sum(estimate.battles for estimate in estimates)
+    try:
+        while True:
+            active = [estimate for estimate in estimates if not estimate.done]
+            if not active:
+                break
+            tasks = []
+            for estimate in active:
+                seeds = estimate.next_seeds(batch)
+                if total_budget is not None:
+                    seeds = seeds[:max(0, total_budget - spent - sum(t[2] - t[1] for t in tasks))]
+                tasks.append((estimate.scenario.to_dict(), seeds.start, seeds.stop))
+            if not any(stop > start for _, start, stop in tasks):
+                for estimate in active:
+                    estimate.stop_reason = "budget"
+                break
+            results = pool.map(_count_wins, tasks) if pool is not None else list(map(_count_wins, tasks))
+            for estimate, (wins, battles) in zip(active, results):
+                estimate.add(wins, battles)
+                spent += battles
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return estimates
+
+
+def estimate_win_rate(scenario: Scenario, batch: int = 100, **options) -> WinRateEstimate:
+    """Адаптивная оценка доли побед одного сценария (параметры - как у WinRateEstimate)."""
+    return estimate_many([WinRateEstimate(scenario, **options)], batch)[0]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Адаптивная оценка доли побед по уровням пати и босса")
+    parser.add_argument("--classes", default="Warrior,Mage,Healer", help="классы пати через запятую")
+    parser.add_argument("--party-levels", default="1,5,10")
+    parser.add_argument("--boss-levels", default="5,10,15,20")
+    parser.add_argument("--width", type=float, default=0.05, help="целевая ширина интервала")
+    parser.add_argument("--threshold", type=float, default=None, help="целевая доля побед для теста баланса")
+    parser.add_argument("--margin", type=float, default=0.1)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--max-battles", type=int, default=20000)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    classes = args.classes.split(",")
+    estimates = []
+    for party_level in (int(x) for x in args.party_levels.split(",")):
+        for boss_level in (int(x) for x in args.boss_levels.split(",")):
+            scenario = Scenario([(cls, f"{cls} {i + 1}", party_level) for i, cls in enumerate(classes)],
+                                ("Дракон Урлог", boss_level))
+            estimates.append(WinRateEstimate(scenario, width=args.width, threshold=args.threshold,
+                                             margin=args.margin, max_battles=args.max_battles,
+                                             base_seed=args.seed))
+    estimate_many(estimates, args.batch, args.processes)
+    for estimate in estimates:
+        low, high = estimate.interval
+        party_level = estimate.scenario.party[0][2]
+        print(f"пати {party_level:2} vs босс {estimate.scenario.boss[1]:2}: {estimate.rate:6.1%} "
+              f"[{low:.3f}, {high:.3f}] боев {estimate.battles:6} "
+              f"{estimate.decision or '':8} ({estimate.stop_reason})")
+    print(f"всего боев: {sum(estimate.battles for estimate in estimates)}")
+
+
+if __name__ == "__main__":
+    main()
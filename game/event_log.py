@@ -0,0 +1,194 @@
+import argparse
+import gzip
+import io
+import json
+import sys
+import time
+from typing import Iterator, Dict, Any, Optional, List, TextIO
+from game.battle import Battle, BattleObserver
+from game.tracing import TRACE_OFF
+
+# --- Потоковый экспорт событий боя в JSONL ---
+# Каждая строка файла - одно событие:
+#   {"type": "battle_start", "battle": 0, "party": [...], "boss": {...}, "messages": [...]}
+#   {"type": "turn", "battle": 0, "turn": 1, "round": 1, "actor": "...", "action": "...",
+#    "targets": [{"name": ..., "delta": ..., "hp": ...}], "effects_applied": [...],
+#    "effects_expired": [...], "phase": {"from": 1, "to": 2}, "messages": [...]}
+#   {"type": "battle_end", "battle": 0, "outcome": "victory", "rounds": 5, "messages": [...]}
+# "messages" - те же строки на русском, что бой выводит на экран. Они берутся из
+# лога боя или, при выборочной трассировке (TraceSampler с predicate), из
+# кольцевого буфера - поэтому экспорт работает и для боев без полного лога.
+# В боях с выключенным логом (TraceSampler() без every и predicate) сообщения не
+# форматируются вовсе, и экспортер такой бой не принимает (ValueError).
+# Экспортер держит в памяти только снимок текущего хода, поэтому расход памяти
+# не зависит от длины боя и количества боев в файле.
+
+GZIP_MAGIC = b"\x1f\x8b"
+BUFFER_SIZE = 1 << 16
+
+
+def _open_text(path: str, mode: str, compress: Optional[bool] = None) -> TextIO:
+    """Открывает файл событий; .gz (или compress=True) - со сжатием gzip."""
+    if mode == "r":
+        with open(path, "rb") as f:
+            compress = f.read(2) == GZIP_MAGIC
+    elif compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        # GzipFile сжимает каждый write отдельно, поэтому добавляем буфер перед ним
+        gz = gzip.open(path, mode + "b", compresslevel=6)
+        raw = io.BufferedWriter(gz, BUFFER_SIZE) if mode == "w" else io.BufferedReader(gz, BUFFER_SIZE)
+    else:
+        raw = open(path, mode + "b", buffering=BUFFER_SIZE)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="\n")
+
+
+def _effect_state(char) -> Dict[int, Any]:
+    # id эффекта -> эффект; оглушение хранится флагом, поэтому учитываем его отдельно
+    return {id(effect): effect for effect in getattr(char, 'active_effects', [])}
+
+
+class EventLogWriter(BattleObserver):
+    """Наблюдатель, построчно пишущий события боев в JSONL (опционально gzip).
+
+    Один писатель может наблюдать несколько боев подряд; каждый бой получает свой номер.
+    """
+
+    def __init__(self, path: str, compress: Optional[bool] = None):
+        self.path = path
+        self._file = _open_text(path, "w", compress)
+        self._battle_index = -1
+        self._turn = 0
+        self._logged = 0  # сообщений боя, уже выгруженных в события
+        self._snapshot = None
+        self._phase = None
+        self._stunned = False
+
+    def _write(self, event: Dict[str, Any]):
+        self._file.write(json.dumps(event, ensure_ascii=False))
+        self._file.write("\n")
+
+    def _new_messages(self, battle: Battle) -> List[str]:
+        logged = battle.messages_logged
+        messages = battle.recent_messages(logged - self._logged)
+        self._logged = logged
+        return messages
+
+    def on_battle_start(self, battle: Battle):
+        if battle.trace_mode == TRACE_OFF:
+            raise ValueError("Экспорт событий требует лога сообщений: бой идет с выключенным логом "
+                             "(TraceSampler без every и predicate)")
+        self._battle_index += 1
+        self._turn = 0
+        self._logged = 0
+        self._phase = getattr(battle.boss, 'phase', None)
+        self._write({
+            "type": "battle_start",
+            "battle": self._battle_index,
+            "party": [{"name": char.name, "class": type(char).__name__, "level": char.level,
+                       "hp": char.hp, "mp": char.mp} for char in battle.party],
+            "boss": {"name": battle.boss.name, "level": battle.boss.level,
+                     "hp": battle.boss.hp, "mp": battle.boss.mp},
+            "messages": self._new_messages(battle),
+        })
+
+    def on_turn_start(self, battle: Battle, actor):
+        self._stunned = bool(getattr(actor, 'stunned', False))
+        self._snapshot = [(char, char.hp, _effect_state(char), bool(getattr(char, 'stunned', False)))
+                          for char in battle.turn_order.members()]
+
+    def on_turn_end(self, battle: Battle, actor):
+        self._turn += 1
+        targets = []
+        applied = []
+        expired = []
+        for char, hp_before, effects_before, stunned_before in self._snapshot:
+            if char.hp != hp_before:
+                targets.append({"name": char.name, "delta": char.hp - hp_before, "hp": char.hp})
+            effects_after = _effect_state(char)
+            for key, effect in effects_after.items():
+                if key not in effects_before:
+                    applied.append({"target": char.name, "effect": effect.name,
+                                    "duration": effect.remaining_duration})
+            for key, effect in effects_before.items():
+                if key not in effects_after:
+                    expired.append({"target": char.name, "effect": effect.name})
+            stunned_after = bool(getattr(char, 'stunned', False))
+            if stunned_after and not stunned_before:
+                applied.append({"target": char.name, "effect": "Stun", "duration": 1})
+            elif stunned_before and not stunned_after:
+                expired.append({"target": char.name, "effect": "Stun"})
+        self._snapshot = None
+
+        event = {
+            "type": "turn",
+            "battle": self._battle_index,
+            "turn": self._turn,
+            "round": battle.round_number,
+            "actor": actor.name,
+            "action": actor.last_action or ("stunned" if self._stunned else None),
+            "targets": targets,
+            "effects_applied": applied,
+            "effects_expired": expired,
+        }
+        phase = getattr(battle.boss, 'phase', None)
+        if phase != self._phase:
+            event["phase"] = {"from": self._phase, "to": phase}
+            self._phase = phase
+        event["messages"] = self._new_messages(battle)
+        self._write(event)
+
+    def on_battle_end(self, battle: Battle):
+        self._write({
+            "type": "battle_end",
+            "battle": self._battle_index,
+            "outcome": battle.outcome,
+            "rounds": battle.round_number,
+            "messages": self._new_messages(battle),
+        })
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self) -> 'EventLogWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_events(path: str) -> Iterator[Dict[str, Any]]:
+    """Построчно читает события из файла (сжатие определяется автоматически)."""
+    with _open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def play_events(path: str, speed: float = 0, out: TextIO = sys.stdout, battle: Optional[int] = None):
+    """Воспроизводит бой из файла событий теми же сообщениями, что и на экране.
+
+    speed - ходов в секунду (0 - без задержки), battle - номер боя (None - все бои).
+    """
+    delay = 1.0 / speed if speed > 0 else 0
+    for event in read_events(path):
+        if battle is not None and event["battle"] != battle:
+            continue
+        for message in event["messages"]:
+            out.write(message + "\n")
+        out.flush()
+        if delay and event["type"] == "turn":
+            time.sleep(delay)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Просмотр записанного боя из файла событий JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=2.0, help="ходов в секунду, 0 - мгновенно")
+    parser.add_argument("--battle", type=int, default=None, help="номер боя в файле")
+    args = parser.parse_args(argv)
+    play_events(args.path, args.speed, battle=args.battle)
+
+
+if __name__ == "__main__":
+    main()
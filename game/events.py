@@ -0,0 +1,136 @@
+from typing import Callable, Dict, List, Optional
+
+# --- Шина событий боя ---
+# Подписчики регистрируются в EventBus до боя; в начале боя Battle один раз
+# разрешает их в EventHooks: для каждого события - None (нет подписчиков),
+# сам обработчик (один подписчик) или функция рассылки (несколько). Точки
+# генерации событий проверяют только "обработчик is not None", поэтому событие
+# без подписчиков ничего не стоит; участники боя получают ссылку на EventHooks,
+# только если кто-то подписан на события изменения HP, эффектов или фазы.
+#
+# Сигнатуры обработчиков (первый аргумент - бой):
+#   on_damage(battle, target, amount, source)   - target потерял amount HP в ход source
+#   on_heal(battle, target, amount, source)     - target получил amount HP в ход source
+#   on_death(battle, target, source)            - HP target упало до нуля
+#   on_effect_applied(battle, target, name, effect)  - наложен эффект ("stun" - effect=None)
+#   on_effect_expired(battle, target, name, effect)  - эффект истек или оглушение снято
+#   on_phase_change(battle, boss, old, new)     - босс сменил фазу
+#   on_turn_end(battle, actor)                  - после хода (в том числе пропущенного)
+
+EVENTS = ('on_damage', 'on_heal', 'on_death', 'on_effect_applied', 'on_effect_expired',
+          'on_phase_change', 'on_turn_end')
+
+# События, для которых участникам боя нужна ссылка на EventHooks
+_PARTICIPANT_EVENTS = ('on_damage', 'on_heal', 'on_death', 'on_effect_applied', 'on_effect_expired',
+                       'on_phase_change')
+
+
+class BattleListener:
+    """Подписчик на все события; подклассы переопределяют только нужные методы.
+
+    EventBus.subscribe_object подписывает только переопределенные методы.
+    """
+
+    def on_damage(self, battle, target, amount: int, source):
+        pass
+
+    def on_heal(self, battle, target, amount: int, source):
+        pass
+
+    def on_death(self, battle, target, source):
+        pass
+
+    def on_effect_applied(self, battle, target, name: str, effect):
+        pass
+
+    def on_effect_expired(self, battle, target, name: str, effect):
+        pass
+
+    def on_phase_change(self, battle, boss, old: int, new: int):
+        pass
+
+    def on_turn_end(self, battle, actor):
+        pass
+
+
+def _fan_out(handlers: List[Callable]) -> Callable:
+    handlers = tuple(handlers)
+
+    def emit(*args):
+        for handler in handlers:
+            handler(*args)
+    return emit
+
+
+class EventHooks:
+    """Разрешенные обработчики событий одного боя (None - нет подписчиков)."""
+
+    def __init__(self, battle, handlers: Dict[str, List[Callable]]):
+        self.battle = battle
+        for event in EVENTS:
+            found = handlers.get(event, ())
+            if not found:
+                setattr(self, event, None)
+            elif len(found) == 1:
+                setattr(self, event, found[0])
+            else:
+                setattr(self, event, _fan_out(found))
+        self.tracks_participants = any(getattr(self, event) is not None for event in _PARTICIPANT_EVENTS)
+
+    def hp_changed(self, target, old: int, new: int):
+        """Вызывается участником после изменения HP."""
+        battle = self.battle
+        source = battle.actor
+        if new < old:
+            if self.on_damage is not None:
+                self.on_damage(battle, target, old - new, source)
+            if new <= 0 < old and self.on_death is not None:
+                self.on_death(battle, target, source)
+        elif new > old and self.on_heal is not None:
+            self.on_heal(battle, target, new - old, source)
+
+    def effect_applied(self, target, name: str, effect=None):
+        if self.on_effect_applied is not None:
+            self.on_effect_applied(self.battle, target, name, effect)
+
+    def effect_expired(self, target, name: str, effect=None):
+        if self.on_effect_expired is not None:
+            self.on_effect_expired(self.battle, target, name, effect)
+
+    def phase_changed(self, boss, old: int, new: int):
+        if self.on_phase_change is not None:
+            self.on_phase_change(self.battle, boss, old, new)
+
+
+class EventBus:
+    """Реестр подписчиков; передается в Battle(..., events=bus) и может обслуживать много боев."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Callable]] = {event: [] for event in EVENTS}
+
+    def subscribe(self, event: str, handler: Callable) -> Callable:
+        """Подписывает handler на событие; возвращает handler (можно использовать как декоратор)."""
+        if event not in self._handlers:
+            raise ValueError(f"Неизвестное событие {event!r}; есть: {', '.join(EVENTS)}")
+        self._handlers[event].append(handler)
+        return handler
+
+    def unsubscribe(self, event: str, handler: Callable):
+        self._handlers[event].remove(handler)
+
+    def subscribe_object(self, listener: BattleListener):
+        """Подписывает методы listener, переопределенные относительно BattleListener."""
+        for event in EVENTS:
+            method = getattr(type(listener), event, None)
+            if method is not None and method is not getattr(BattleListener, event):
+                self.subscribe(event, getattr(listener, event))
+
+    def on(self, event: str) -> Callable[[Callable], Callable]:
+        """Декоратор: @bus.on("on_death")."""
+        return lambda handler: self.subscribe(event, handler)
+
+    def resolve(self, battle) -> Optional[EventHooks]:
+        """Обработчики для боя battle; None, если подписчиков нет совсем."""
+        if not any(self._handlers.values()):
+            return None
+        return EventHooks(battle, self._handlers)
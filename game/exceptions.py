@@ -16,4 +16,8 @@ class CharacterDeadError(GameException):
 
 class InvalidTargetError(GameException):
     """Вызывается при неверной цели для навыка."""
-    pass
\ No newline at end of file
+    pass
+
+class ReplayDivergenceError(GameException):
+    """Вызывается, когда воспроизводимый бой расходится с записанной лентой."""
+    pass
@@ -0,0 +1,396 @@
+import argparse
+import importlib
+import math
+import multiprocessing
+import random
+import time
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+from game.battle import Battle
+from game.metrics import BattleMetrics, MetricsRegistry
+from game.rng import BlockRandom
+from game.simulation import CHARACTER_CLASSES, Scenario, run_battle
+from game.tracing import TraceSampler, boss_phase_at_least
+
+# --- Дифференциальный фаззинг движков ---
+# Случайные сценарии (состав пати 3-4 героя, уровни героев 1-10, уровень босса
+# 5-20) и seed прогоняются через эталон - обычный Battle с полным логом и без
+# ограничений - и через движок-кандидат. Кандидаты двух видов:
+#   "exact" - должен давать тот же бой при том же seed: сравниваются исход, число
+#             раундов, итоговые HP/MP всех участников, фаза босса и лог (если он
+#             записан у обоих);
+#   "stat"  - тратит случайность иначе (другой генератор, векторизация), поэтому
+#             сравниваются распределения на непересекающихся наборах seed: исходы -
+#             критерием хи-квадрат, длина боя - двухвыборочным критерием Колмогорова-Смирнова.
+# Найденное расхождение сжимается жадно: убираем героев, понижаем уровни, уменьшаем
+# seed, пока расхождение сохраняется.
+
+Engine = Callable[[Scenario, int], Battle]
+
+MIN_PARTY, MAX_PARTY = 3, 4
+MIN_HERO_LEVEL, MAX_HERO_LEVEL = 1, 10
+MIN_BOSS_LEVEL, MAX_BOSS_LEVEL = 5, 20
+
+
+class FuzzCase:
+    """Сценарий и seed одного боя."""
+
+    def __init__(self, scenario: Scenario, seed: int):
+        self.scenario = scenario
+        self.seed = seed
+
+    def __repr__(self) -> str:
+        return f"FuzzCase({self.scenario!r}, seed={self.seed})"
+
+
+def random_scenario(r: random.Random) -> Scenario:
+    classes = list(CHARACTER_CLASSES)
+    party = []
+    for i in range(r.randint(MIN_PARTY, MAX_PARTY)):
+        class_name = r.choice(classes)
+        party.append((class_name, f"{class_name} {i + 1}", r.randint(MIN_HERO_LEVEL, MAX_HERO_LEVEL)))
+    return Scenario(party, ("Дракон Урлог", r.randint(MIN_BOSS_LEVEL, MAX_BOSS_LEVEL)))
+
+
+def generate_case(seed: int, index: int) -> FuzzCase:
+    """Случай index прогона seed; не зависит от других случаев, поэтому делится между воркерами."""
+    r = random.Random(f"fuzz:{seed}:{index}")
+    return FuzzCase(random_scenario(r), r.randrange(1 << 31))
+
+
+# --- Движки ---
+
+def reference_engine(scenario: Scenario, seed: int) -> Battle:
+    """Эталон: бой с полным логом, без ограничений длины."""
+    return run_battle(scenario, seed, limits=None)
+
+
+def headless_engine(scenario: Scenario, seed: int) -> Battle:
+    return run_battle(scenario, seed, trace=TraceSampler(), limits=None)
+
+
+def ring_engine(scenario: Scenario, seed: int) -> Battle:
+    return run_battle(scenario, seed, trace=TraceSampler(predicate=boss_phase_at_least(3)), limits=None)
+
+
+def metrics_engine(scenario: Scenario, seed: int) -> Battle:
+    return run_battle(scenario, seed, trace=TraceSampler(), metrics=BattleMetrics(MetricsRegistry()),
+                      limits=None)
+
+
+def block_random_engine(scenario: Scenario, seed: int) -> Battle:
+    return run_battle(scenario, source=BlockRandom(seed), trace=TraceSampler(), limits=None)
+
+
+# Имя -> (движок, вид сравнения). Свой кандидат можно указать как "модуль:функция"
+CANDIDATES: Dict[str, Tuple[Engine, str]] = {
+    'headless': (headless_engine, 'exact'),
+    'ring': (ring_engine, 'exact'),
+    'metrics': (metrics_engine, 'exact'),
+    'block_random': (block_random_engine, 'stat'),
+}
+
+
+def resolve_candidate(name: str, mode: Optional[str] = None) -> Tuple[Engine, str]:
+    if name in CANDIDATES:
+        engine, default_mode = CANDIDATES[name]
+        return engine, mode or default_mode
+    module_name, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Неизвестный кандидат {name!r}: {', '.join(CANDIDATES)} или модуль:функция")
+    return getattr(importlib.import_module(module_name), attribute), mode or 'exact'
+
+
+# --- Точное сравнение ---
+
+def fingerprint(battle: Battle) -> Tuple:
+    """Итог боя, который не должен зависеть от реализации движка."""
+    party = tuple((char.name, char.hp, char.mp) for char in battle.party)
+    boss = battle.boss
+    return battle.outcome, battle.round_number, party, (boss.hp, boss.mp, getattr(boss, 'phase', 0))
+
+
+def compare_exact(case: FuzzCase, candidate: Engine) -> Optional[str]:
+    """Описание расхождения кандидата с эталоном на случае case или None."""
+    expected = reference_engine(case.scenario, case.seed)
+    try:
+        actual = candidate(case.scenario, case.seed)
+    except Exception as error:
+        return f"кандидат упал: {error!r}"
+    expected_print, actual_print = fingerprint(expected), fingerprint(actual)
+    if expected_print != actual_print:
+        return f"итог {actual_print!r} вместо {expected_print!r}"
+    # Лог сравнивается, только если кандидат записал его целиком
+    if actual.traced and not actual.trace_dropped and actual.log != expected.log:
+        for i, (a, e) in enumerate(zip(actual.log, expected.log)):
+            if a != e:
+                return f"лог расходится в сообщении {i}: {a!r} вместо {e!r}"
+        return f"лог из {len(actual.log)} сообщений вместо {len(expected.log)}"
+    return None
+
+
+# --- Статистическое сравнение ---
+
+def _chi2_sf(x: float, df: int) -> float:
+    """P(X >= x) для хи-квадрат с df степенями свободы (целое df)."""
+    if df <= 0:
+        return 1.0
+    half = x / 2
+    if df % 2 == 0:
+        term = total = math.exp(-half)
+        for i in range(1, df // 2):
+            term *= half / i
+            total += term
+        return min(1.0, total)
+    total = math.erfc(math.sqrt(half))
+    term = math.sqrt(half) * math.exp(-half) / math.gamma(1.5)
+    for i in range(1, (df + 1) // 2):
+        total += term
+        term *= half / (i + 0.5)
+    return min(1.0, total)
+
+
+def chi2_homogeneity(counts_a: Dict[str, int], counts_b: Dict[str, int]) -> float:
+    """p-значение критерия однородности хи-квадрат для двух таблиц исходов."""
+    categories = [c for c in set(counts_a) | set(counts_b) if counts_a.get(c, 0) + counts_b.get(c, 0) > 0]
+    n_a, n_b = sum(counts_a.values()), sum(counts_b.values())
+    if len(categories) < 2 or not n_a or not n_b:
+        return 1.0
+    statistic = 0.0
+    for category in categories:
+        total = counts_a.get(category, 0) + counts_b.get(category, 0)
+        for observed, n in ((counts_a.get(category, 0), n_a), (counts_b.get(category, 0), n_b)):
+            expected = total * n / (n_a + n_b)
+            statistic += (observed - expected) ** 2 / expected
+    return _chi2_sf(statistic, len(categories) - 1)
+
+
+def ks_two_sample(a: Sequence[float], b: Sequence[float]) -> float:
+    """p-значение двухвыборочного критерия Колмогорова-Смирнова (асимптотика).
+
+    Для дискретных величин (число раундов) критерий консервативен.
+    """
+    a, b = sorted(a), sorted(b)
+    n_a, n_b = len(a), len(b)
+    if not n_a or not n_b:
+        return 1.0
+    i = j = 0
+    d = 0.0
+    while i < n_a and j < n_b:
+        value = min(a[i], b[j])
+        while i < n_a and a[i] == value:
+            i += 1
+        while j < n_b and b[j] == value:
+            j += 1
+        d = max(d, abs(i / n_a - j / n_b))
+    if d == 0:
+        return 1.0
+    n = math.sqrt(n_a * n_b / (n_a + n_b))
+    lam = (n + 0.12 + 0.11 / n) * d
+    total = 0.0
+    for k in range(1, 101):
+        term = 2 * (-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam)
+        total += term
+        if abs(term) < 1e-10:
+            break
+    return min(1.0, max(0.0, total))
+
+
+def _sample(engine: Engine, scenario: Scenario, seeds: range) -> Tuple[Dict[str, int], List[int]]:
+    outcomes: Dict[str, int] = {}
+    rounds = []
+    for seed in seeds:
+        battle = engine(scenario, seed)
+        outcomes[battle.outcome] = outcomes.get(battle.outcome, 0) + 1
+        rounds.append(battle.round_number)
+    return outcomes, rounds
+
+
+def compare_distributions(scenario: Scenario, candidate: Engine, battles: int = 400,
+                          base_seed: int = 0) -> Dict[str, Any]:
+    """p-значения для исходов и длины боя; кандидат играет seed, не пересекающиеся с эталоном."""
+    ref_outcomes, ref_rounds = _sample(headless_engine, scenario, range(base_seed, base_seed + battles))
+    cand_outcomes, cand_rounds = _sample(candidate, scenario,
+                                         range(base_seed + battles, base_seed + 2 * battles))
+    return {'outcomes_p': chi2_homogeneity(ref_outcomes, cand_outcomes),
+            'rounds_p': ks_two_sample(ref_rounds, cand_rounds),
+            'reference': ref_outcomes, 'candidate': cand_outcomes}
+
+
+# --- Сжатие ---
+
+def _simpler(case: FuzzCase):
+    """Соседние более простые случаи, от самых сильных упрощений к слабым."""
+    scenario = case.scenario
+    party = scenario.party
+    for i in range(len(party)):
+        if len(party) > 1:
+            yield FuzzCase(Scenario(party[:i] + party[i + 1:], scenario.boss, scenario.boss_multipliers), case.seed)
+    for i, (class_name, name, level) in enumerate(party):
+        for smaller in (MIN_HERO_LEVEL, level // 2, level - 1):
+            if MIN_HERO_LEVEL <= smaller < level:
+                changed = party[:i] + [(class_name, name, smaller)] + party[i + 1:]
+                yield FuzzCase(Scenario(changed, scenario.boss, scenario.boss_multipliers), case.seed)
+    boss_name, boss_level = scenario.boss
+    for smaller in (MIN_BOSS_LEVEL, (boss_level + MIN_BOSS_LEVEL) // 2, boss_level - 1):
+        if MIN_BOSS_LEVEL <= smaller < boss_level:
+            yield FuzzCase(Scenario(party, (boss_name, smaller), scenario.boss_multipliers), case.seed)
+    for smaller in (0, case.seed // 2, case.seed - 1):
+        if 0 <= smaller < case.seed:
+            yield FuzzCase(scenario, smaller)
+
+
+def shrink(case: FuzzCase, fails: Callable[[FuzzCase], bool], max_steps: int = 500) -> FuzzCase:
+    """Жадно упрощает случай, пока fails(case) остается истинным."""
+    steps = 0
+    improved = True
+    while improved and steps < max_steps:
+        improved = False
+        for simpler in _simpler(case):
+            steps += 1
+            if fails(simpler):
+                case, improved = simpler, True
+                break
+            if steps >= max_steps:
+                break
+    return case
+
+
+# --- Прогон ---
+
+class FuzzFailure:
+    def __init__(self, case: FuzzCase, reason: str, shrunk: Optional[FuzzCase] = None,
+                 shrunk_reason: Optional[str] = None):
+        self.case = case
+        self.reason = reason
+        self.shrunk = shrunk
+        self.shrunk_reason = shrunk_reason
+
+    def __str__(self) -> str:
+        text = f"{self.case!r}: {self.reason}"
+        if self.shrunk is not None:
+            text += f"\n  минимальный случай {self.shrunk!r}: {self.shrunk_reason}"
+        return text
+
+
+class FuzzReport:
+    def __init__(self, candidate: str, mode: str):
+        self.candidate = candidate
+        self.mode = mode
+        self.cases = 0
+        self.failures: List[FuzzFailure] = []
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failures
+
+    def format(self, limit: int = 3) -> str:
+        """Сводка и первые limit расхождений (вместе с минимальными случаями)."""
+        rate = self.cases / self.elapsed * 60 if self.elapsed else 0.0
+        lines = [f"{self.candidate} ({self.mode}): случаев {self.cases}, расхождений {len(self.failures)}, "
+                 f"{self.elapsed:.1f} с ({rate:,.0f} случаев/мин)"]
+        lines.extend(str(failure) for failure in self.failures[:limit])
+        if len(self.failures) > limit:
+            lines.append(f"... и еще {len(self.failures) - limit}")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.format()
+
+
+def _exact_chunk(task: Tuple[str, Optional[str], int, int, int]) -> List[Tuple[int, str]]:
+    name, mode, seed, start, stop = task
+    engine, _ = resolve_candidate(name, mode)
+    failures = []
+    for index in range(start, stop):
+        reason = compare_exact(generate_case(seed, index), engine)
+        if reason is not None:
+            failures.append((index, reason))
+    return failures
+
+
+def _stat_chunk(task: Tuple[str, Optional[str], int, int, int, int, float]) -> List[Tuple[int, str]]:
+    name, mode, seed, start, stop, battles, alpha = task
+    engine, _ = resolve_candidate(name, mode)
+    failures = []
+    for index in range(start, stop):
+        reason = _stat_reason(generate_case(seed, index).scenario, engine, battles, alpha)
+        if reason is not None:
+            failures.append((index, reason))
+    return failures
+
+
+def _stat_reason(scenario: Scenario, engine: Engine, battles: int, alpha: float) -> Optional[str]:
+    result = compare_distributions(scenario, engine, battles)
+    if result['outcomes_p'] < alpha or result['rounds_p'] < alpha:
+        return (f"исходы p={result['outcomes_p']:.2g}, раунды p={result['rounds_p']:.2g} "
+                f"({result['candidate']} против {result['reference']})")
+    return None
+
+
+def fuzz(candidate: str = 'headless', cases: int = 1000, seed: int = 0, mode: Optional[str] = None,
+         processes: Optional[int] = None, chunk: int = 100, battles: int = 400, alpha: float = 0.01,
+         shrink_failures: int = 3) -> FuzzReport:
+    """Прогоняет cases случайных случаев через кандидата и эталон.
+
+    В режиме "stat" случай - это сценарий, на котором сравниваются распределения
+    по battles боев; порог alpha делится на число сценариев (поправка Бонферрони).
+    Первые shrink_failures расхождений сжимаются до минимальных случаев.
+    """
+    engine, mode = resolve_candidate(candidate, mode)
+    report = FuzzReport(candidate, mode)
+    started = time.perf_counter()
+    if mode == 'exact':
+        tasks = [(candidate, mode, seed, start, min(start + chunk, cases)) for start in range(0, cases, chunk)]
+        worker = _exact_chunk
+    else:
+        alpha /= max(1, cases)
+        tasks = [(candidate, mode, seed, start, start + 1, battles, alpha) for start in range(cases)]
+        worker = _stat_chunk
+    if processes == 1:
+        results = list(map(worker, tasks))
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(worker, tasks)
+    report.cases = cases
+    for index, reason in sorted(failure for chunk_failures in results for failure in chunk_failures):
+        report.failures.append(FuzzFailure(generate_case(seed, index), reason))
+    for failure in report.failures[:shrink_failures]:
+        if mode == 'exact':
+            def check(case):
+                return compare_exact(case, engine)
+        else:
+            def check(case):
+                return _stat_reason(case.scenario, engine, battles, alpha)
+        failure.shrunk = shrink(failure.case, lambda case: check(case) is not None)
+        failure.shrunk_reason = check(failure.shrunk)
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Дифференциальный фаззинг движка боя против эталона")
+    parser.add_argument("candidates", nargs="*", default=list(CANDIDATES),
+                        help=f"кандидаты: {', '.join(CANDIDATES)} или модуль:функция(scenario, seed) -> Battle")
+    parser.add_argument("--cases", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mode", choices=("exact", "stat"), default=None)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--battles", type=int, default=400, help="боев на сценарий в режиме stat")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for candidate in args.candidates:
+        _, mode = resolve_candidate(candidate, args.mode)
+        # В режиме stat каждый случай - сотни боев, поэтому сценариев меньше
+        cases = args.cases if mode == 'exact' else max(1, args.cases // args.battles)
+        report = fuzz(candidate, cases, args.seed, args.mode, args.processes,
+                      battles=args.battles, alpha=args.alpha)
+        print(report, flush=True)
+        failed = failed or not report.ok
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+import argparse
+import gc
+import linecache
+import os
+import sys
+import tracemalloc
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+from typing import Dict, Any, List, Optional, Tuple
+from game.battle import Battle, BattleObserver
+from game.skill_specs import CompiledSkill
+from game.skills import EFFECT_POOL
+from game.simulation import DEFAULT_LIMITS, Scenario, run_battle
+
+# --- Учет памяти по подсистемам ---
+# Включается явно: MemoryAccounting запускает tracemalloc и подключает к боям
+# наблюдатель MemoryProbe. Память подсистем считается обходом их объектов
+# (sys.getsizeof по контейнерам и атрибутам), а не по местам выделения:
+#   characters - участники боя с характеристиками BoundedStat (лежат в __dict__),
+#                кулдаунами и столбцами пула миньонов;
+#   skills     - экземпляры навыков участников (общие CompiledSkill не считаются);
+#   effects    - наложенные эффекты и свободные эффекты пула EFFECT_POOL;
+#   log        - Battle.log и кольцевой буфер трассировки со строками.
+# Пик подсистемы - максимум по замерам после ходов, удержано - размер в конце боя.
+# Временные объекты цикла ходов видны только tracemalloc: пик внутри хода минус
+# память в его начале. Снимки tracemalloc в начале и в конце прогона дают главные
+# места выделения, а память процесса по контрольным точкам - проверку, что она не
+# растет с числом боев.
+
+SUBSYSTEMS = ('characters', 'skills', 'effects', 'log')
+
+# Объекты, общие для всех боев процесса: в размер подсистем не входят
+_SHARED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, CompiledSkill)
+
+
+def deep_size(obj: Any, seen: set) -> int:
+    """Размер obj вместе с содержимым контейнеров и атрибутами; seen - уже учтенные id."""
+    if id(obj) in seen or isinstance(obj, _SHARED):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == 'deque':
+        for item in obj:
+            size += deep_size(item, seen)
+    elif isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    else:
+        attrs = getattr(obj, '__dict__', None)
+        if attrs is not None:
+            size += deep_size(attrs, seen)
+        for slot in getattr(type(obj), '__slots__', ()):
+            size += deep_size(getattr(obj, slot, None), seen)
+    return size
+
+
+def subsystem_sizes(battle: Battle) -> Dict[str, int]:
+    """Текущий размер подсистем боя в байтах."""
+    participants = battle.party + [battle.boss] + list(getattr(battle.boss, 'minions', ()))
+    # Участники и сам бой учитываются явно, а не как ссылки из чужих атрибутов
+    seen = {id(battle)} | {id(char) for char in participants}
+    sizes = dict.fromkeys(SUBSYSTEMS, 0)
+    sizes['log'] = deep_size(battle.log, seen)
+    if battle._ring is not None:
+        sizes['log'] += deep_size(battle._ring, seen)
+    effects = 0
+    for char in participants:
+        effects += deep_size(char.active_effects, seen)
+    sizes['effects'] = effects + deep_size(EFFECT_POOL._free, seen)
+    skills = 0
+    for char in participants:
+        skills += deep_size(getattr(char, 'skills', None), seen)
+    sizes['skills'] = skills
+    characters = 0
+    for char in participants:
+        characters += sys.getsizeof(char)
+        attrs = getattr(char, '__dict__', None)
+        if attrs is not None:
+            characters += deep_size(attrs, seen)
+        for slot in getattr(type(char), '__slots__', ()):
+            characters += deep_size(getattr(char, slot, None), seen)
+    pool = getattr(battle.boss, 'minion_pool', None)
+    if pool is not None and battle.boss.minions:
+        characters += deep_size(pool, seen)  # столбцы пула миньонов (array)
+    sizes['characters'] = characters
+    return sizes
+
+
+class MemoryProbe(BattleObserver):
+    """Наблюдатель: пики и удержанная память подсистем, временные объекты ходов.
+
+    sample_every - замерять подсистемы после каждого N-го хода (обход объектов
+    дороже хода; конец боя замеряется всегда).
+    """
+
+    def __init__(self, sample_every: int = 1):
+        self.sample_every = max(1, sample_every)
+        self.battles = 0
+        self.turns = 0
+        self.peak = dict.fromkeys(SUBSYSTEMS, 0)
+        self.retained_total = dict.fromkeys(SUBSYSTEMS, 0)  # сумма размеров в конце боев
+        self.retained_max = dict.fromkeys(SUBSYSTEMS, 0)
+        self.temporaries_total = 0  # сумма пиков временных объектов по ходам
+        self.temporaries_peak = 0
+        self._turn_start = 0
+
+    def _sample(self, battle: Battle) -> Dict[str, int]:
+        sizes = subsystem_sizes(battle)
+        peak = self.peak
+        for name, size in sizes.items():
+            if size > peak[name]:
+                peak[name] = size
+        return sizes
+
+    def on_turn_start(self, battle: Battle, actor):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._turn_start = tracemalloc.get_traced_memory()[0]
+
+    def on_turn_end(self, battle: Battle, actor):
+        self.turns += 1
+        if tracemalloc.is_tracing():
+            temporaries = tracemalloc.get_traced_memory()[1] - self._turn_start
+            self.temporaries_total += temporaries
+            if temporaries > self.temporaries_peak:
+                self.temporaries_peak = temporaries
+        if self.turns % self.sample_every == 0:
+            self._sample(battle)
+
+    def on_battle_end(self, battle: Battle):
+        self.battles += 1
+        for name, size in self._sample(battle).items():
+            self.retained_total[name] += size
+            if size > self.retained_max[name]:
+                self.retained_max[name] = size
+
+
+def _site(frame: tracemalloc.Frame) -> str:
+    path = os.path.relpath(frame.filename) if os.path.isabs(frame.filename) else frame.filename
+    return f"{path}:{frame.lineno}"
+
+
+class MemoryReport:
+    """Итоги MemoryAccounting.report()."""
+
+    def __init__(self, probe: MemoryProbe, traced_peak: int, growth: int,
+                 timeline: List[Tuple[int, int]], top_sites: List[Tuple[str, int, int, str]]):
+        battles = max(probe.battles, 1)
+        self.battles = probe.battles
+        self.turns = probe.turns
+        self.peak = dict(probe.peak)
+        self.retained_mean = {name: total / battles for name, total in probe.retained_total.items()}
+        self.retained_max = dict(probe.retained_max)
+        self.temporaries_mean = probe.temporaries_total / max(probe.turns, 1)
+        self.temporaries_peak = probe.temporaries_peak
+        self.traced_peak = traced_peak  # пик памяти под tracemalloc за весь прогон
+        self.growth = growth  # память, удержанная после прогона относительно начала
+        self.timeline = timeline  # (боев проведено, память под tracemalloc)
+        self.top_sites = top_sites  # (место, прирост байт, прирост блоков, строка кода)
+
+    @property
+    def drift_per_1k(self) -> float:
+        """Рост памяти на 1000 боев между контрольными точками после прогрева и последней.
+
+        Первая контрольная точка (до боев) пропускается, если есть другие: в первых
+        боях заполняются пул эффектов и кеши, и это не утечка.
+        """
+        timeline = self.timeline[1:] if len(self.timeline) > 2 else self.timeline
+        if len(timeline) < 2:
+            return 0.0
+        (first_battles, first), (last_battles, last) = timeline[0], timeline[-1]
+        if last_battles == first_battles:
+            return 0.0
+        return (last - first) * 1000 / (last_battles - first_battles)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'battles': self.battles, 'turns': self.turns, 'peak': self.peak,
+                'retained_mean': self.retained_mean, 'retained_max': self.retained_max,
+                'temporaries_mean': self.temporaries_mean, 'temporaries_peak': self.temporaries_peak,
+                'traced_peak': self.traced_peak, 'growth': self.growth,
+                'drift_per_1k': self.drift_per_1k, 'timeline': self.timeline,
+                'top_sites': self.top_sites}
+
+    def format(self) -> str:
+        lines = [f"боев: {self.battles}, ходов: {self.turns}",
+                 f"{'подсистема':<18}{'пик, Б':>12}{'удержано, Б':>14}{'макс. удерж.':>14}"]
+        for name in SUBSYSTEMS:
+            lines.append(f"{name:<18}{self.peak[name]:>12,}{self.retained_mean[name]:>14,.0f}"
+                         f"{self.retained_max[name]:>14,}")
+        lines.append(f"{'turn_temporaries':<18}{self.temporaries_peak:>12,}{0:>14}{0:>14}"
+                     f"   (в среднем {self.temporaries_mean:,.0f} Б на ход)")
+        lines.append(f"пик под tracemalloc: {self.traced_peak:,} Б, удержано после прогона: {self.growth:,} Б, "
+                     f"рост на 1000 боев: {self.drift_per_1k:,.0f} Б")
+        if self.top_sites:
+            lines.append("главные места выделения (прирост за прогон):")
+            for site, size, count, code in self.top_sites:
+                lines.append(f"  {size:>10,} Б {count:>7,} бл.  {site}  {code}")
+        return "\n".join(lines)
+
+
+class MemoryAccounting:
+    """Режим учета памяти вокруг боя или пачки симуляций.
+
+        with MemoryAccounting() as memory:
+            for seed in range(1000):
+                run_battle(scenario, seed, observers=[memory.probe])
+                memory.checkpoint()
+        print(memory.report().format())
+
+    Под tracemalloc бои идут в несколько раз медленнее; режим для замеров, а не для прогонов.
+    """
+
+    def __init__(self, sample_every: int = 1, top: int = 10, nframes: int = 1, checkpoint_every: int = 100):
+        self.probe = MemoryProbe(sample_every)
+        self.top = top
+        self.nframes = nframes
+        self.checkpoint_every = max(1, checkpoint_every)
+        self.timeline: List[Tuple[int, int]] = []
+        self._started_tracing = False
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._end_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._start_memory = 0
+        self._end_memory = 0
+        self._traced_peak = 0
+
+    def start(self) -> 'MemoryAccounting':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.nframes)
+            self._started_tracing = True
+        gc.collect()
+        tracemalloc.reset_peak()
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._start_memory = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def checkpoint(self):
+        """Контрольная точка памяти; записывается раз в checkpoint_every боев."""
+        battles = self.probe.battles
+        if battles % self.checkpoint_every == 0 and (not self.timeline or self.timeline[-1][0] != battles):
+            gc.collect()  # бой и персонажи связаны циклами ссылок: без сборки виден мусор, а не удержание
+            self.timeline.append((battles, tracemalloc.get_traced_memory()[0]))
+
+    def stop(self):
+        # Пик сбрасывается в каждом ходе, поэтому общий пик - максимум из пика ходов и текущего
+        peak = tracemalloc.get_traced_memory()[1]
+        self._traced_peak = max(peak, self._start_memory + self.probe.temporaries_peak)
+        gc.collect()
+        self._end_memory = tracemalloc.get_traced_memory()[0]
+        self._end_snapshot = tracemalloc.take_snapshot()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> 'MemoryAccounting':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def top_sites(self) -> List[Tuple[str, int, int, str]]:
+        """Места с наибольшим приростом памяти между началом и концом прогона."""
+        if self._start_snapshot is None or self._end_snapshot is None:
+            return []
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                  tracemalloc.Filter(False, linecache.__file__))
+        start = self._start_snapshot.filter_traces(ignore)
+        end = self._end_snapshot.filter_traces(ignore)
+        sites = []
+        for stat in end.compare_to(start, 'lineno')[:self.top]:
+            if stat.size_diff <= 0:
+                break
+            frame = stat.traceback[0]
+            code = linecache.getline(frame.filename, frame.lineno).strip()
+            sites.append((_site(frame), stat.size_diff, stat.count_diff, code))
+        return sites
+
+    def report(self) -> MemoryReport:
+        return MemoryReport(self.probe, self._traced_peak, self._end_memory - self._start_memory,
+                            list(self.timeline), self.top_sites())
+
+
+def profile_battles(scenario: Scenario, battles: int = 1000, seed: int = 0, trace=None,
+                    limits=DEFAULT_LIMITS, sample_every: int = 1, top: int = 10) -> MemoryReport:
+    """Проводит battles боев сценария (seed, seed + 1, ...) в режиме учета памяти."""
+    memory = MemoryAccounting(sample_every=sample_every, top=top, checkpoint_every=max(1, battles // 10))
+    with memory:
+        memory.checkpoint()
+        for index in range(battles):
+            run_battle(scenario, seed + index, observers=[memory.probe], trace=trace, limits=limits)
+            memory.checkpoint()
+    return memory.report()
+
+
+def main(argv: Optional[List[str]] = None):
+    from game.tracing import TraceSampler
+
+    parser = argparse.ArgumentParser(description="Учет памяти боев по подсистемам (tracemalloc)")
+    parser.add_argument("--party", default="Warrior:Артур:5,Mage:Мерлин:5,Healer:Эльза:5",
+                        help="Класс:Имя:Уровень через запятую")
+    parser.add_argument("--boss", default="Дракон Урлог:5", help="Имя:Уровень")
+    parser.add_argument("--battles", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-log", action="store_true", help="бои без лога (как в массовых симуляциях)")
+    parser.add_argument("--sample-every", type=int, default=1, help="замер подсистем раз в N ходов")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    party = [(c, n, int(l)) for c, n, l in (item.split(":") for item in args.party.split(","))]
+    boss_name, boss_level = args.boss.rsplit(":", 1)
+    scenario = Scenario(party, (boss_name, int(boss_level)))
+    report = profile_battles(scenario, args.battles, args.seed, trace=TraceSampler() if args.no_log else None,
+                             sample_every=args.sample_every, top=args.top)
+    print(report.format())
+
+
+if __name__ == "__main__":
+    main()
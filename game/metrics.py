@@ -0,0 +1,411 @@
+import argparse
+import math
+from abc import ABC, abstractmethod
+import os
+import random
+import tempfile
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple, Callable
+
+# --- Метрики в текстовом формате Prometheus ---
+# Реестр счетчиков, измерителей и гистограмм с метками. Значения меняются
+# без блокировок (обновления идут из потока симуляции, чтение при выгрузке
+# может увидеть гистограмму на одно наблюдение "в пути" - для метрик это допустимо).
+# Под блокировкой только добавление нового набора меток и снимок набора при
+# выгрузке: поток HTTP обходит кортеж, а не словарь, в который пишет бой.
+# Выгрузка: HTTP-эндпоинт /metrics (serve_metrics) или периодическая запись
+# текстового файла для node_exporter textfile collector (TextfileExporter).
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_LATENCY_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 1e-2)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError("Счетчик не может уменьшаться")
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Значение вычисляется функцией в момент выгрузки."""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class _HistogramChild:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # последняя корзина - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric(ABC):
+    """Метрика с метками. Дочерние значения кешируются по кортежу значений меток."""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()  # labels() из потока боя против выгрузки из потока HTTP
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    @abstractmethod
+    def _new_child(self):
+        """Новое значение для набора меток. Должно быть реализовано в подклассах."""
+        pass
+
+    def labels(self, *values) -> object:
+        """Значение для набора меток; для горячего кода результат стоит сохранить."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: ожидались метки {self.labelnames}, получено {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _snapshot(self) -> Tuple[Tuple[Tuple[str, ...], object], ...]:
+        """Снимок (метки, значение) для выгрузки: словарь нельзя обходить, пока в него добавляют."""
+        with self._lock:
+            return tuple(self._children.items())
+
+    @abstractmethod
+    def _samples(self) -> List[Tuple[str, str, float]]:
+        """Строки выгрузки (суффикс имени, метки, значение). Должны быть реализованы в подклассах."""
+        pass
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self._samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def _samples(self):
+        return [("_total" if not self.name.endswith("_total") else "",
+                 _format_labels(self.labelnames, key), child.value)
+                for key, child in self._snapshot()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def _samples(self):
+        return [("", _format_labels(self.labelnames, key), child.get())
+                for key, child in self._snapshot()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def _samples(self):
+        samples = []
+        for key, child in self._snapshot():
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                samples.append(("_bucket", _format_labels(self.labelnames, key, le), cumulative))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(("_sum", labels, child.sum))
+            samples.append(("_count", labels, child.count))
+        return samples
+
+
+class MetricsRegistry:
+    """Набор метрик с общей выгрузкой в текстовый формат Prometheus."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def __getitem__(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+class BattleMetrics:
+    """Метрики движка: бои, ходы, задержка хода, навыки, тики эффектов, фазы босса.
+
+    Передается в Battle(metrics=...); бой сам передает ее боссу. Метки кешируются
+    в словарях, поэтому запись в горячем цикле - один поиск в словаре и сложение.
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, prefix: str = "rpg"):
+        self.registry = registry if registry is not None else MetricsRegistry()
+        r = self.registry
+        self.battles_started = r.counter(f"{prefix}_battles_started_total", "Начатые бои")
+        self.battles_finished = r.counter(f"{prefix}_battles_finished_total", "Законченные бои по исходу",
+                                          ("outcome",))
+        self.battles_in_progress = r.gauge(f"{prefix}_battles_in_progress", "Бои, идущие сейчас")
+        # Скорость - rate(rpg_turns_total[1m]) в Prometheus: не зависит от того, кто и как часто читает
+        self.turns = r.counter(f"{prefix}_turns_total", "Сыгранные ходы")
+        self.turn_latency = r.histogram(f"{prefix}_turn_latency_seconds", "Время одного хода")
+        self.skill_uses = r.counter(f"{prefix}_skill_uses_total", "Применения навыков и атак по id",
+                                    ("skill",))
+        self.effect_ticks = r.counter(f"{prefix}_effect_ticks_total", "Срабатывания эффектов в конце хода",
+                                      ("effect",))
+        self.phase_transitions = r.counter(f"{prefix}_boss_phase_transitions_total", "Смены фазы босса",
+                                           ("from_phase", "to_phase"))
+        self.boss_turn_latency = r.histogram(f"{prefix}_boss_turn_seconds", "Время Boss.take_turn по стратегии",
+                                             ("strategy",))
+        self._skill_children: Dict[str, _CounterChild] = {}
+        self._effect_children: Dict[str, _CounterChild] = {}
+        self._boss_children: Dict[str, _HistogramChild] = {}
+
+    def battle_started(self):
+        self.battles_started.inc()
+        self.battles_in_progress.inc()
+
+    def battle_finished(self, outcome: Optional[str]):
+        self.battles_finished.labels(outcome or "none").inc()
+        self.battles_in_progress.dec()
+
+    def turn_finished(self, action: Optional[str], seconds: float):
+        self.turns.inc()
+        self.turn_latency.observe(seconds)
+        if action is not None:
+            child = self._skill_children.get(action)
+            if child is None:
+                child = self._skill_children[action] = self.skill_uses.labels(action)
+            child.inc()
+
+    def effect_tick(self, effect: str):
+        child = self._effect_children.get(effect)
+        if child is None:
+            child = self._effect_children[effect] = self.effect_ticks.labels(effect)
+        child.inc()
+
+    def phase_transition(self, from_phase: int, to_phase: int):
+        self.phase_transitions.labels(str(from_phase), str(to_phase)).inc()
+
+    def boss_turn(self, strategy: str, seconds: float):
+        child = self._boss_children.get(strategy)
+        if child is None:
+            child = self._boss_children[strategy] = self.boss_turn_latency.labels(strategy)
+        child.observe(seconds)
+
+
+# --- Выгрузка ---
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = None
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9108) -> ThreadingHTTPServer:
+    """Запускает HTTP-эндпоинт /metrics в фоновом потоке. Остановка: server.shutdown()."""
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_textfile(registry: MetricsRegistry, path: str):
+    """Атомарно записывает метрики в файл (временный файл рядом + os.replace)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(registry.render())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class TextfileExporter:
+    """Периодически переписывает файл метрик в фоновом потоке."""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 15.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            write_textfile(self.registry, self.path)
+
+    def start(self) -> 'TextfileExporter':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливает поток и записывает финальные значения."""
+        self._stop.set()
+        self._thread.join()
+        write_textfile(self.registry, self.path)
+
+    def __enter__(self) -> 'TextfileExporter':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None):
+    from game.simulation import Scenario, run_battle
+
+    parser = argparse.ArgumentParser(description="Симуляция боев с метриками в формате Prometheus")
+    parser.add_argument("--party", default="Warrior:Артур:5,Mage:Мерлин:5,Healer:Эльза:5",
+                        help="Класс:Имя:Уровень через запятую")
+    parser.add_argument("--boss", default="Дракон Урлог:5", help="Имя:Уровень")
+    parser.add_argument("--battles", type=int, default=0, help="0 - бесконечно")
+    parser.add_argument("--port", type=int, default=None, help="порт HTTP-эндпоинта /metrics")
+    parser.add_argument("--textfile", default=None, help="файл для периодической выгрузки")
+    parser.add_argument("--interval", type=float, default=15.0)
+    args = parser.parse_args(argv)
+
+    party = [(c, n, int(l)) for c, n, l in (item.split(":") for item in args.party.split(","))]
+    boss_name, boss_level = args.boss.rsplit(":", 1)
+    scenario = Scenario(party, (boss_name, int(boss_level)))
+    metrics = BattleMetrics()
+    server = serve_metrics(metrics.registry, port=args.port) if args.port is not None else None
+    exporter = TextfileExporter(metrics.registry, args.textfile, args.interval).start() if args.textfile else None
+    seeds = random.Random()
+    try:
+        played = 0
+        while not args.battles or played < args.battles:
+            run_battle(scenario, seeds.getrandbits(64), metrics=metrics)
+            played += 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if exporter is not None:
+            exporter.stop()
+        if server is not None:
+            server.shutdown()
+    if server is None and exporter is None:
+        print(metrics.registry.render(), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import json
+import os
+from typing import Dict, List, Optional, Iterable, Iterator, Tuple
+import numpy as np
+from game.battle import Battle, BattleObserver
+from game.simulation import Scenario, run_battle, action_skill_name, split_hp_changes
+
+# --- Колоночное хранилище метрик боев на NumPy memmap ---
+# Каждая таблица - каталог с файлом schema.json и файлом <колонка>.bin на колонку.
+# Колонки фиксированной ширины, поэтому строка i колонки лежит по смещению
+# i * itemsize, и любой запрос читает только нужные колонки и только по кускам.
+# Количество строк хранится в schema.json и обновляется после записи данных,
+# так что оборванная запись не дает "полустрок".
+
+CLASS_CODES = {'Warrior': 0, 'Mage': 1, 'Healer': 2, 'Boss': 3, 'Minion': 4}
+CLASS_NAMES = list(CLASS_CODES)
+
+# Навыки по отображаемому имени; базовые атаки босса и миньонов навыками не являются
+SKILL_CODES = {
+    'Swing Sword': 0, 'Heavy Slam': 1, 'Fireball': 2, 'Arcane Missile': 3,
+    'Heal': 4, 'Divine Shield': 5, 'Boss Attack': 6, 'Dragon Breath': 7,
+    'Tail Swipe': 8, 'Wing Buffet': 9, 'Fear Roar': 10, 'Summon Minions': 11,
+    'Meteor Shower': 12, 'Earthquake': 13, 'Minion Attack': 14,
+}
+SKILL_NONE = -1  # ход пропущен (оглушение) или навык неизвестен
+
+OUTCOME_CODES = {'defeat': 0, 'victory': 1, 'timeout': 2, 'stalemate': 3}
+
+CHUNK_ROWS = 1 << 20
+
+
+def _column_name(label: str) -> str:
+    return label.lower().replace(' ', '_')
+
+
+BATTLE_SCHEMA: Dict[str, str] = {
+    'scenario': 'int32',
+    'seed': 'int64',
+    'outcome': 'int8',
+    'rounds': 'int32',
+    'turns': 'int32',
+    'boss_phase': 'int8',
+    'effect_damage': 'int32',
+}
+for _class_name in CLASS_NAMES:
+    BATTLE_SCHEMA[f'damage_{_column_name(_class_name)}'] = 'int32'
+    BATTLE_SCHEMA[f'healing_{_column_name(_class_name)}'] = 'int32'
+for _skill_name in SKILL_CODES:
+    BATTLE_SCHEMA[f'skill_{_column_name(_skill_name)}'] = 'int32'
+
+TURN_SCHEMA: Dict[str, str] = {
+    'battle': 'int64',
+    'turn': 'int32',
+    'round': 'int32',
+    'actor_class': 'int8',
+    'skill': 'int8',
+    'damage': 'int32',
+    'healing': 'int32',
+    'boss_hp': 'int32',
+    'boss_phase': 'int8',
+}
+
+
+class ColumnTable:
+    """Таблица с колонками фиксированной ширины, дописываемая кусками.
+
+    Строки копятся в памяти (не более buffer_rows) и сбрасываются в файлы колонок
+    через np.memmap; чтение колонок тоже идет через memmap.
+    """
+
+    def __init__(self, directory: str, schema: Optional[Dict[str, str]] = None, buffer_rows: int = 65536):
+        self.directory = directory
+        self._schema_path = os.path.join(directory, 'schema.json')
+        if os.path.exists(self._schema_path):
+            with open(self._schema_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if schema is not None and meta['columns'] != schema:
+                raise ValueError(f"Схема таблицы {directory} не совпадает с ожидаемой")
+            self.schema = meta['columns']
+            self._rows = meta['rows']
+        else:
+            if schema is None:
+                raise ValueError(f"Таблица {directory} не существует, нужна схема")
+            os.makedirs(directory, exist_ok=True)
+            self.schema = dict(schema)
+            self._rows = 0
+            self._write_meta()
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in self.schema.items()}
+        self.buffer_rows = buffer_rows
+        self._buffer = {name: np.zeros(buffer_rows, dtype) for name, dtype in self.dtypes.items()}
+        self._buffered = 0
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, f'{column}.bin')
+
+    def _write_meta(self):
+        tmp_path = self._schema_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'columns': self.schema, 'rows': self._rows}, f)
+        os.replace(tmp_path, self._schema_path)
+
+    def __len__(self) -> int:
+        return self._rows + self._buffered
+
+    def append(self, row: Dict[str, int]):
+        """Добавляет строку; отсутствующие колонки заполняются нулями."""
+        index = self._buffered
+        for name, column in self._buffer.items():
+            column[index] = row.get(name, 0)
+        self._buffered += 1
+        if self._buffered == self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """Сбрасывает накопленные строки в файлы колонок."""
+        if not self._buffered:
+            return
+        count = self._buffered
+        for name, dtype in self.dtypes.items():
+            # memmap в режиме r+ сам расширяет файл до offset + shape
+            mode = 'r+' if os.path.exists(self._path(name)) else 'w+'
+            target = np.memmap(self._path(name), dtype=dtype, mode=mode,
+                               offset=self._rows * dtype.itemsize, shape=(count,))
+            target[:] = self._buffer[name][:count]
+            target.flush()
+            del target
+        self._rows += count
+        self._buffered = 0
+        self._write_meta()
+
+    def column(self, name: str) -> np.ndarray:
+        """Колонка только для чтения (memmap, без загрузки в память)."""
+        if self._rows == 0:
+            return np.zeros(0, self.dtypes[name])
+        return np.memmap(self._path(name), dtype=self.dtypes[name], mode='r', shape=(self._rows,))
+
+    def iter_chunks(self, columns: Iterable[str], chunk_rows: int = CHUNK_ROWS) -> Iterator[Dict[str, np.ndarray]]:
+        """Перебирает сброшенные строки кусками по chunk_rows: {колонка: срез}."""
+        columns = list(columns)
+        mapped = {name: self.column(name) for name in columns}
+        for start in range(0, self._rows, chunk_rows):
+            yield {name: np.asarray(data[start:start + chunk_rows]) for name, data in mapped.items()}
+
+    def sum(self, column: str, where: Optional[Tuple[str, int]] = None) -> int:
+        """Сумма колонки; where=(колонка, значение) - только строки с этим значением."""
+        total = 0
+        columns = [column] if where is None else [column, where[0]]
+        for chunk in self.iter_chunks(columns):
+            values = chunk[column]
+            if where is not None:
+                values = values[chunk[where[0]] == where[1]]
+            total += int(values.sum(dtype=np.int64))
+        return total
+
+    def count(self, where: Optional[Tuple[str, int]] = None) -> int:
+        """Количество строк (с условием where=(колонка, значение))."""
+        if where is None:
+            return self._rows
+        return sum(int(np.count_nonzero(chunk[where[0]] == where[1]))
+                   for chunk in self.iter_chunks([where[0]]))
+
+    def mean(self, column: str, where: Optional[Tuple[str, int]] = None) -> float:
+        rows = self.count(where)
+        return self.sum(column, where) / rows if rows else 0.0
+
+    def group_sum(self, value: str, by: str, groups: int) -> np.ndarray:
+        """Суммы колонки value по значениям колонки by (0..groups-1), как np.bincount."""
+        totals = np.zeros(groups, dtype=np.float64)
+        for chunk in self.iter_chunks([value, by]):
+            keys = chunk[by].astype(np.int64)
+            valid = (keys >= 0) & (keys < groups)
+            totals += np.bincount(keys[valid], weights=chunk[value][valid], minlength=groups)
+        return totals
+
+    def histogram(self, column: str, groups: int) -> np.ndarray:
+        """Количество строк для каждого значения колонки (0..groups-1)."""
+        counts = np.zeros(groups, dtype=np.int64)
+        for chunk in self.iter_chunks([column]):
+            keys = chunk[column].astype(np.int64)
+            counts += np.bincount(keys[(keys >= 0) & (keys < groups)], minlength=groups)
+        return counts
+
+
+class MetricsStore:
+    """Хранилище метрик: таблицы battles (строка на бой) и turns (строка на ход)."""
+
+    def __init__(self, path: str, record_turns: bool = True):
+        self.path = path
+        self.battles = ColumnTable(os.path.join(path, 'battles'), BATTLE_SCHEMA)
+        self.turns = ColumnTable(os.path.join(path, 'turns'), TURN_SCHEMA) if record_turns else None
+
+    def flush(self):
+        self.battles.flush()
+        if self.turns is not None:
+            self.turns.flush()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self) -> 'MetricsStore':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def summary(self) -> Dict[str, object]:
+        """Сводка по всем боям: доля побед, средняя длина, средний урон и лечение по классам, фазы, навыки."""
+        battles = self.battles
+        rows = battles.count()
+        result = {
+            'battles': rows,
+            'win_rate': battles.count(('outcome', OUTCOME_CODES['victory'])) / rows if rows else 0.0,
+            'timeouts': battles.count(('outcome', OUTCOME_CODES['timeout'])),
+            'stalemates': battles.count(('outcome', OUTCOME_CODES['stalemate'])),
+            'mean_rounds': battles.mean('rounds'),
+            'phase_reached': battles.histogram('boss_phase', 4)[1:].tolist(),
+        }
+        for class_name in CLASS_NAMES:
+            key = _column_name(class_name)
+            result[f'mean_damage_{key}'] = battles.mean(f'damage_{key}')
+            result[f'mean_healing_{key}'] = battles.mean(f'healing_{key}')
+        result['skill_counts'] = {name: battles.sum(f'skill_{_column_name(name)}') for name in SKILL_CODES}
+        return result
+
+
+class MetricsRecorder(BattleObserver):
+    """Наблюдатель, считающий метрики боя и дописывающий их в MetricsStore."""
+
+    def __init__(self, store: MetricsStore):
+        self.store = store
+        self.scenario_id = 0
+        self.seed = 0
+        self._row: Dict[str, int] = {}
+        self._snapshot: List[Tuple[object, int]] = []
+        self._turn = 0
+
+    def on_battle_start(self, battle: Battle):
+        self._row = {'scenario': self.scenario_id, 'seed': self.seed, 'boss_phase': battle.boss.phase}
+        self._turn = 0
+
+    def on_turn_start(self, battle: Battle, actor):
+        self._snapshot = [(char, char.hp) for char in battle.turn_order.members()]
+
+    def on_turn_end(self, battle: Battle, actor):
+        row = self._row
+        self._turn += 1
+        damage, healing, effect_damage = split_hp_changes(battle, actor, self._snapshot)
+        class_key = _column_name(type(actor).__name__)
+        row[f'damage_{class_key}'] = row.get(f'damage_{class_key}', 0) + damage
+        row[f'healing_{class_key}'] = row.get(f'healing_{class_key}', 0) + healing
+        row['effect_damage'] = row.get('effect_damage', 0) + effect_damage
+        row['boss_phase'] = max(row['boss_phase'], battle.boss.phase)
+
+        skill = action_skill_name(actor)
+        if skill is not None:
+            column = f'skill_{_column_name(skill)}'
+            row[column] = row.get(column, 0) + 1
+
+        if self.store.turns is not None:
+            self.store.turns.append({
+                'battle': len(self.store.battles),
+                'turn': self._turn,
+                'round': battle.round_number,
+                'actor_class': CLASS_CODES.get(type(actor).__name__, -1),
+                'skill': SKILL_CODES.get(skill, SKILL_NONE),
+                'damage': damage,
+                'healing': healing,
+                'boss_hp': battle.boss.hp,
+                'boss_phase': battle.boss.phase,
+            })
+
+    def on_battle_end(self, battle: Battle):
+        row = self._row
+        row['outcome'] = OUTCOME_CODES.get(battle.outcome, -1)
+        row['rounds'] = battle.round_number
+        row['turns'] = self._turn
+        self.store.battles.append(row)
+
+
+def record_campaign(store: MetricsStore, scenarios: List[Scenario], battles_per_scenario: int,
+                    base_seed: int = 0) -> int:
+    """Проводит battles_per_scenario боев каждого сценария и пишет метрики. Возвращает число боев."""
+    recorder = MetricsRecorder(store)
+    total = 0
+    for scenario_id, scenario in enumerate(scenarios):
+        recorder.scenario_id = scenario_id
+        for i in range(battles_per_scenario):
+            recorder.seed = base_seed + scenario_id * battles_per_scenario + i
+            run_battle(scenario, recorder.seed, observers=[recorder])
+            total += 1
+    store.flush()
+    return total
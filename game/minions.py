@@ -0,0 +1,196 @@
+from array import array
+from typing import List
+from game import rng
+from game.exceptions import CharacterDeadError
+from game.skills import EFFECT_POOL
+
+# --- Миньоны босса: пул слотов в виде структуры массивов ---
+# Характеристики всех миньонов лежат в параллельных массивах пула (array('i')),
+# а Minion - постоянный легкий объект-представление одного слота. Слоты и их
+# представления создаются один раз и переиспользуются между призывами и боями,
+# поэтому призыв не создает новых объектов (пул растет только при нехватке слотов).
+# Эффекты и оглушение миньона тоже хранятся в пуле по слоту: на миньона, как и на
+# героя, можно наложить яд, щит или оглушение, а EffectManager тикает его эффекты
+# в конце его хода. При освобождении слота эффекты возвращаются в EFFECT_POOL.
+
+MINION_NAMES = [f"Миньон {i + 1}" for i in range(16)]
+
+
+class Minion:
+    """Представление слота пула: ведет себя как участник боя (HP, ловкость, ход)."""
+    __slots__ = ('pool', 'slot', 'name', 'last_action', '_events')
+
+    level = 1
+    mp = 0
+    intellect = 1
+    skills = {}
+    _cooldowns = {}  # у миньонов нет навыков с перезарядкой; словарь не изменяется
+    basic_attack_name = 'Minion Attack'
+
+    def __init__(self, pool: 'MinionPool', slot: int):
+        self.pool = pool
+        self.slot = slot
+        self.name = ""
+        self.last_action = None
+        self._events = None  # обработчики событий боя (game/events.py), пока миньон в бою
+
+    @property
+    def hp(self) -> int:
+        return self.pool.hp[self.slot]
+
+    @hp.setter
+    def hp(self, value: int):
+        # Те же границы, что у BoundedStat: от 0 до максимума
+        pool = self.pool
+        old = pool.hp[self.slot]
+        pool.hp[self.slot] = value = max(0, min(int(value), pool.max_hp[self.slot]))
+        if self._events is not None:
+            self._events.hp_changed(self, old, value)
+        watcher = pool.watchers[self.slot]
+        if watcher is not None:
+            watcher.changed(self, 'hp')
+
+    @property
+    def active_effects(self) -> list:
+        return self.pool.effects[self.slot]
+
+    @property
+    def stunned(self) -> bool:
+        return bool(self.pool.stunned[self.slot])
+
+    @stunned.setter
+    def stunned(self, value: bool):
+        self.pool.stunned[self.slot] = bool(value)
+
+    @property
+    def _state_watcher(self):
+        return self.pool.watchers[self.slot]
+
+    @property
+    def strength(self) -> int:
+        return self.pool.strength[self.slot]
+
+    @strength.setter
+    def strength(self, value: int):
+        self.pool.strength[self.slot] = int(value)
+        watcher = self.pool.watchers[self.slot]
+        if watcher is not None:
+            watcher.changed(self, 'strength')
+
+    @property
+    def agility(self) -> int:
+        return self.pool.agility[self.slot]
+
+    @agility.setter
+    def agility(self, value: int):
+        self.pool.agility[self.slot] = int(value)
+        watcher = self.pool.watchers[self.slot]
+        if watcher is not None:
+            watcher.changed(self, 'agility')
+
+    @property
+    def is_alive(self) -> bool:
+        return self.pool.active[self.slot] and self.pool.hp[self.slot] > 0
+
+    def basic_attack(self, target) -> str:
+        self.last_action = "attack"
+        damage = rng.randint(self.pool.damage_min[self.slot], self.pool.damage_max[self.slot])
+        target.hp -= damage
+        return f"{self.name} атакует {target.name} на {damage} урона"
+
+    def take_turn(self, party: List) -> str:
+        if not self.is_alive:
+            raise CharacterDeadError(f"{self.name} мертв и не может действовать.")
+        # Общий буфер пула: миньоны ходят по очереди, поэтому одного списка достаточно
+        alive_targets = self.pool.targets
+        alive_targets.clear()
+        for char in party:
+            if char.is_alive:
+                alive_targets.append(char)
+        if not alive_targets:
+            return "Все цели мертвы!"
+        target = rng.choice(alive_targets)
+        alive_targets.clear()
+        return self.basic_attack(target)
+
+    def _end_turn(self):
+        pass
+
+    def __str__(self) -> str:
+        return f"{self.name} - HP: {self.hp}"
+
+    def __repr__(self) -> str:
+        return f"Minion('{self.name}', slot={self.slot})"
+
+
+class MinionPool:
+    """Пул слотов миньонов: параллельные массивы характеристик и список свободных слотов."""
+
+    def __init__(self, capacity: int = 16):
+        self.capacity = 0
+        self.hp = array('i')
+        self.max_hp = array('i')
+        self.strength = array('i')
+        self.agility = array('i')
+        self.damage_min = array('i')
+        self.damage_max = array('i')
+        self.active = bytearray()
+        self.stunned = bytearray()
+        self.effects: List[list] = []  # наложенные эффекты каждого слота
+        self.handles: List[Minion] = []
+        self._free: List[int] = []
+        self.targets: list = []  # буфер живых целей для хода миньона
+        self.watchers: list = []  # наблюдатель состояния каждого слота (StateHasher) или None
+        self._grow(capacity)
+
+    def _grow(self, extra: int):
+        start = self.capacity
+        zeros = [0] * extra
+        for column in (self.hp, self.max_hp, self.strength, self.agility, self.damage_min, self.damage_max):
+            column.extend(zeros)
+        self.active.extend(bytes(extra))
+        self.stunned.extend(bytes(extra))
+        self.effects.extend([] for _ in range(extra))
+        self.watchers.extend([None] * extra)
+        self.handles.extend(Minion(self, slot) for slot in range(start, start + extra))
+        # Свободные слоты берутся с конца списка, поэтому кладем их в обратном порядке
+        self._free.extend(range(start + extra - 1, start - 1, -1))
+        self.capacity += extra
+
+    def acquire(self, name: str, hp: int, strength: int, agility: int,
+                damage_min: int, damage_max: int) -> Minion:
+        """Занимает свободный слот (при нехватке пул удваивается) и возвращает его представление."""
+        if not self._free:
+            self._grow(max(self.capacity, 1))
+        slot = self._free.pop()
+        self.hp[slot] = hp
+        self.max_hp[slot] = hp
+        self.strength[slot] = strength
+        self.agility[slot] = agility
+        self.damage_min[slot] = damage_min
+        self.damage_max[slot] = damage_max
+        self.active[slot] = 1
+        minion = self.handles[slot]
+        minion.name = name
+        minion.last_action = None
+        return minion
+
+    def release(self, minion: Minion):
+        """Возвращает слот в пул; оставшиеся эффекты слота уходят в EFFECT_POOL."""
+        slot = minion.slot
+        if self.active[slot]:
+            self.active[slot] = 0
+            self.stunned[slot] = 0
+            effects = self.effects[slot]
+            for effect in effects:
+                EFFECT_POOL.release(effect)
+            effects.clear()
+            self._free.append(slot)
+
+    @property
+    def in_use(self) -> int:
+        return self.capacity - len(self._free)
+
+
+# Общий пул процесса: слоты переиспользуются всеми боссами и боями
+MINION_POOL = MinionPool()
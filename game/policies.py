@@ -0,0 +1,168 @@
+import importlib
+from typing import Callable, Dict, Optional, Union
+from game import rng
+from game.battle import Battle, BattleObserver, SUPPORT_SKILLS
+from game.characters import Boss, Healer
+from game.core import Character
+
+# --- Реестр сменных политик ИИ ---
+# Политика пати - функция (battle, character) -> str, выполняющая ход героя; бой
+# вызывает ее вместо Battle._choose_party_action через battle.party_policy.
+# Политика босса - замена стратегий фаз ('aggressive', 'aoe', 'enraged') на другие
+# Boss.Strategy. Policy объединяет обе и подключается к бою как наблюдатель:
+# в on_battle_start она выставляет политику пати и стратегии босса, поэтому ее
+# можно передать в любой прогон через observers (run_battle, кампании, A/B-тест).
+# Политики задаются по имени из реестра или как "модуль:атрибут"; запись реестра
+# тоже может быть строкой "модуль:атрибут" - модуль импортируется при первом выборе.
+
+PartyPolicy = Callable[[Battle, Character], str]
+
+WOUNDED_HP = 60  # герой с HP ниже этого - раненый (HP героев ограничено 100)
+
+
+def _attack_skill_or_basic(battle: Battle, character: Character) -> str:
+    enemy = battle._choose_enemy_target(character)
+    for skill_name, skill in character.skills.items():
+        if skill_name in SUPPORT_SKILLS:
+            continue
+        if not character.is_skill_on_cooldown(skill_name) and character.mp >= skill.mp_cost:
+            return character.use_skill(enemy, skill_name)
+    return character.basic_attack(enemy)
+
+
+def skills_first(battle: Battle, character: Character) -> str:
+    """Навык, если есть готовый атакующий, иначе базовая атака (без броска 70/30)."""
+    if not battle.boss.is_alive:
+        return f"{character.name} ищет цель, но все враги повержены!"
+    return _attack_skill_or_basic(battle, character)
+
+
+def focus_boss(battle: Battle, character: Character) -> str:
+    """Как обычный ИИ, но все бьют босса, не отвлекаясь на миньонов."""
+    if not battle.boss.is_alive:
+        return f"{character.name} ищет цель, но все враги повержены!"
+    if rng.random() < 0.7:
+        return character.basic_attack(battle.boss)
+    for skill_name, skill in character.skills.items():
+        if skill_name in SUPPORT_SKILLS:
+            continue
+        if not character.is_skill_on_cooldown(skill_name) and character.mp >= skill.mp_cost:
+            return character.use_skill(battle.boss, skill_name)
+    return character.basic_attack(battle.boss)
+
+
+def most_wounded(battle: Battle, character: Character) -> Optional[Character]:
+    """Самый раненый живой союзник с HP ниже WOUNDED_HP (или None)."""
+    target = None
+    for char in battle.party:
+        if char is not character and char.is_alive and char.hp < WOUNDED_HP:
+            if target is None or char.hp < target.hp:
+                target = char
+    return target
+
+
+def triage(battle: Battle, character: Character) -> str:
+    """Целитель щитом и лечением поддерживает самого раненого союзника, остальные - как обычно."""
+    if isinstance(character, Healer):
+        target = most_wounded(battle, character)
+        if target is not None:
+            shield = character.skills['divine_shield']
+            if not character.is_skill_on_cooldown('divine_shield') and character.mp >= shield.mp_cost:
+                return character.use_skill(target, 'divine_shield')
+            if character.mp >= character.skills['attack'].mp_cost:
+                return character.basic_attack(target)  # базовое действие целителя - лечение
+    return battle._choose_party_action(character)
+
+
+class SkillChanceStrategy(Boss.Strategy):
+    """Стратегия босса: навык с вероятностью skill_chance, иначе базовая атака.
+
+    skill - метод босса для навыка: 'use_random_skill', 'use_aoe_skill' или 'use_powerful_skill'.
+    """
+
+    def __init__(self, skill_chance: float, skill: str = 'use_random_skill'):
+        self.skill_chance = skill_chance
+        self.skill = skill
+
+    def execute(self, boss: Boss, party) -> str:
+        if rng.random() < self.skill_chance:
+            return getattr(boss, self.skill)(party)
+        return boss.basic_attack_random_target(party)
+
+
+PARTY_POLICIES: Dict[str, Union[PartyPolicy, str]] = {
+    'default': Battle._choose_party_action,
+    'skills_first': skills_first,
+    'focus_boss': focus_boss,
+    'triage': triage,
+    'table': 'game.decision_table:HEURISTIC_TABLE',  # скомпилированная эвристика, см. game/decision_table.py
+}
+
+# Имя политики босса -> {стратегия фазы: фабрика Boss.Strategy}
+BOSS_POLICIES: Dict[str, Dict[str, Callable[[], Boss.Strategy]]] = {
+    'default': {},
+    'aggressive_60': {'aggressive': lambda: SkillChanceStrategy(0.6)},
+    'aggressive_aoe': {'aggressive': lambda: SkillChanceStrategy(0.8, 'use_aoe_skill')},
+    'calm_enraged': {'enraged': lambda: SkillChanceStrategy(0.7, 'use_powerful_skill')},
+}
+
+
+def register_party_policy(name: str, policy: PartyPolicy) -> PartyPolicy:
+    PARTY_POLICIES[name] = policy
+    return policy
+
+
+def register_boss_policy(name: str, strategies: Dict[str, Callable[[], Boss.Strategy]]):
+    unknown = set(strategies) - set(Boss.PHASE_STRATEGIES.values())
+    if unknown:
+        raise ValueError(f"Неизвестные стратегии фаз: {', '.join(sorted(unknown))}")
+    BOSS_POLICIES[name] = dict(strategies)
+
+
+def _resolve(name: str, registry: Dict, what: str):
+    if name in registry:
+        value = registry[name]
+        if not isinstance(value, str):
+            return value
+        name = value  # отложенная запись "модуль:атрибут"
+    module_name, _, attribute = name.partition(":")
+    if not attribute:
+        raise ValueError(f"Неизвестная политика {what} {name!r}: {', '.join(registry)} или модуль:атрибут")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class Policy(BattleObserver):
+    """Политика пати и босса для боя; передается в observers."""
+
+    def __init__(self, party: str = 'default', boss: str = 'default'):
+        self.party = party
+        self.boss = boss
+        self.party_policy: PartyPolicy = _resolve(party, PARTY_POLICIES, "пати")
+        self.boss_strategies = _resolve(boss, BOSS_POLICIES, "босса")
+
+    @classmethod
+    def parse(cls, spec: str) -> 'Policy':
+        """Политика из строки "пати" или "пати/босс", например "default/aggressive_60"."""
+        party, _, boss = spec.partition("/")
+        return cls(party or 'default', boss or 'default')
+
+    @property
+    def name(self) -> str:
+        return self.party if self.boss == 'default' else f"{self.party}/{self.boss}"
+
+    def on_battle_start(self, battle: Battle):
+        battle.party_policy = None if self.party_policy is Battle._choose_party_action else self.party_policy
+        if isinstance(self.party_policy, BattleObserver):  # политике нужна подготовка к бою (TablePolicy)
+            self.party_policy.on_battle_start(battle)
+        if self.boss_strategies:
+            boss = battle.boss
+            for phase_strategy, factory in self.boss_strategies.items():
+                boss._strategies[phase_strategy] = factory()
+            boss._current_strategy = boss._strategies[Boss.PHASE_STRATEGIES[boss.phase]]
+
+    def on_battle_end(self, battle: Battle):
+        if isinstance(self.party_policy, BattleObserver):
+            self.party_policy.on_battle_end(battle)
+
+    def __repr__(self) -> str:
+        return f"Policy({self.party!r}, {self.boss!r})"
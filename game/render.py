@@ -0,0 +1,122 @@
+import sys
+import time
+from typing import Callable, List, Optional, TextIO
+from game.battle import Battle, BattleObserver
+
+# --- Буферизованный вывод боя на консоль ---
+# Сообщения боя (включая сообщения босса через log_sink) не печатаются по одной
+# строке, а копятся в кадре; кадр уходит в поток одним write после хода.
+# Скорость: speed ходов в секунду (0 - без задержек; тогда кадры дополнительно
+# склеиваются, чтобы не писать чаще max_fps раз в секунду) или step=True -
+# следующий ход по Enter. Панель состояния (HP/MP всех участников) на терминале
+# перерисовывается на месте через ANSI-последовательности, а не печатается заново.
+
+CLEAR_BELOW = "\x1b[J"
+BAR_WIDTH = 10
+
+
+def _cursor_up(lines: int) -> str:
+    return f"\x1b[{lines}F" if lines else ""
+
+
+def _bar(value: float, maximum: float) -> str:
+    filled = round(BAR_WIDTH * value / maximum) if maximum else 0
+    return "█" * filled + "░" * (BAR_WIDTH - filled)
+
+
+def status_lines(battle: Battle) -> List[str]:
+    """Панель состояния: строка на героя, строка босса и сводка миньонов."""
+    lines = [f"--- Раунд {battle.round_number} ---"]
+    width = max(len(char.name) for char in battle.party + [battle.boss])
+    for char in battle.party + [battle.boss]:
+        max_hp = getattr(char, 'max_hp', 100)
+        state = "" if char.is_alive else " †"
+        if char.is_alive and char.stunned:
+            state = " оглушен"
+        lines.append(f"{char.name:<{width}} {_bar(char.hp, max_hp)} {char.hp:>3}/{max_hp:<3} HP "
+                     f"{char.mp:>3} MP{state}")
+    minions = getattr(battle.boss, 'minions', ())
+    alive = [minion for minion in minions if minion.is_alive]
+    if alive:
+        lines.append("Миньоны: " + ", ".join(f"{minion.name} {minion.hp} HP" for minion in alive))
+    return lines
+
+
+class ConsoleRenderer(BattleObserver):
+    """Вывод боя кадрами: Battle(party, boss, renderer=ConsoleRenderer(speed=2)).
+
+    panel - показывать панель состояния (None - только если поток - терминал;
+    вне терминала панель печатается одной строкой в конце каждого кадра).
+    """
+
+    def __init__(self, speed: float = 0.0, step: bool = False, panel: Optional[bool] = None,
+                 stream: Optional[TextIO] = None, max_fps: float = 30.0,
+                 wait: Callable[[], object] = input):
+        self.speed = speed
+        self.step = step
+        self.stream = stream if stream is not None else sys.stdout
+        self.interactive = self.stream.isatty() if hasattr(self.stream, 'isatty') else False
+        self.panel = self.interactive if panel is None else panel
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.wait = wait
+        self.frames = 0  # кадров записано (число вызовов write потока)
+        self._lines: List[str] = []
+        self._panel_height = 0  # строк панели на экране (для перерисовки на месте)
+        self._last_write = 0.0
+        self._battle: Optional[Battle] = None
+
+    def write(self, line: str):
+        """Приемник сообщений боя (вместо print)."""
+        self._lines.append(line)
+
+    def _panel_text(self) -> List[str]:
+        if not self.panel or self._battle is None:
+            return []
+        lines = status_lines(self._battle)
+        if not self.interactive:
+            return [" | ".join(lines)]
+        return lines
+
+    def flush(self):
+        """Записывает накопленный кадр одним вызовом write."""
+        panel = self._panel_text()
+        if not self._lines and not panel:
+            return
+        parts = []
+        if self.interactive and self._panel_height:
+            parts.append(_cursor_up(self._panel_height) + CLEAR_BELOW)
+        text = "\n".join(self._lines + panel)
+        parts.append(text + "\n")
+        self._lines.clear()
+        self._panel_height = sum(line.count("\n") + 1 for line in panel) if self.interactive else 0
+        self.stream.write("".join(parts))
+        self.stream.flush()
+        self.frames += 1
+        self._last_write = time.monotonic()
+
+    def _end_frame(self):
+        now = time.monotonic()
+        if self.step:
+            self.flush()
+            self.wait()
+            if self.interactive and self._panel_height:
+                self._panel_height += 1  # строка, которую оставил Enter
+        elif self.speed > 0:
+            due = self._last_write + 1.0 / self.speed
+            if now < due:
+                time.sleep(due - now)
+            self.flush()
+        elif now - self._last_write >= self.min_interval:
+            self.flush()
+
+    def on_battle_start(self, battle: Battle):
+        self._battle = battle
+        self._panel_height = 0
+        self._last_write = 0.0
+
+    def on_turn_end(self, battle: Battle, actor):
+        self._end_frame()
+
+    def on_battle_end(self, battle: Battle):
+        self.flush()
+        self._battle = None
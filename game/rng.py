@@ -0,0 +1,81 @@
+import random as _random
+from contextlib import contextmanager
+from itertools import chain
+from typing import Any, Dict, Tuple, Callable, Optional, Iterator
+
+# --- Источник случайности для боевого движка ---
+# Все броски движка (урон навыков, криты, выбор цели, стратегии босса, миньоны)
+# идут через функции этого модуля: rng.random(), rng.randint(a, b), rng.choice(seq).
+# По умолчанию источник - глобальный модуль random, поэтому random.seed() в main.py
+# работает как раньше. Для записи, воспроизведения и посевных симуляций источник
+# подменяется через use_source(). Функции модуля - это привязанные методы текущего
+# источника (без лишнего вызова-обертки), поэтому обращаться к ним нужно через
+# модуль (rng.randint), а не импортировать по имени.
+
+_source: Any = _random
+
+random: Callable[[], float] = _random.random  # равномерное число из [0, 1)
+randint: Callable[[int, int], int] = _random.randint  # целое из [a, b] включительно
+choice: Callable = _random.choice  # случайный элемент непустой последовательности
+
+
+def get_source() -> Any:
+    """Возвращает текущий источник случайности."""
+    return _source
+
+
+def set_source(source: Any) -> Any:
+    """Устанавливает источник случайности и возвращает предыдущий."""
+    global _source, random, randint, choice
+    previous = _source
+    _source = source if source is not None else _random
+    random = _source.random
+    randint = _source.randint
+    choice = _source.choice
+    return previous
+
+
+@contextmanager
+def use_source(source: Any):
+    """Временно подменяет источник случайности (например, на random.Random(seed))."""
+    previous = set_source(source)
+    try:
+        yield source
+    finally:
+        set_source(previous)
+
+
+class BlockRandom:
+    """Источник, выдающий броски из заранее заполненных блоков (NumPy PCG64).
+
+    Равномерные числа и целые для каждого диапазона randint генерируются блоками
+    по block_size штук одним вызовом NumPy. Блоки склеиваются itertools.chain,
+    поэтому random() - это вызов C-функции, а Python-код выполняется только раз
+    на блок. С одинаковым seed последовательность воспроизводится, но отличается
+    от random.Random(seed).
+    """
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = 4096):
+        import numpy as np
+        self._generator = np.random.Generator(np.random.PCG64(seed))
+        self.block_size = block_size
+        self.random: Callable[[], float] = chain.from_iterable(self._uniform_blocks()).__next__
+        self._int_streams: Dict[Tuple[int, int], Callable[[], int]] = {}
+
+    def _uniform_blocks(self) -> Iterator[list]:
+        while True:
+            yield self._generator.random(self.block_size).tolist()
+
+    def _int_blocks(self, a: int, b: int) -> Iterator[list]:
+        while True:
+            yield self._generator.integers(a, b + 1, size=self.block_size).tolist()
+
+    def randint(self, a: int, b: int) -> int:
+        try:
+            return self._int_streams[(a, b)]()
+        except KeyError:
+            stream = self._int_streams[(a, b)] = chain.from_iterable(self._int_blocks(a, b)).__next__
+            return stream()
+
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
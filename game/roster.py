@@ -0,0 +1,273 @@
+import argparse
+import csv
+import gzip
+import io
+import json
+import random
+import time
+from itertools import groupby, islice
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, TextIO, Tuple
+from game import rng
+from game.battle import Battle
+from game.characters import BOSS_MULTIPLIERS, Boss
+from game.core import Character
+from game.exceptions import GameException
+from game.simulation import CHARACTER_CLASSES, DEFAULT_LIMITS, Scenario
+from game.stats import StatsAggregator
+from game.tracing import TraceSampler
+
+# --- Потоковая загрузка больших наборов сценариев ---
+# Составы читаются из файла лениво, по одной записи, проверяются по тем же
+# правилам, что и ввод в main.create_party / main.configure_boss (в пати 3-4
+# героя уровней 1-10, босс уровня 5-20), и отдаются симулятору пачками уже
+# созданных персонажей. В памяти одновременно только текущая пачка, поэтому
+# объем памяти не зависит от числа сценариев в файле.
+#
+# Форматы (.gz распознается по содержимому):
+#   JSONL - сценарий на строку, как Scenario.to_dict, плюс необязательный seed:
+#     {"party": [["Warrior", "Артур", 5], ...], "boss": ["Дракон Урлог", 10], "seed": 1}
+#     (участник пати может быть и объектом {"class": ..., "name": ..., "level": ...});
+#   CSV - строка на участника, строки одного сценария идут подряд:
+#     scenario,class,name,level[,seed]; у босса class = Boss.
+
+PARTY_SIZE = (3, 4)
+HERO_LEVELS = (1, 10)
+BOSS_LEVELS = (5, 20)
+DEFAULT_BOSS_NAME = "Дракон Урлог"
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class RosterError(GameException):
+    """Запись файла составов не прошла проверку."""
+
+    def __init__(self, message: str, line: Optional[int] = None):
+        super().__init__(f"строка {line}: {message}" if line is not None else message)
+        self.line = line
+
+
+class RosterEntry:
+    """Проверенный сценарий из файла: состав, seed (если задан) и номер строки."""
+
+    def __init__(self, scenario: Scenario, seed: Optional[int], line: int):
+        self.scenario = scenario
+        self.seed = seed
+        self.line = line
+
+    def __repr__(self) -> str:
+        return f"RosterEntry({self.scenario!r}, seed={self.seed!r}, line={self.line})"
+
+
+def _open_rows(path: str) -> TextIO:
+    with open(path, "rb") as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    raw = gzip.open(path, "rb") if compressed else open(path, "rb")
+    return io.TextIOWrapper(io.BufferedReader(raw, 1 << 16), encoding="utf-8", newline="")
+
+
+def _integer(value: Any, what: str, line: int, text: bool = False) -> int:
+    """Целое: int, но не bool (7.9 и true не принимаются); text=True - строка CSV с целым числом."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if text and isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise RosterError(f"{what} должен быть целым числом, а не {value!r}", line)
+
+
+def _name(value: Any, default: str, what: str, line: int) -> str:
+    if value is not None and not isinstance(value, str):
+        raise RosterError(f"имя {what} должно быть строкой, а не {value!r}", line)
+    return (value or "").strip() or default
+
+
+def _level(value: Any, bounds: Tuple[int, int], what: str, line: int, text: bool) -> int:
+    level = _integer(value, f"уровень {what}", line, text)
+    low, high = bounds
+    if not low <= level <= high:
+        raise RosterError(f"уровень {what} {level} вне диапазона {low}-{high}", line)
+    return level
+
+
+def validate(party: List[Tuple[str, str, Any]], boss: Tuple[str, Any], line: int,
+             boss_multipliers: Optional[Dict[str, Any]] = None, text: bool = False) -> Scenario:
+    """Проверяет состав по правилам main.create_party / main.configure_boss; пустые имена - по умолчанию.
+
+    boss_multipliers - необязательные множители характеристик босса (ключи из BOSS_MULTIPLIERS);
+    text=True - уровни заданы строками (CSV).
+    """
+    if not isinstance(boss, (list, tuple)) or len(boss) != 2:
+        raise RosterError(f"босс {boss!r}: нужен [имя, уровень]", line)
+    low, high = PARTY_SIZE
+    if not low <= len(party) <= high:
+        raise RosterError(f"в пати {len(party)} персонажей, нужно {low}-{high}", line)
+    members = []
+    for i, (class_name, name, level) in enumerate(party):
+        if not isinstance(class_name, str) or class_name not in CHARACTER_CLASSES:
+            raise RosterError(f"неизвестный класс {class_name!r} (есть {', '.join(CHARACTER_CLASSES)})", line)
+        name = _name(name, f"Герой {i + 1}", "героя", line)
+        members.append((class_name, name, _level(level, HERO_LEVELS, name, line, text)))
+    boss_name = _name(boss[0], DEFAULT_BOSS_NAME, "босса", line)
+    boss_level = _level(boss[1], BOSS_LEVELS, "босса", line, text)
+    if boss_multipliers:
+        if not isinstance(boss_multipliers, dict):
+            raise RosterError(f"boss_multipliers {boss_multipliers!r}: нужен объект", line)
+        unknown = set(boss_multipliers) - set(BOSS_MULTIPLIERS)
+        if unknown:
+            raise RosterError(f"неизвестные множители босса {', '.join(sorted(map(str, unknown)))} "
+                              f"(есть {', '.join(BOSS_MULTIPLIERS)})", line)
+        for key, value in boss_multipliers.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+                raise RosterError(f"множитель босса {key} должен быть положительным числом, а не {value!r}", line)
+    return Scenario(members, (boss_name, boss_level), boss_multipliers)
+
+
+def _member(value: Any, line: int) -> Tuple[str, str, Any]:
+    if isinstance(value, dict):
+        return value.get('class'), value.get('name'), value.get('level')
+    if isinstance(value, (list, tuple)) and len(value) == 3:
+        return tuple(value)
+    raise RosterError(f"участник пати {value!r}: нужен [класс, имя, уровень]", line)
+
+
+def _jsonl_entries(f: TextIO) -> Iterator[RosterEntry]:
+    for line, text in enumerate(f, 1):
+        if not text.strip():
+            continue
+        try:
+            data = json.loads(text)
+            party = [_member(value, line) for value in data['party']]
+            boss = data.get('boss', (DEFAULT_BOSS_NAME, None))
+            if isinstance(boss, dict):
+                boss = (boss.get('name'), boss.get('level'))
+            scenario = validate(party, boss, line, data.get('boss_multipliers'))
+            seed = data.get('seed')
+            yield RosterEntry(scenario, None if seed is None else _integer(seed, "seed", line), line)
+        except RosterError as error:
+            yield error
+        except (ValueError, KeyError, TypeError) as error:
+            yield RosterError(f"некорректная запись: {error}", line)
+
+
+def _csv_entries(f: TextIO) -> Iterator[RosterEntry]:
+    reader = csv.DictReader(f)
+    missing = {'scenario', 'class', 'level'} - set(reader.fieldnames or ())
+    if missing:
+        yield RosterError(f"в заголовке CSV нет колонок {', '.join(sorted(missing))}", 1)
+        return
+    # Номер строки файла - reader.line_num в момент чтения записи
+    rows = ((reader.line_num, row) for row in reader)
+    for _, group in groupby(rows, key=lambda item: item[1]['scenario']):
+        group = list(group)  # строки одного сценария: 4-5 записей
+        line = group[0][0]
+        try:
+            party = []
+            bosses = []
+            seed = None
+            for _, row in group:
+                if (row.get('class') or '').strip() == 'Boss':
+                    bosses.append((row.get('name'), row.get('level')))
+                else:
+                    party.append(((row.get('class') or '').strip(), row.get('name'), row.get('level')))
+                if row.get('seed'):
+                    seed = _integer(row['seed'], "seed", line, text=True)
+            if len(bosses) != 1:
+                raise RosterError(f"у сценария {group[0][1]['scenario']!r} {len(bosses)} боссов, нужен один", line)
+            yield RosterEntry(validate(party, bosses[0], line, text=True), seed, line)
+        except RosterError as error:
+            yield error
+        except ValueError as error:
+            yield RosterError(f"некорректная запись: {error}", line)
+
+
+def iter_roster(path: str, fmt: Optional[str] = None, errors: str = "raise",
+                on_error: Optional[Callable[[RosterError], None]] = None) -> Iterator[RosterEntry]:
+    """Лениво читает сценарии из файла.
+
+    fmt - "jsonl" или "csv" (по умолчанию - по расширению). errors="skip" пропускает
+    записи с ошибками, передавая их в on_error (если задан), "raise" - бросает RosterError.
+    """
+    if errors not in ("raise", "skip"):
+        raise ValueError("errors должен быть 'raise' или 'skip'")
+    if fmt is None:
+        name = path[:-3] if path.endswith(".gz") else path
+        fmt = "csv" if name.endswith(".csv") else "jsonl"
+    reader = {'jsonl': _jsonl_entries, 'csv': _csv_entries}[fmt]
+    with _open_rows(path) as f:
+        for entry in reader(f):
+            if isinstance(entry, RosterError):
+                if errors == "raise":
+                    raise entry
+                if on_error is not None:
+                    on_error(entry)
+                continue
+            yield entry
+
+
+def iter_batches(entries: Iterable[RosterEntry],
+                 batch_size: int = 256) -> Iterator[List[Tuple[RosterEntry, List[Character], Boss]]]:
+    """Пачки по batch_size: (запись, созданные герои, созданный босс)."""
+    entries = iter(entries)
+    while True:
+        batch = [(entry,) + entry.scenario.build() for entry in islice(entries, batch_size)]
+        if not batch:
+            return
+        yield batch
+
+
+def simulate_roster(path: str, fmt: Optional[str] = None, batch_size: int = 256, base_seed: int = 0,
+                    errors: str = "skip", limits=DEFAULT_LIMITS) -> Dict[str, Any]:
+    """Проводит по бою на каждый сценарий файла; итоги копятся в потоковой статистике.
+
+    Seed боя - из записи, если задан, иначе base_seed + номер сценария.
+    """
+    rejected = {'count': 0, 'first': []}  # храним только первые ошибки - память не растет
+
+    def reject(error: RosterError):
+        rejected['count'] += 1
+        if len(rejected['first']) < 20:
+            rejected['first'].append(str(error))
+
+    stats = StatsAggregator()
+    outcomes: Dict[str, int] = {}
+    trace = TraceSampler()
+    index = 0
+    for batch in iter_batches(iter_roster(path, fmt, errors, reject), batch_size):
+        for entry, party, boss in batch:
+            seed = entry.seed if entry.seed is not None else base_seed + index
+            index += 1
+            battle = Battle(party, boss, verbose=False, trace=trace, limits=limits)
+            with rng.use_source(random.Random(seed)):
+                battle.start()
+            outcomes[battle.outcome] = outcomes.get(battle.outcome, 0) + 1
+            stats.add('rounds', battle.round_number)
+    return {'battles': index, 'outcomes': outcomes, 'rejected': rejected['count'],
+            'errors': rejected['first'], 'stats': stats}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Потоковый прогон сценариев из CSV/JSONL")
+    parser.add_argument("path", help="файл составов (.jsonl, .csv, можно .gz)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), default=None)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strict", action="store_true", help="остановиться на первой ошибке в файле")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = simulate_roster(args.path, args.format, args.batch, args.seed,
+                             errors="raise" if args.strict else "skip")
+    elapsed = time.perf_counter() - started
+    battles = result['battles']
+    rounds = result['stats'].metrics.get('rounds')
+    print(f"сценариев: {battles}, отклонено: {result['rejected']}, {elapsed:.1f} с")
+    if battles:
+        print(f"исходы: {result['outcomes']}, раундов в среднем {rounds.mean:.2f}")
+    for error in result['errors']:
+        print(f"  {error}")
+
+
+if __name__ == "__main__":
+    main()
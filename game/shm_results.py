@@ -0,0 +1,161 @@
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Dict, Any, Optional, Tuple
+from game.simulation import Scenario, run_battle
+from game.tracing import TraceSampler
+
+# --- Итоги боев в разделяемой памяти ---
+# Воркеры пула пишут итог каждого боя записью фиксированного формата прямо в
+# общий блок multiprocessing.shared_memory: запись боя i лежит по смещению
+# i * RECORD_FIELDS * 8 и состоит из int64-полей FIELDS. Номера боев заранее
+# поделены между задачами, поэтому воркеры пишут в непересекающиеся записи
+# без блокировок, а обратно по каналу пула идет только число записанных боев.
+# Родитель читает столбцы через memoryview (срез с шагом) без копирования.
+
+FIELDS = ('seed', 'scenario', 'outcome', 'rounds', 'boss_hp', 'party_hp', 'party_alive')
+RECORD_FIELDS = len(FIELDS)
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+ITEM_SIZE = 8
+
+OUTCOME_CODES = {None: 0, 'victory': 1, 'defeat': 2, 'timeout': 3, 'stalemate': 4}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Подключается к существующему блоку, не регистрируя его в resource_tracker."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # До Python 3.13 нет track=False. Воркеры пула используют трекер родителя,
+        # и повторная регистрация того же имени ничего не меняет
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedResultBuffer:
+    """Массив записей итогов боев в разделяемой памяти.
+
+    Создатель (create=True) владеет блоком и удаляет его в unlink(); воркеры
+    подключаются по имени через attach().
+    """
+
+    def __init__(self, capacity: int, name: Optional[str] = None, create: bool = True):
+        self.capacity = capacity
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                                   size=max(1, capacity) * RECORD_FIELDS * ITEM_SIZE)
+        else:
+            self._shm = _attach(name)
+        self.name = self._shm.name
+        self.owner = create
+        # Новый блок уже заполнен нулями (outcome 0 - запись еще не написана)
+        self._view = self._shm.buf.cast('q')
+
+    @classmethod
+    def attach(cls, name: str, capacity: int) -> 'SharedResultBuffer':
+        return cls(capacity, name, create=False)
+
+    def write(self, index: int, battle, seed: int, scenario_id: int = 0):
+        """Записывает итог завершенного боя в запись index."""
+        base = index * RECORD_FIELDS
+        view = self._view
+        party_hp = 0
+        party_alive = 0
+        for char in battle.party:
+            if char.hp > 0:
+                party_hp += char.hp
+                party_alive += 1
+        view[base] = seed
+        view[base + 1] = scenario_id
+        view[base + 2] = OUTCOME_CODES[battle.outcome]
+        view[base + 3] = battle.round_number
+        view[base + 4] = battle.boss.hp
+        view[base + 5] = party_hp
+        view[base + 6] = party_alive
+
+    def record(self, index: int) -> Dict[str, int]:
+        base = index * RECORD_FIELDS
+        return dict(zip(FIELDS, self._view[base:base + RECORD_FIELDS]))
+
+    def column(self, field: str, count: Optional[int] = None) -> memoryview:
+        """Столбец как memoryview с шагом - без копирования."""
+        count = self.capacity if count is None else count
+        start = FIELD_INDEX[field]
+        return self._view[start:count * RECORD_FIELDS:RECORD_FIELDS]
+
+    def as_array(self):
+        """Записи как массив NumPy формы (capacity, RECORD_FIELDS) поверх того же блока.
+
+        Массив нужно освободить до close(): пока он жив, блок закрыть нельзя.
+        """
+        import numpy as np
+        return np.ndarray((self.capacity, RECORD_FIELDS), dtype=np.int64, buffer=self._shm.buf)
+
+    def summary(self, count: Optional[int] = None) -> Dict[str, float]:
+        count = self.capacity if count is None else count
+        if not count:
+            return {'battles': 0, 'win_rate': 0.0, 'rounds_mean': 0.0, 'timeouts': 0, 'stalemates': 0}
+        counts = [0] * len(OUTCOME_CODES)
+        for code in self.column('outcome', count):
+            counts[code] += 1
+        rounds = self.column('rounds', count)
+        return {'battles': count, 'win_rate': counts[OUTCOME_CODES['victory']] / count,
+                'rounds_mean': sum(rounds) / count, 'timeouts': counts[OUTCOME_CODES['timeout']],
+                'stalemates': counts[OUTCOME_CODES['stalemate']]}
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._shm.close()
+
+    def unlink(self):
+        if self.owner:
+            self._shm.unlink()
+
+    def __enter__(self) -> 'SharedResultBuffer':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        self.unlink()
+
+
+# --- Пул воркеров ---
+
+_worker_buffer: Optional[SharedResultBuffer] = None
+
+
+def _init_worker(name: str, capacity: int):
+    global _worker_buffer
+    _worker_buffer = SharedResultBuffer.attach(name, capacity)
+
+
+def _run_chunk(task: Tuple[Dict[str, Any], int, int, int, int]) -> int:
+    scenario_data, scenario_id, seed_base, start, stop = task
+    scenario = Scenario.from_dict(scenario_data)
+    trace = TraceSampler()  # лог не нужен - итог уходит записью
+    for index in range(start, stop):
+        seed = seed_base + index
+        _worker_buffer.write(index, run_battle(scenario, seed, trace=trace), seed, scenario_id)
+    return stop - start
+
+
+def simulate_shared(scenario: Scenario, battles: int, processes: Optional[int] = None,
+                    base_seed: int = 0, chunk: int = 250, scenario_id: int = 0) -> SharedResultBuffer:
+    """Проводит battles боев пулом процессов; итоги - в возвращаемом буфере.
+
+    Буфер принадлежит вызывающему: по окончании работы нужны close() и unlink()
+    (или with simulate_shared(...) as results).
+    """
+    buffer = SharedResultBuffer(battles)
+    tasks = [(scenario.to_dict(), scenario_id, base_seed, start, min(start + chunk, battles))
+             for start in range(0, battles, chunk)]
+    try:
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(buffer.name, battles)) as pool:
+            written = sum(pool.imap_unordered(_run_chunk, tasks))
+        if written != battles:
+            raise RuntimeError(f"Записано {written} итогов из {battles}")
+    except BaseException:
+        buffer.close()
+        buffer.unlink()
+        raise
+    return buffer
@@ -0,0 +1,102 @@
+import random
+from typing import List, Tuple, Optional, Dict, Any
+from game import rng
+from game.characters import Warrior, Mage, Healer, Boss
+from game.battle import Battle, BattleObserver, BattleLimits
+
+# Классы героев, доступные в сценариях (по имени класса)
+CHARACTER_CLASSES = {
+    'Warrior': Warrior,
+    'Mage': Mage,
+    'Healer': Healer,
+}
+
+# Ограничения боев симуляции: один затянувшийся бой не задерживает весь пакет.
+# Лимит реального времени по умолчанию не задан - он сделал бы итог зависимым от машины.
+DEFAULT_LIMITS = BattleLimits(max_rounds=100, stall_rounds=20)
+
+
+class Scenario:
+    """Описание боя без состояния: состав пати и босс. Из него можно собрать бой заново."""
+
+    def __init__(self, party: List[Tuple[str, str, int]], boss: Tuple[str, int] = ("Дракон Урлог", 5),
+                 boss_multipliers: Optional[Dict[str, float]] = None):
+        # party: [(имя класса, имя персонажа, уровень), ...], boss: (имя, уровень)
+        self.party = [(class_name, name, int(level)) for class_name, name, level in party]
+        self.boss = (boss[0], int(boss[1]))
+        self.boss_multipliers = dict(boss_multipliers) if boss_multipliers else None  # см. Boss.__init__
+
+    def build(self) -> Tuple[list, Boss]:
+        """Создает новых персонажей и босса по описанию."""
+        party = [CHARACTER_CLASSES[class_name](name, level) for class_name, name, level in self.party]
+        boss = Boss(self.boss[0], self.boss[1], self.boss_multipliers)
+        return party, boss
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {'party': [list(member) for member in self.party], 'boss': list(self.boss)}
+        if self.boss_multipliers:
+            data['boss_multipliers'] = dict(self.boss_multipliers)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Scenario':
+        return cls([tuple(member) for member in data['party']], tuple(data['boss']), data.get('boss_multipliers'))
+
+    def __repr__(self) -> str:
+        if self.boss_multipliers:
+            return f"Scenario({self.party!r}, {self.boss!r}, {self.boss_multipliers!r})"
+        return f"Scenario({self.party!r}, {self.boss!r})"
+
+
+def action_skill_name(actor) -> Optional[str]:
+    """Отображаемое имя навыка последнего действия (None - ход пропущен)."""
+    action = actor.last_action
+    if action is None:
+        return None
+    skill = actor.skills.get(action)
+    if skill is None:
+        return getattr(actor, 'basic_attack_name', None) if action == 'attack' else None
+    return skill.name
+
+
+def split_hp_changes(battle: Battle, actor, snapshot: List[Tuple[Any, int]]) -> Tuple[int, int, int]:
+    """Раскладывает изменения HP за ход на (урон, лечение, урон эффектами).
+
+    snapshot - [(участник, HP до хода), ...]. Урон засчитывается действующему лицу,
+    если HP теряет противник; потеря HP своей стороной (яд в конце хода) - урон эффектами.
+    Сторона босса - сам босс и его миньоны.
+    """
+    party = battle.party
+    actor_is_hero = actor in party
+    damage = healing = effect_damage = 0
+    for char, hp_before in snapshot:
+        delta = char.hp - hp_before
+        if delta > 0:
+            healing += delta
+        elif delta < 0:
+            if (char in party) != actor_is_hero:
+                damage -= delta
+            else:
+                effect_damage -= delta
+    return damage, healing, effect_damage
+
+
+def run_battle(scenario: Scenario, seed: Optional[int] = None,
+               observers: Optional[List[BattleObserver]] = None, source=None, trace=None,
+               metrics=None, limits: Optional[BattleLimits] = DEFAULT_LIMITS, events=None) -> Battle:
+    """Проводит один бой без вывода на экран и возвращает завершенный Battle.
+
+    Каждый бой получает собственный генератор random.Random(seed), поэтому результат
+    зависит только от сценария и seed. Вместо генератора можно передать готовый source,
+    trace (TraceSampler) решает, писать ли лог этого боя, metrics (BattleMetrics) - куда писать метрики.
+    limits (BattleLimits) прерывает затянувшийся бой исходом "timeout" или "stalemate";
+    None - без ограничений. events (EventBus) - подписчики на события боя.
+    """
+    if source is None:
+        source = random.Random(seed)
+    party, boss = scenario.build()
+    battle = Battle(party, boss, observers=observers, verbose=False, trace=trace, metrics=metrics,
+                    limits=limits, events=events)
+    with rng.use_source(source):
+        battle.start()
+    return battle
@@ -0,0 +1,301 @@
+import inspect
+import json
+import os
+from typing import Dict, Any, List, Callable, Optional, Sequence
+from game import rng
+from game.core import Character, CritMixin, notify_state
+from game.skills import Skill, PoisonEffect, ShieldEffect, EFFECT_POOL
+from game.exceptions import NotEnoughMPError, InvalidTargetError
+
+# --- Декларативные навыки ---
+# Навык описывается записью таблицы (game/data/skills.json): стоимость, кулдаун,
+# форма цели (single - одна цель, all - все переданные цели, self - на себя),
+# формула величины (характеристика * multiplier // divisor + randint(roll)),
+# шанс и вид срабатывания (proc), постоянные эффекты и шаблоны сообщений.
+# CompiledSkill один раз превращает запись в специализированную
+# функцию resolve(user, targets) для объектного движка и в ядро resolve_batch
+# для пакетных движков (массивы значений характеристики и бросков). Оба пути
+# считают величину одной скомпилированной формулой formula. Порядок бросков
+# совпадает с прежними ручными реализациями навыков.
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'skills.json')
+
+TARGET_SHAPES = ('single', 'all', 'self')
+KINDS = ('damage', 'heal', 'none', 'summon')
+
+EFFECT_FACTORIES = {
+    'poison': PoisonEffect,
+    'shield': ShieldEffect,
+}
+
+DEAD_TARGET_MESSAGE = "Нельзя атаковать мертвого персонажа!"
+DEFAULT_MP_ERROR = "Не хватает маны для использования {name}."
+
+
+def load_skill_table(path: str = DEFAULT_TABLE_PATH) -> Dict[str, Dict[str, Any]]:
+    """Читает таблицу навыков из JSON-файла и проверяет записи."""
+    with open(path, encoding='utf-8') as f:
+        table = json.load(f)
+    for skill_id, spec in table.items():
+        validate_spec(skill_id, spec)
+    return table
+
+
+def validate_spec(skill_id: str, spec: Dict[str, Any]):
+    """Проверяет запись таблицы; бросает ValueError с именем навыка."""
+    for field in ('name', 'mp_cost', 'cooldown', 'target', 'kind', 'messages'):
+        if field not in spec:
+            raise ValueError(f"Навык {skill_id}: нет поля {field}")
+    if spec['target'] not in TARGET_SHAPES:
+        raise ValueError(f"Навык {skill_id}: неизвестная форма цели {spec['target']}")
+    if spec['kind'] not in KINDS:
+        raise ValueError(f"Навык {skill_id}: неизвестный вид {spec['kind']}")
+    if spec['kind'] in ('damage', 'heal', 'summon') and 'roll' not in spec.get('amount', {}):
+        raise ValueError(f"Навык {skill_id}: для вида {spec['kind']} нужна формула amount.roll")
+    if 'hit' not in spec['messages']:
+        raise ValueError(f"Навык {skill_id}: нет шаблона сообщения hit")
+    for block in ('proc', 'apply'):
+        effect = spec.get(block, {}).get('effect')
+        if effect is not None and effect not in EFFECT_FACTORIES and effect not in ('stun', 'debuff'):
+            raise ValueError(f"Навык {skill_id}: неизвестный эффект {effect}")
+
+
+def _add_effect(target: Character, effect) -> str:
+    target.active_effects.append(effect)
+    notify_state(target, 'effects')
+    if target._events is not None:
+        target._events.effect_applied(target, effect.name, effect)
+    return effect.apply_start_effect(target)
+
+
+def _compile_debuff(stats: Dict[str, int]) -> Callable[[Character], None]:
+    items = tuple(stats.items())
+
+    def debuff(target: Character):
+        for stat, delta in items:
+            setattr(target, stat, max(1, getattr(target, stat) + delta))
+    return debuff
+
+
+def _compile_effect(block: Optional[Dict[str, Any]]) -> Optional[Callable[[Character], str]]:
+    """Функция наложения эффекта цели; возвращает текст наложения (или '')."""
+    if block is None:
+        return None
+    effect = block['effect']
+    params = block.get('params', {})
+    if effect == 'stun':
+        def apply(target: Character) -> str:
+            target.stunned = True
+            notify_state(target, 'stunned')
+            if target._events is not None:
+                target._events.effect_applied(target, 'stun')
+            return ""
+    elif effect == 'debuff':
+        debuff = _compile_debuff(params)
+
+        def apply(target: Character) -> str:
+            debuff(target)
+            return ""
+    else:
+        factory = EFFECT_FACTORIES[effect]
+        # Параметры связываются с сигнатурой один раз; эффект берется из пула
+        args = inspect.signature(factory).bind(**params).args
+        acquire = EFFECT_POOL.acquire
+
+        def apply(target: Character) -> str:
+            return _add_effect(target, acquire(factory, *args))
+    return apply
+
+
+class CompiledSkill:
+    """Скомпилированная запись таблицы навыков.
+
+    resolve(user, targets) - применение навыка; targets - последовательность целей
+    (одиночному навыку нужна первая);
+    resolve_batch(stat_values, rolls) - величины для пачки применений (числа или массивы NumPy);
+    formula(stat_value, roll) - общая формула величины обоих путей.
+    """
+
+    def __init__(self, skill_id: str, spec: Dict[str, Any]):
+        validate_spec(skill_id, spec)
+        self.skill_id = skill_id
+        self.spec = spec
+        self.name = spec['name']
+        self.mp_cost = spec['mp_cost']
+        self.cooldown = spec['cooldown']
+        self.target_shape = spec['target']
+        self.kind = spec['kind']
+        amount = spec.get('amount', {})
+        self.stat: Optional[str] = amount.get('stat')
+        self.multiplier = amount.get('multiplier', 1)
+        self.divisor = amount.get('divisor', 1)
+        self.roll = tuple(amount['roll']) if 'roll' in amount else None
+        self.hits = spec.get('hits', 1)
+        self.proc_chance = spec.get('proc', {}).get('chance', 0.0)
+        self.formula: Optional[Callable[[Any, Any], Any]] = self._compile_formula() if self.roll else None
+        self.resolve: Callable[[Character, Sequence[Character]], str] = self._compile()
+
+    def resolve_batch(self, stat_values, rolls):
+        """Величины пачки применений: (величина удара, итог по цели).
+
+        stat_values и rolls - числа или массивы NumPy одной длины (броски - см. draw_rolls).
+        Итог урона учитывает hits (цель теряет величину hits раз). Криты, шансы
+        срабатывания и эффекты остаются за движком.
+        """
+        if self.formula is None:
+            raise ValueError(f"Навык {self.skill_id}: нет формулы величины")
+        amount = self.formula(stat_values, rolls)
+        return amount, amount * self.hits if self.kind == 'damage' else amount
+
+    def draw_rolls(self, generator, size: int):
+        """size бросков из numpy.random.Generator в диапазоне roll (включая границы)."""
+        low, high = self.roll
+        return generator.integers(low, high + 1, size)
+
+    def _compile_formula(self) -> Callable[[Any, Any], Any]:
+        multiplier, divisor = self.multiplier, self.divisor
+        if self.stat is None:
+            return lambda stat_value, roll: roll
+        if multiplier == 1 and divisor == 1:
+            return lambda stat_value, roll: stat_value + roll
+        return lambda stat_value, roll: stat_value * multiplier // divisor + roll
+
+    def _compile_roll(self) -> Callable[[Character], int]:
+        stat, formula = self.stat, self.formula
+        low, high = self.roll
+        if stat is None:
+            return lambda user: formula(0, rng.randint(low, high))
+        return lambda user: formula(getattr(user, stat), rng.randint(low, high))
+
+    def _compile(self) -> Callable[[Character, Sequence[Character]], str]:
+        if self.kind == 'summon':
+            return self._compile_summon()
+        if self.target_shape == 'all':
+            return self._compile_area()
+        return self._compile_single()
+
+    def _compile_summon(self) -> Callable[[Character, Sequence[Character]], str]:
+        roll = self._compile_roll()
+        hit = self.spec['messages']['hit']
+
+        def resolve(user: Character, targets: Sequence[Character]) -> str:
+            count = roll(user)
+            user.summon_minions(count)
+            return hit.format(user=user.name, amount=count)
+        return resolve
+
+    def _compile_single(self) -> Callable[[Character, Sequence[Character]], str]:
+        spec = self.spec
+        messages = spec['messages']
+        name, mp_cost, hits = self.name, self.mp_cost, self.hits
+        check_alive = spec.get('check_alive', False)
+        charge_mp = spec.get('charge_mp', False)
+        mp_error = messages.get('mp_error', DEFAULT_MP_ERROR).format(name=name, mp_cost=mp_cost)
+        hit, crit_message, proc_message = messages['hit'], messages.get('crit'), messages.get('proc')
+        kind = self.kind
+        roll = self._compile_roll() if self.roll else None
+        can_crit = spec.get('crit', False)
+        proc_chance = self.proc_chance
+        proc = _compile_effect(spec.get('proc'))
+        apply = _compile_effect(spec.get('apply'))
+        debuff = _compile_debuff(spec['debuff']) if 'debuff' in spec else None
+
+        def resolve(user: Character, targets: Sequence[Character]) -> str:
+            target = targets[0]
+            if check_alive and not target.is_alive:
+                raise InvalidTargetError(DEAD_TARGET_MESSAGE)
+            if charge_mp:
+                if user.mp < mp_cost:
+                    raise NotEnoughMPError(mp_error)
+                user.mp -= mp_cost
+            template = hit
+            amount = 0
+            if roll is not None:
+                amount = roll(user)
+                if can_crit and isinstance(user, CritMixin) and user._check_crit():
+                    amount = int(amount * user.crit_multiplier)
+                    template = crit_message
+                if kind == 'damage':
+                    for _ in range(hits):
+                        target.hp -= amount
+                elif kind == 'heal':
+                    target.hp += amount
+            effect_text = ""
+            if apply is not None:
+                effect_text = apply(target)
+            if proc is not None and rng.random() < proc_chance:
+                effect_text = proc(target)
+                template = proc_message
+            if debuff is not None:
+                debuff(target)
+            return template.format(user=user.name, target=target.name, amount=amount,
+                                   total=amount * hits, hits=hits, effect=effect_text)
+        return resolve
+
+    def _compile_area(self) -> Callable[[Character, Sequence[Character]], str]:
+        spec = self.spec
+        messages = spec['messages']
+        prefix, suffix = messages.get('prefix', ""), messages.get('suffix', "")
+        hit, proc_message = messages['hit'], messages.get('proc')
+        kind = self.kind
+        roll = self._compile_roll() if self.roll else None
+        proc_chance = self.proc_chance
+        proc = _compile_effect(spec.get('proc'))
+        apply = _compile_effect(spec.get('apply'))
+        debuff = _compile_debuff(spec['debuff']) if 'debuff' in spec else None
+
+        def resolve(user: Character, targets: Sequence[Character]) -> str:
+            results = []
+            for target in targets:
+                amount = 0
+                if roll is not None:
+                    amount = roll(user)
+                    if kind == 'damage':
+                        target.hp -= amount
+                    elif kind == 'heal':
+                        target.hp += amount
+                results.append(hit.format(target=target.name, amount=amount))
+                if apply is not None:
+                    apply(target)
+                if proc is not None and rng.random() < proc_chance:
+                    proc(target)
+                    results.append(proc_message)
+                if debuff is not None:
+                    debuff(target)
+            return prefix.format(user=user.name) + ". ".join(results) + suffix
+        return resolve
+
+
+def compile_table(table: Dict[str, Dict[str, Any]]) -> Dict[str, CompiledSkill]:
+    return {skill_id: CompiledSkill(skill_id, spec) for skill_id, spec in table.items()}
+
+
+# Таблица по умолчанию компилируется один раз при импорте
+COMPILED_SKILLS: Dict[str, CompiledSkill] = compile_table(load_skill_table())
+
+
+def register_skill(skill_id: str, spec: Dict[str, Any]) -> CompiledSkill:
+    """Компилирует и регистрирует новый навык (например, из модов или тестов баланса)."""
+    compiled = COMPILED_SKILLS[skill_id] = CompiledSkill(skill_id, spec)
+    return compiled
+
+
+class SpecSkill(Skill):
+    """Навык, поведение которого задано записью таблицы навыков."""
+    spec_id: str = ""
+
+    def __init__(self, spec_id: Optional[str] = None):
+        compiled = COMPILED_SKILLS[spec_id or self.spec_id]
+        super().__init__(name=compiled.name, mp_cost=compiled.mp_cost, cooldown=compiled.cooldown)
+        self.compiled = compiled
+        self.target_shape = compiled.target_shape
+        self._resolve = compiled.resolve
+
+    def use(self, user: Character, target: Character) -> str:
+        # Свой кортеж на каждый вызов: навык можно применить повторно изнутри применения
+        # (например, из подписчика on_damage) и из разных потоков
+        return self._resolve(user, (target,))
+
+    def use_on(self, user: Character, targets: List[Character]) -> str:
+        """Применение к списку целей (для навыков по площади)."""
+        return self._resolve(user, targets)
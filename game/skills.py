@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, List, Dict
 from game.exceptions import InvalidTargetError, CharacterDeadError
 
 if TYPE_CHECKING:
@@ -13,6 +13,11 @@ class Effect(ABC):
         self.duration = duration
         self.remaining_duration = duration
 
+    def reset(self, duration: int):
+        """Возвращает эффект в исходное состояние для повторного использования из пула."""
+        self.duration = duration
+        self.remaining_duration = duration
+
     @abstractmethod
     def apply_start_effect(self, target: 'Character') -> str:
         """Применяется при наложении эффекта."""
@@ -46,6 +51,10 @@ class PoisonEffect(Effect):
         super().__init__("Poison", duration)
         self.damage_per_turn = damage_per_turn
 
+    def reset(self, damage_per_turn: int, duration: int):
+        super().reset(duration)
+        self.damage_per_turn = damage_per_turn
+
     def apply_start_effect(self, target: 'Character') -> str:
         return f"{target.name} отравлен! Будет терять {self.damage_per_turn} HP за ход."
 
@@ -66,6 +75,11 @@ class ShieldEffect(Effect):
         self.shield_strength = shield_strength
         self.initial_strength = shield_strength
 
+    def reset(self, shield_strength: int, duration: int):
+        super().reset(duration)
+        self.shield_strength = shield_strength
+        self.initial_strength = shield_strength
+
     def apply_start_effect(self, target: 'Character') -> str:
         return f"{target.name} получает щит, поглощающий {self.shield_strength} урона."
 
@@ -88,6 +102,36 @@ class ShieldEffect(Effect):
             return remaining_damage
 
 
+class EffectPool:
+    """Пул эффектов: истекшие эффекты возвращаются сюда и переиспользуются через reset()."""
+
+    def __init__(self):
+        self._free: Dict[type, List[Effect]] = {}
+
+    def acquire(self, effect_class: type, *args) -> Effect:
+        """Берет свободный эффект класса effect_class (или создает новый) с параметрами args."""
+        free = self._free.get(effect_class)
+        if free:
+            effect = free.pop()
+            effect.reset(*args)
+            return effect
+        return effect_class(*args)
+
+    def release(self, effect: Effect):
+        """Возвращает эффект в пул. Эффект не должен больше висеть ни на одном персонаже."""
+        free = self._free.get(type(effect))
+        if free is None:
+            free = self._free[type(effect)] = []
+        free.append(effect)
+
+    def free_count(self) -> int:
+        return sum(len(free) for free in self._free.values())
+
+
+# Общий пул процесса: эффекты создают навыки, а возвращает EffectManager
+EFFECT_POOL = EffectPool()
+
+
 # --- Базовый класс для навыков ---
 class Skill(ABC):
     """Абстрактный базовый класс для навыков персонажей."""
@@ -0,0 +1,220 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Callable, Dict, Any, Hashable, List, Tuple
+from game.battle import Battle
+
+# --- Хеш состояния боя и таблица транспозиций ---
+# Состояние боя раскладывается на компоненты (слот участника, часть состояния):
+# HP/MP/характеристики, кулдаун каждого навыка, набор активных эффектов, оглушение.
+# Каждой паре (компонент, значение) соответствует 64-битный ключ Зобриста, хеш
+# состояния - сумма ключей по модулю 2**64 (сумма, а не XOR: два одинаковых
+# эффекта на персонаже не должны взаимно уничтожаться). Персонажи сообщают об
+# изменениях через _state_watcher (BoundedStat, кулдауны, эффекты, оглушение), и
+# хешер заменяет ключ одного компонента - O(1) на изменение. Фаза босса, состав
+# миньонов и позиция в очереди ходов читаются при вызове digest().
+# Хеш зависит только от состояния, поэтому одно и то же состояние, полученное
+# разными последовательностями действий, дает один ключ таблицы транспозиций.
+
+MASK = (1 << 64) - 1
+STATS = ('hp', 'mp', 'strength', 'agility', 'intellect')
+
+_KEYS: Dict[Tuple, int] = {}
+
+
+def zobrist_key(*parts: Hashable) -> int:
+    """Ключ Зобриста для набора частей; одинаков во всех процессах (не зависит от PYTHONHASHSEED)."""
+    key = _KEYS.get(parts)
+    if key is None:
+        digest = blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+        key = _KEYS[parts] = int.from_bytes(digest, "little")
+    return key
+
+
+def effect_state(effect) -> Tuple:
+    """Состояние эффекта: класс и все поля (длительность, сила яда или щита)."""
+    return (type(effect).__name__,) + tuple(sorted(vars(effect).items()))
+
+
+def read_component(char, component) -> Hashable:
+    """Текущее значение компонента состояния участника."""
+    if component.__class__ is tuple:  # ('cooldown', навык)
+        return char._cooldowns.get(component[1], 0)
+    if component == 'effects':
+        return tuple(sorted(effect_state(effect) for effect in getattr(char, 'active_effects', ())))
+    if component == 'stunned':
+        return bool(getattr(char, 'stunned', False))
+    return getattr(char, component)
+
+
+def _components(char) -> List:
+    components = list(STATS)
+    components.append('effects')
+    components.append('stunned')
+    for skill_name in getattr(char, 'skills', {}):
+        components.append(('cooldown', skill_name))
+    return components
+
+
+class StateHasher:
+    """Инкрементальный хеш состояния боя.
+
+    Пока хешер подключен (attach), участники боя сообщают ему об изменениях.
+    К одному участнику одновременно подключен только один хешер.
+    """
+
+    def __init__(self, battle: Battle, attach: bool = True):
+        self.battle = battle
+        self.value = 0  # сумма ключей компонентов участников
+        self._parts: Dict[Tuple[Hashable, Any], int] = {}
+        self._slots: Dict[int, Hashable] = {}  # id(участника) -> слот
+        self._minions: List = []
+        self._minion_version = None
+        if attach:
+            self.attach()
+
+    def attach(self):
+        battle = self.battle
+        for index, char in enumerate(battle.party):
+            self._register(char, ('party', index))
+        self._register(battle.boss, ('boss',))
+        self._sync_minions()
+
+    def detach(self):
+        for char in self.battle.party:
+            char._state_watcher = None
+        self.battle.boss._state_watcher = None
+        self._release_minions()
+        self._slots.clear()
+        self._parts.clear()
+        self.value = 0
+        self._minion_version = None
+
+    def _register(self, char, slot: Hashable):
+        if hasattr(char, 'pool'):
+            char.pool.watchers[char.slot] = self  # миньон: наблюдатель хранится в пуле
+        else:
+            char._state_watcher = self
+        self._slots[id(char)] = slot
+        for component in _components(char):
+            self._set(slot, component, read_component(char, component))
+
+    def _release_minions(self):
+        for minion in self._minions:
+            if minion.pool.watchers[minion.slot] is self:
+                minion.pool.watchers[minion.slot] = None
+            slot = self._slots.pop(id(minion), None)
+            for component in _components(minion):
+                self.value = (self.value - self._parts.pop((slot, component), 0)) & MASK
+        self._minions = []
+
+    def _sync_minions(self):
+        boss = self.battle.boss
+        version = getattr(boss, 'minion_version', 0)
+        if version == self._minion_version:
+            return
+        self._minion_version = version
+        self._release_minions()
+        self._minions = list(getattr(boss, 'minions', ()))
+        for index, minion in enumerate(self._minions):
+            self._register(minion, ('minion', index))
+
+    def _set(self, slot: Hashable, component, value: Hashable):
+        key = zobrist_key(slot, component, value)
+        old = self._parts.get((slot, component), 0)
+        self._parts[(slot, component)] = key
+        self.value = (self.value - old + key) & MASK
+
+    def changed(self, char, component):
+        """Вызывается участником после изменения компонента состояния."""
+        slot = self._slots.get(id(char))
+        if slot is not None:
+            self._set(slot, component, read_component(char, component))
+
+    def digest(self) -> int:
+        """64-битный хеш текущего состояния боя."""
+        self._sync_minions()
+        battle = self.battle
+        turn_order = battle.turn_order
+        value = self.value
+        value += zobrist_key('phase', getattr(battle.boss, 'phase', 0))
+        value += zobrist_key('turn', turn_order.index, len(turn_order.participants))
+        return value & MASK
+
+    def recompute(self) -> int:
+        """Хеш, посчитанный с нуля по текущему состоянию (для проверки инкрементального)."""
+        battle = self.battle
+        value = 0
+        participants = [(char, ('party', i)) for i, char in enumerate(battle.party)]
+        participants.append((battle.boss, ('boss',)))
+        for index, minion in enumerate(getattr(battle.boss, 'minions', ())):
+            participants.append((minion, ('minion', index)))
+        for char, slot in participants:
+            for component in _components(char):
+                value += zobrist_key(slot, component, read_component(char, component))
+        value += zobrist_key('phase', getattr(battle.boss, 'phase', 0))
+        value += zobrist_key('turn', battle.turn_order.index, len(battle.turn_order.participants))
+        return value & MASK
+
+
+class TranspositionCache:
+    """Ограниченная LRU-таблица транспозиций: хеш состояния -> оценка.
+
+    Общая для ИИ с просмотром вперед и точных решателей: состояние, уже
+    оцененное через другой порядок действий, берется из таблицы.
+    """
+
+    def __init__(self, maxsize: int = 1 << 16):
+        if maxsize < 1:
+            raise ValueError("maxsize должен быть положительным")
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[int, Any]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: int, default: Any = None) -> Any:
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: int, value: Any):
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key: int, compute: Callable[[], Any]) -> Any:
+        """Значение из таблицы или compute() (результат запоминается)."""
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            self.hits += 1
+            return entries[key]
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {'size': len(self._entries), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'evictions': self.evictions, 'hit_rate': self.hit_rate}
@@ -0,0 +1,245 @@
+import math
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+from game.battle import Battle, BattleObserver
+from game.simulation import action_skill_name, split_hp_changes
+
+# --- Потоковая статистика боев с ограниченной памятью ---
+# Для каждой метрики хранится RunningStats: количество, среднее и дисперсия
+# (алгоритм Уэлфорда) и t-digest для приближенных квантилей. Размер эскиза
+# не зависит от числа наблюдений, а эскизы разных воркеров сливаются без потерь
+# для среднего/дисперсии и с малой ошибкой для квантилей.
+
+
+class TDigest:
+    """Сливаемый t-digest (Dunning) с масштабной функцией k1.
+
+    compression - примерное число центроидов; ошибка квантилей меньше на хвостах.
+    """
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self._centroids: List[Tuple[float, float]] = []  # (среднее, вес), по возрастанию среднего
+        self._buffer: List[Tuple[float, float]] = []
+        self._buffer_limit = int(compression * 5)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0):
+        self._buffer.append((value, weight))
+        self.count += weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: 'TDigest'):
+        """Добавляет центроиды другого эскиза."""
+        other._compress()
+        self._buffer.extend(other._centroids)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k_to_q(self, k: float) -> float:
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _q_to_k(self, q: float) -> float:
+        return self.compression * math.asin(2 * q - 1) / (2 * math.pi)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+        merged = []
+        weight_so_far = 0.0
+        current_mean, current_weight = points[0]
+        q_limit = self._k_to_q(self._q_to_k(0.0) + 1)
+        for mean, weight in points[1:]:
+            if (weight_so_far + current_weight + weight) / total <= q_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+            else:
+                merged.append((current_mean, current_weight))
+                weight_so_far += current_weight
+                q_limit = self._k_to_q(self._q_to_k(min(1.0, weight_so_far / total)) + 1)
+                current_mean, current_weight = mean, weight
+        merged.append((current_mean, current_weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> float:
+        """Приближенный квантиль q из [0, 1]; nan для пустого эскиза."""
+        self._compress()
+        centroids = self._centroids
+        if not centroids:
+            return math.nan
+        if len(centroids) == 1:
+            return centroids[0][0]
+        target = q * self.count
+        cumulative = 0.0
+        previous_center, previous_mean = 0.0, self.min
+        for mean, weight in centroids:
+            center = cumulative + weight / 2
+            if target <= center:
+                if center == previous_center:
+                    return mean
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        if self.count == previous_center:
+            return self.max
+        fraction = (target - previous_center) / (self.count - previous_center)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+    def to_dict(self) -> Dict[str, Any]:
+        self._compress()
+        return {'compression': self.compression, 'centroids': self._centroids,
+                'count': self.count, 'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TDigest':
+        digest = cls(data['compression'])
+        digest._centroids = [tuple(c) for c in data['centroids']]
+        digest.count = data['count']
+        digest.min = data['min']
+        digest.max = data['max']
+        return digest
+
+
+class RunningStats:
+    """Количество, среднее, дисперсия и квантили одной метрики."""
+
+    def __init__(self, compression: float = 100):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.digest = TDigest(compression)
+
+    def add(self, value: float):
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (value - self.mean)
+        self.digest.add(value)
+
+    def merge(self, other: 'RunningStats'):
+        """Сливает статистику другого воркера (формула Чана для дисперсии)."""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.digest.merge(other.digest)
+
+    @property
+    def variance(self) -> float:
+        """Выборочная дисперсия (0 для менее чем двух наблюдений)."""
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def quantile(self, q: float) -> float:
+        return self.digest.quantile(q)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'n': self.n, 'mean': self.mean, 'm2': self._m2, 'digest': self.digest.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        stats = cls()
+        stats.n = data['n']
+        stats.mean = data['mean']
+        stats._m2 = data['m2']
+        stats.digest = TDigest.from_dict(data['digest'])
+        return stats
+
+
+class StatsAggregator:
+    """Набор потоковых метрик по именам. Эскизы воркеров сливаются через merge()."""
+
+    def __init__(self, compression: float = 100):
+        self.compression = compression
+        self.metrics: Dict[str, RunningStats] = {}
+
+    def add(self, metric: str, value: float):
+        stats = self.metrics.get(metric)
+        if stats is None:
+            stats = self.metrics[metric] = RunningStats(self.compression)
+        stats.add(value)
+
+    def merge(self, other: 'StatsAggregator'):
+        for metric, stats in other.metrics.items():
+            if metric not in self.metrics:
+                self.metrics[metric] = RunningStats(self.compression)
+            self.metrics[metric].merge(stats)
+
+    def __getitem__(self, metric: str) -> RunningStats:
+        return self.metrics[metric]
+
+    def summary(self, quantiles: Iterable[float] = (0.5, 0.9, 0.99)) -> Dict[str, Dict[str, float]]:
+        """{метрика: {n, mean, std, min, max, p50, ...}} по всем метрикам."""
+        quantiles = list(quantiles)
+        result = {}
+        for metric in sorted(self.metrics):
+            stats = self.metrics[metric]
+            row = {'n': stats.n, 'mean': stats.mean, 'std': stats.std,
+                   'min': stats.digest.min, 'max': stats.digest.max}
+            for q in quantiles:
+                row[f'p{q * 100:g}'] = stats.quantile(q)
+            result[metric] = row
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'compression': self.compression,
+                'metrics': {metric: stats.to_dict() for metric, stats in self.metrics.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'StatsAggregator':
+        aggregator = cls(data['compression'])
+        aggregator.metrics = {metric: RunningStats.from_dict(stats) for metric, stats in data['metrics'].items()}
+        return aggregator
+
+
+class BattleStatsCollector(BattleObserver):
+    """Наблюдатель, передающий метрики каждого боя в StatsAggregator.
+
+    Метрики: rounds (длина боя), damage_skill:<навык> (урон за применение),
+    damage_class:<класс> (урон класса за бой), death_round:<участник> (раунд смерти).
+    """
+
+    def __init__(self, aggregator: Optional[StatsAggregator] = None):
+        self.aggregator = aggregator if aggregator is not None else StatsAggregator()
+        self._snapshot: List[Tuple[Any, int]] = []
+        self._class_damage: Dict[str, int] = {}
+
+    def on_battle_start(self, battle: Battle):
+        self._class_damage = {}
+
+    def on_turn_start(self, battle: Battle, actor):
+        self._snapshot = [(char, char.hp) for char in battle.turn_order.members()]
+
+    def on_turn_end(self, battle: Battle, actor):
+        damage, _, _ = split_hp_changes(battle, actor, self._snapshot)
+        skill = action_skill_name(actor)
+        if skill is not None:
+            self.aggregator.add(f'damage_skill:{skill}', damage)
+        class_name = type(actor).__name__
+        self._class_damage[class_name] = self._class_damage.get(class_name, 0) + damage
+        for char, hp_before in self._snapshot:
+            if hp_before > 0 and not char.is_alive:
+                self.aggregator.add(f'death_round:{char.name}', battle.round_number)
+
+    def on_battle_end(self, battle: Battle):
+        self.aggregator.add('rounds', battle.round_number)
+        for class_name, damage in self._class_damage.items():
+            self.aggregator.add(f'damage_class:{class_name}', damage)
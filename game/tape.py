@@ -0,0 +1,343 @@
+import argparse
+import hashlib
+import json
+import random
+import struct
+from typing import List, Optional, Tuple, Any, Sequence
+from game import rng
+from game.battle import Battle, BattleObserver
+from game.exceptions import ReplayDivergenceError
+from game.simulation import Scenario
+
+# --- Бинарная лента случайных бросков ---
+# Формат: MAGIC, версия, длина и JSON сценария, затем записи:
+#   RANDOM  + 8 байт double       - rng.random()
+#   RANDINT + varint(value - a)   - rng.randint(a, b)
+#   CHOICE  + varint(index)       - rng.choice(seq)
+#   TURN    + varint(раунд) + 8 байт цепного хеша состояния после хода
+# Хеш цепной (хеш хода включает хеш предыдущего), поэтому после первого
+# расхождения все последующие хеши тоже отличаются - это позволяет искать
+# первый расходящийся ход бинарным поиском.
+
+MAGIC = b"RNGT"
+VERSION = 1
+
+RANDOM = 1
+RANDINT = 2
+CHOICE = 3
+TURN = 4
+
+KIND_NAMES = {RANDOM: "random()", RANDINT: "randint()", CHOICE: "choice()", TURN: "конец хода"}
+
+_DOUBLE = struct.Struct("<d")
+DIGEST_SIZE = 8
+
+
+def _write_varint(buffer: bytearray, value: int):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def state_digest(battle: Battle, previous: bytes) -> bytes:
+    """Цепной хеш состояния боя: характеристики, кулдауны, эффекты, оглушение, фаза и миньоны босса."""
+    state = []
+    for char in battle.turn_order.members():
+        state.append((
+            char.name, char.hp, char.mp, char.strength, char.agility, char.intellect,
+            bool(getattr(char, 'stunned', False)),
+            sorted(char._cooldowns.items()),
+            [(effect.name, effect.remaining_duration) for effect in getattr(char, 'active_effects', [])],
+        ))
+    state.append((getattr(battle.boss, 'phase', 0), len(getattr(battle.boss, 'minions', []))))
+    return hashlib.blake2b(previous + repr(state).encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class TapeRecorder(BattleObserver):
+    """Источник случайности, записывающий каждый бросок обернутого источника на ленту.
+
+    Используется одновременно как rng-источник и как наблюдатель боя (отмечает концы ходов).
+    """
+
+    def __init__(self, source: Any, scenario: Scenario):
+        self.source = source
+        self.scenario = scenario
+        self._records = bytearray()
+        self._digest = b""
+
+    def random(self) -> float:
+        value = self.source.random()
+        self._records.append(RANDOM)
+        self._records += _DOUBLE.pack(value)
+        return value
+
+    def randint(self, a: int, b: int) -> int:
+        value = self.source.randint(a, b)
+        self._records.append(RANDINT)
+        _write_varint(self._records, value - a)
+        return value
+
+    def choice(self, seq: Sequence) -> Any:
+        # choice(range(n)) расходует генератор так же, как choice(seq), но дает индекс
+        index = self.source.choice(range(len(seq)))
+        self._records.append(CHOICE)
+        _write_varint(self._records, index)
+        return seq[index]
+
+    def on_turn_end(self, battle: Battle, actor):
+        self._digest = state_digest(battle, self._digest)
+        self._records.append(TURN)
+        _write_varint(self._records, battle.round_number)
+        self._records += self._digest
+
+    def to_bytes(self) -> bytes:
+        header = bytearray(MAGIC)
+        header.append(VERSION)
+        scenario_json = json.dumps(self.scenario.to_dict(), ensure_ascii=False).encode("utf-8")
+        _write_varint(header, len(scenario_json))
+        header += scenario_json
+        return bytes(header + self._records)
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+
+class Tape:
+    """Разобранная лента: сценарий и последовательность записей."""
+
+    def __init__(self, data: bytes):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Это не лента случайных бросков")
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f"Неподдерживаемая версия ленты: {data[len(MAGIC)]}")
+        length, pos = _read_varint(data, len(MAGIC) + 1)
+        self.scenario = Scenario.from_dict(json.loads(data[pos:pos + length].decode("utf-8")))
+        self.data = data
+        self.records_start = pos + length
+
+    @classmethod
+    def load(cls, path: str) -> 'Tape':
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def records(self):
+        """Генератор записей (kind, value, digest). digest есть только у TURN."""
+        data = self.data
+        pos = self.records_start
+        end = len(data)
+        while pos < end:
+            kind = data[pos]
+            pos += 1
+            if kind == RANDOM:
+                yield kind, _DOUBLE.unpack_from(data, pos)[0], None
+                pos += _DOUBLE.size
+            elif kind in (RANDINT, CHOICE):
+                value, pos = _read_varint(data, pos)
+                yield kind, value, None
+            elif kind == TURN:
+                value, pos = _read_varint(data, pos)
+                yield kind, value, data[pos:pos + DIGEST_SIZE]
+                pos += DIGEST_SIZE
+            else:
+                raise ValueError(f"Поврежденная лента: неизвестный тип записи {kind}")
+
+    def turn_digests(self) -> List[Tuple[int, bytes]]:
+        """Список (раунд, хеш) для каждого записанного хода."""
+        return [(value, digest) for kind, value, digest in self.records() if kind == TURN]
+
+
+class ReplayReport:
+    """Результат воспроизведения ленты."""
+
+    def __init__(self, turns_replayed: int, turn: Optional[int] = None,
+                 round_number: Optional[int] = None, reason: str = ""):
+        self.turns_replayed = turns_replayed
+        self.turn = turn  # номер первого расходящегося хода (с 1), None - расхождения нет
+        self.round_number = round_number
+        self.reason = reason
+
+    @property
+    def diverged(self) -> bool:
+        return self.turn is not None
+
+    def check(self):
+        """Бросает ReplayDivergenceError, если бой разошелся с лентой."""
+        if self.diverged:
+            raise ReplayDivergenceError(str(self))
+
+    def __str__(self) -> str:
+        if not self.diverged:
+            return f"Совпадение: воспроизведено {self.turns_replayed} ходов"
+        return f"Расхождение на ходу {self.turn} (раунд {self.round_number}): {self.reason}"
+
+
+class TapePlayer(BattleObserver):
+    """Источник случайности, отдающий броски с ленты вместо генератора.
+
+    Первое расхождение (другой тип броска, индекс вне последовательности,
+    другой хеш состояния) запоминается; после него броски идут из запасного
+    генератора, чтобы бой просто доиграл до конца.
+    """
+
+    def __init__(self, tape: Tape):
+        self.tape = tape
+        self._records = tape.records()
+        self._digest = b""
+        self._fallback = random.Random(0)
+        self.turn = 1
+        self.round_number = 0
+        self.report: Optional[ReplayReport] = None
+
+    def _diverge(self, reason: str):
+        if self.report is None:
+            self.report = ReplayReport(self.turn - 1, self.turn, self.round_number, reason)
+
+    def _next(self, expected: int) -> Optional[Tuple[int, Any, Optional[bytes]]]:
+        if self.report is not None:
+            return None
+        record = next(self._records, None)
+        if record is None:
+            self._diverge(f"движок запросил {KIND_NAMES[expected]}, но лента закончилась")
+            return None
+        if record[0] != expected:
+            self._diverge(f"движок запросил {KIND_NAMES[expected]}, на ленте {KIND_NAMES[record[0]]}")
+            return None
+        return record
+
+    def random(self) -> float:
+        record = self._next(RANDOM)
+        return record[1] if record else self._fallback.random()
+
+    def randint(self, a: int, b: int) -> int:
+        record = self._next(RANDINT)
+        if record and a + record[1] <= b:
+            return a + record[1]
+        if record:
+            self._diverge(f"значение {a + record[1]} вне диапазона randint({a}, {b})")
+        return self._fallback.randint(a, b)
+
+    def choice(self, seq: Sequence) -> Any:
+        record = self._next(CHOICE)
+        if record and record[1] < len(seq):
+            return seq[record[1]]
+        if record:
+            self._diverge(f"индекс {record[1]} вне последовательности длины {len(seq)}")
+        return self._fallback.choice(seq)
+
+    def on_turn_end(self, battle: Battle, actor):
+        self.round_number = battle.round_number
+        record = self._next(TURN)
+        if record is not None:
+            self._digest = state_digest(battle, self._digest)
+            if record[2] != self._digest:
+                self._diverge(f"состояние после хода {actor.name} отличается от записанного")
+        self.turn += 1
+
+    def on_battle_end(self, battle: Battle):
+        if self.report is None and next(self._records, None) is not None:
+            self._diverge("бой закончился раньше, чем на ленте")
+        if self.report is None:
+            self.report = ReplayReport(self.turn - 1)
+
+
+def record_battle(scenario: Scenario, seed: Optional[int] = None) -> bytes:
+    """Проводит бой с генератором random.Random(seed) и возвращает ленту всех бросков."""
+    recorder = TapeRecorder(random.Random(seed), scenario)
+    party, boss = scenario.build()
+    battle = Battle(party, boss, observers=[recorder], verbose=False)
+    with rng.use_source(recorder):
+        battle.start()
+    return recorder.to_bytes()
+
+
+def replay_tape(data: bytes) -> ReplayReport:
+    """Переигрывает бой по ленте (без генератора) текущей версией движка."""
+    player = TapePlayer(Tape(data))
+    party, boss = player.tape.scenario.build()
+    battle = Battle(party, boss, observers=[player], verbose=False)
+    with rng.use_source(player):
+        battle.start()
+    return player.report
+
+
+def find_divergence(tape_a: bytes, tape_b: bytes) -> Optional[int]:
+    """Номер первого хода (с 1), на котором две ленты расходятся, или None.
+
+    Хеши цепные, поэтому ищем границу бинарным поиском.
+    """
+    digests_a = Tape(tape_a).turn_digests()
+    digests_b = Tape(tape_b).turn_digests()
+    common = min(len(digests_a), len(digests_b))
+    low, high = 0, common
+    while low < high:
+        middle = (low + high) // 2
+        if digests_a[middle] == digests_b[middle]:
+            low = middle + 1
+        else:
+            high = middle
+    if low == common and len(digests_a) == len(digests_b):
+        return None
+    return low + 1
+
+
+def _parse_party(spec: str) -> List[Tuple[str, str, int]]:
+    # "Warrior:Артур:5,Mage:Мерлин:5" -> [("Warrior", "Артур", 5), ("Mage", "Мерлин", 5)]
+    party = []
+    for item in spec.split(","):
+        class_name, name, level = item.split(":")
+        party.append((class_name, name, int(level)))
+    return party
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Запись и воспроизведение лент случайных бросков")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="записать бой на ленту")
+    record.add_argument("--party", required=True, help="Класс:Имя:Уровень через запятую")
+    record.add_argument("--boss", default="Дракон Урлог:5", help="Имя:Уровень")
+    record.add_argument("--seed", type=int, default=None)
+    record.add_argument("-o", "--output", required=True)
+
+    replay = commands.add_parser("replay", help="переиграть ленту текущей версией движка")
+    replay.add_argument("tape")
+
+    diff = commands.add_parser("diff", help="найти первый расходящийся ход двух лент")
+    diff.add_argument("tape_a")
+    diff.add_argument("tape_b")
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        boss_name, boss_level = args.boss.rsplit(":", 1)
+        data = record_battle(Scenario(_parse_party(args.party), (boss_name, int(boss_level))), args.seed)
+        with open(args.output, "wb") as f:
+            f.write(data)
+        print(f"Записано {len(Tape(data).turn_digests())} ходов, {len(data)} байт")
+    elif args.command == "replay":
+        with open(args.tape, "rb") as f:
+            print(replay_tape(f.read()))
+    else:
+        with open(args.tape_a, "rb") as f:
+            tape_a = f.read()
+        with open(args.tape_b, "rb") as f:
+            tape_b = f.read()
+        turn = find_divergence(tape_a, tape_b)
+        print("Ленты совпадают" if turn is None else f"Первое расхождение на ходу {turn}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from game.battle import Battle
+
+# --- Выборочная полная трассировка боев ---
+# Политика решает в начале боя, писать ли его лог:
+#   TRACE_FULL - полный лог с первого сообщения (каждый every-й бой);
+#   TRACE_RING - последние ring_size сообщений в кольцевом буфере; если предикат
+#                сработает (после хода или в конце боя), бой повышается до полного
+#                лога, начиная с содержимого буфера;
+#   TRACE_OFF  - лог не пишется и сообщения хода даже не форматируются.
+# Номер боя считает сама политика, поэтому выборка не тратит броски движка
+# и не меняет результаты боев.
+
+TRACE_OFF = 0
+TRACE_RING = 1
+TRACE_FULL = 2
+
+TracePredicate = Callable[['Battle'], bool]
+
+
+def boss_phase_at_least(phase: int) -> TracePredicate:
+    """Предикат: босс дошел до фазы phase."""
+    return lambda battle: getattr(battle.boss, 'phase', 0) >= phase
+
+
+def rounds_over(rounds: int) -> TracePredicate:
+    """Предикат: бой длится больше rounds раундов."""
+    return lambda battle: battle.round_number > rounds
+
+
+def outcome_is(outcome: str) -> TracePredicate:
+    """Предикат: бой закончился исходом outcome ("victory", "defeat", "timeout", "stalemate")."""
+    return lambda battle: battle.outcome == outcome
+
+
+def any_of(*predicates: TracePredicate) -> TracePredicate:
+    return lambda battle: any(predicate(battle) for predicate in predicates)
+
+
+class TraceSampler:
+    """Политика выборочной трассировки для Battle(trace=...).
+
+    every - полностью писать каждый every-й бой (0 - не писать по счетчику);
+    predicate - условие повышения боя до полного лога из кольцевого буфера;
+    ring_size - сколько последних сообщений хранить до срабатывания предиката;
+    on_trace - вызывается в конце каждого записанного боя (например, для сохранения лога).
+    """
+
+    def __init__(self, every: int = 0, predicate: Optional[TracePredicate] = None,
+                 ring_size: int = 256, on_trace: Optional[Callable[['Battle'], None]] = None):
+        if every < 0:
+            raise ValueError("every не может быть отрицательным")
+        if ring_size < 1:
+            raise ValueError("ring_size должен быть положительным")
+        self.every = every
+        self.predicate = predicate
+        self.ring_size = ring_size
+        self.on_trace = on_trace
+        self.battles = 0
+        self.sampled = 0  # записаны полностью по счетчику
+        self.promoted = 0  # повышены предикатом
+
+    def start(self, battle: 'Battle') -> int:
+        """Режим трассировки для начинающегося боя."""
+        self.battles += 1
+        if self.every and self.battles % self.every == 0:
+            self.sampled += 1
+            return TRACE_FULL
+        if self.predicate is not None:
+            return TRACE_RING
+        return TRACE_OFF
+
+    def should_promote(self, battle: 'Battle') -> bool:
+        """Проверяется после каждого хода и в конце боя для боев в кольцевом режиме."""
+        if self.predicate(battle):
+            self.promoted += 1
+            return True
+        return False
+
+    def finish(self, battle: 'Battle'):
+        if battle.traced and self.on_trace is not None:
+            self.on_trace(battle)
+
+    @property
+    def traced(self) -> int:
+        return self.sampled + self.promoted
+
+    def __repr__(self) -> str:
+        return (f"TraceSampler(боев={self.battles}, по счетчику={self.sampled}, "
+                f"по предикату={self.promoted})")
@@ -0,0 +1,210 @@
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from game import characters
+from game.campaign import atomic_write_json
+from game.characters import BOSS_MULTIPLIERS, Boss
+from game.simulation import Scenario, run_battle
+from game.tracing import TraceSampler
+
+# --- Подбор характеристик босса под целевой баланс ---
+# Для каждого уровня босса подбираются множители Boss.__init__ (hp, strength, ...),
+# при которых пати выигрывает с долей target_win, а медианная длина боя близка
+# к target_rounds. Поиск - покоординатный шаблонный поиск (compass search):
+# на каждом шаге все 2*d соседних точек считаются параллельно, лучший сосед
+# становится центром, без улучшения шаг уменьшается вдвое.
+# Общие случайные числа: все кандидаты уровня играют одни и те же seed, поэтому
+# разница между кандидатами не тонет в шуме выборки. Оценки кешируются по
+# (уровень, уровень пати, множители), кеш можно хранить в файле между запусками.
+# Характеристики персонажей ограничены BoundedStat (HP <= 100, остальные <= 30),
+# поэтому выше этих границ множители ни на что не влияют - в таблицу пишутся
+# и множители, и получившиеся характеристики босса.
+
+DEFAULT_CLASSES = ("Warrior", "Mage", "Healer")
+
+
+def _play(task: Tuple[Dict[str, Any], int, int]) -> Tuple[int, List[int]]:
+    scenario_data, start, stop = task
+    scenario = Scenario.from_dict(scenario_data)
+    trace = TraceSampler()
+    wins = 0
+    rounds = []
+    for seed in range(start, stop):
+        battle = run_battle(scenario, seed, trace=trace)
+        wins += battle.outcome == "victory"
+        rounds.append(battle.round_number)
+    return wins, rounds
+
+
+def effective_stats(level: int, multipliers: Dict[str, float]) -> Dict[str, int]:
+    """Характеристики босса уровня level с множителями (после ограничений BoundedStat)."""
+    boss = Boss("probe", level, multipliers)
+    return {'hp': boss.hp, 'mp': boss.mp, 'strength': boss.strength,
+            'agility': boss.agility, 'intellect': boss.intellect}
+
+
+class BossTuner:
+    """Подбор множителей босса по уровням.
+
+    params - какие множители подбирать; battles - боев на оценку точки (одни и те же
+    seed для всех кандидатов); rounds_weight - вес ошибки длины боя относительно
+    ошибки доли побед.
+    """
+
+    def __init__(self, target_win: float = 0.5, target_rounds: float = 8.0,
+                 classes: Tuple[str, ...] = DEFAULT_CLASSES, params: Tuple[str, ...] = ('hp', 'strength'),
+                 battles: int = 400, base_seed: int = 0, processes: Optional[int] = None,
+                 chunk: int = 100, rounds_weight: float = 0.25, bounds: Tuple[float, float] = (0.1, 6.0),
+                 cache_path: Optional[str] = None):
+        self.target_win = target_win
+        self.target_rounds = target_rounds
+        self.classes = classes
+        self.params = params
+        self.battles = battles
+        self.base_seed = base_seed
+        self.processes = processes
+        self.chunk = chunk
+        self.rounds_weight = rounds_weight
+        self.bounds = bounds
+        self.cache_path = cache_path
+        self.cache: Dict[str, Tuple[float, float]] = {}
+        self.evaluations = 0
+        if cache_path and os.path.exists(cache_path):
+            with open(cache_path, encoding="utf-8") as f:
+                self.cache = {key: tuple(value) for key, value in json.load(f).items()}
+        self._pool = None
+
+    def scenario(self, level: int, party_level: int, multipliers: Dict[str, float]) -> Scenario:
+        party = [(cls, f"{cls} {i + 1}", party_level) for i, cls in enumerate(self.classes)]
+        return Scenario(party, ("Дракон Урлог", level), multipliers)
+
+    def _key(self, level: int, party_level: int, multipliers: Dict[str, float]) -> str:
+        values = ",".join(f"{name}={multipliers[name]:.4f}" for name in sorted(multipliers))
+        return f"{level}|{party_level}|{','.join(self.classes)}|{self.battles}|{self.base_seed}|{values}"
+
+    def evaluate_many(self, level: int, party_level: int,
+                      candidates: List[Dict[str, float]]) -> List[Tuple[float, float]]:
+        """(доля побед, медиана раундов) для кандидатов; новые точки считаются одним пакетом задач."""
+        keys = [self._key(level, party_level, c) for c in candidates]
+        missing = [(key, c) for key, c in zip(keys, candidates) if key not in self.cache]
+        missing = list(dict(missing).items())
+        tasks = []
+        for key, candidate in missing:
+            data = self.scenario(level, party_level, candidate).to_dict()
+            for start in range(0, self.battles, self.chunk):
+                tasks.append((key, (data, self.base_seed + start,
+                                    self.base_seed + min(start + self.chunk, self.battles))))
+        if tasks:
+            if self._pool is None and self.processes != 1:
+                self._pool = multiprocessing.Pool(self.processes)
+            work = [task for _, task in tasks]
+            results = self._pool.map(_play, work) if self._pool is not None else list(map(_play, work))
+            totals: Dict[str, Tuple[int, List[int]]] = {}
+            for (key, _), (wins, rounds) in zip(tasks, results):
+                total_wins, total_rounds = totals.get(key, (0, []))
+                totals[key] = (total_wins + wins, total_rounds + rounds)
+            for key, (wins, rounds) in totals.items():
+                self.cache[key] = (wins / self.battles, statistics.median(rounds))
+                self.evaluations += 1
+        return [self.cache[key] for key in keys]
+
+    def loss(self, win_rate: float, median_rounds: float) -> float:
+        rounds_error = (median_rounds - self.target_rounds) / self.target_rounds
+        return (win_rate - self.target_win) ** 2 + self.rounds_weight * rounds_error ** 2
+
+    def tune_level(self, level: int, party_level: int, start: Optional[Dict[str, float]] = None,
+                   step: float = 0.5, min_step: float = 0.02, max_iterations: int = 60) -> Dict[str, Any]:
+        """Подбирает множители для одного уровня босса."""
+        low, high = self.bounds
+        center = dict(BOSS_MULTIPLIERS, **(start or {}))
+        (center_win, center_rounds), = self.evaluate_many(level, party_level, [center])
+        best = self.loss(center_win, center_rounds)
+        iterations = 0
+        while step >= min_step and iterations < max_iterations:
+            iterations += 1
+            neighbours = []
+            for name in self.params:
+                for direction in (1, -1):
+                    value = round(min(high, max(low, center[name] * (1 + direction * step))), 4)
+                    if value != center[name]:
+                        neighbours.append(dict(center, **{name: value}))
+            improved = False
+            for candidate, (win, rounds) in zip(neighbours, self.evaluate_many(level, party_level, neighbours)):
+                loss = self.loss(win, rounds)
+                if loss < best - 1e-12:
+                    best, center, center_win, center_rounds, improved = loss, candidate, win, rounds, True
+            if not improved:
+                step /= 2
+        return {'level': level, 'party_level': party_level, 'multipliers': center,
+                'stats': effective_stats(level, center), 'win_rate': center_win,
+                'median_rounds': center_rounds, 'loss': best, 'iterations': iterations}
+
+    def tune(self, levels: List[int], party_levels: Optional[Dict[int, int]] = None) -> Dict[int, Dict[str, Any]]:
+        """Таблица {уровень босса: итог подбора}; уровень пати по умолчанию - min(уровень, 10)."""
+        table = {}
+        previous = None
+        try:
+            for level in levels:
+                party_level = (party_levels or {}).get(level, max(1, min(level, 10)))
+                # Старт с множителей предыдущего уровня обычно ближе к цели
+                table[level] = self.tune_level(level, party_level, previous)
+                previous = table[level]['multipliers']
+        finally:
+            self.close()
+        return table
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        if self.cache_path:
+            atomic_write_json(self.cache_path, {key: list(value) for key, value in self.cache.items()})
+
+
+def apply_tuning(table: Dict[Any, Dict[str, Any]]):
+    """Подключает подобранную таблицу: боссы этих уровней получают ее множители."""
+    for level, row in table.items():
+        characters.BOSS_LEVEL_MULTIPLIERS[int(level)] = dict(BOSS_MULTIPLIERS, **row['multipliers'])
+
+
+def load_tuning(path: str) -> Dict[int, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        table = {int(level): row for level, row in json.load(f).items()}
+    apply_tuning(table)
+    return table
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Подбор множителей босса под целевую долю побед и длину боя")
+    parser.add_argument("--levels", default="5,10,15,20", help="уровни босса")
+    parser.add_argument("--target-win", type=float, default=0.5)
+    parser.add_argument("--target-rounds", type=float, default=8.0)
+    parser.add_argument("--classes", default=",".join(DEFAULT_CLASSES))
+    parser.add_argument("--params", default="hp,strength", help="подбираемые множители")
+    parser.add_argument("--battles", type=int, default=400, help="боев на оценку одной точки")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", default=None, help="файл кеша оценок")
+    parser.add_argument("-o", "--output", default="boss_tuning.json")
+    args = parser.parse_args(argv)
+
+    tuner = BossTuner(args.target_win, args.target_rounds, tuple(args.classes.split(",")),
+                      tuple(args.params.split(",")), args.battles, args.seed, args.processes,
+                      cache_path=args.cache)
+    started = time.perf_counter()
+    table = tuner.tune([int(level) for level in args.levels.split(",")])
+    atomic_write_json(args.output, {str(level): row for level, row in table.items()})
+    for level, row in table.items():
+        multipliers = ", ".join(f"{name} x{row['multipliers'][name]:.2f}" for name in tuner.params)
+        print(f"босс {level:2} (пати {row['party_level']:2}): {multipliers} -> {row['stats']}, "
+              f"побед {row['win_rate']:.1%}, медиана {row['median_rounds']:g} раундов")
+    print(f"оценок: {tuner.evaluations}, {time.perf_counter() - started:.1f} с, таблица: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
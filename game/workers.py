@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+from functools import lru_cache
+import os
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from game.campaign import ScenarioResult, run_scenario_unit
+from game.simulation import Scenario
+
+# --- Постоянный пул прогретых воркеров ---
+# Обычный multiprocessing.Pool на каждое задание платит запуск интерпретатора,
+# импорт game.* и первое построение персонажей в каждом воркере - сотни
+# миллисекунд, тогда как 200 боев одного сценария идут десятки миллисекунд.
+# WarmPool запускает воркеров один раз в режиме forkserver: сервер один раз
+# импортирует PRELOAD_MODULES, воркеры порождаются fork от него и сразу готовы.
+# Все, что воркер переиспользует между боями, строится при импорте и приходит
+# от сервера готовым: таблица характеристик по уровням (SCALED_STATS в
+# game.characters), спецификации навыков, пулы эффектов и миньонов.
+# Сценарии хранятся в воркере шаблонами: ключ задания - JSON описания сценария,
+# он разбирается при первой встрече, дальше Scenario берется из LRU-кеша на
+# TEMPLATE_CACHE_SIZE сценариев, чтобы память долгоживущего воркера не росла
+# с числом разных сценариев. Пул обслуживает много заданий подряд, пока его не закроют.
+# Персонажи боя строятся заново из шаблона сценария, а не копируются: copy.deepcopy
+# готового состава в несколько раз медленнее, чем Scenario.build.
+
+PRELOAD_MODULES = ('game.characters', 'game.battle', 'game.simulation', 'game.campaign', 'game.workers')
+TEMPLATE_CACHE_SIZE = 256  # шаблонов сценариев в воркере
+
+
+def start_method() -> str:
+    """forkserver, где он есть (Unix); иначе spawn."""
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def scenario_key(scenario: Scenario) -> str:
+    return json.dumps(scenario.to_dict(), sort_keys=True, ensure_ascii=False)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _template(key: str) -> Scenario:
+    return Scenario.from_dict(json.loads(key))
+
+
+def _run_unit(task: Tuple[str, int, int, int]) -> Dict[str, Any]:
+    key, seed_base, start, stop = task
+    return run_scenario_unit(_template(key), seed_base, start, stop).to_dict()
+
+
+def _ping(_: int) -> int:
+    time.sleep(0.01)  # задержка, чтобы пинги разошлись по разным воркерам
+    return os.getpid()
+
+
+class WarmPool:
+    """Постоянный пул прогретых воркеров для коротких заданий симуляции.
+
+        with WarmPool() as pool:
+            result = pool.simulate(scenario, 200)   # ScenarioResult
+
+    Итоги совпадают с run_scenario_unit(scenario, base_seed, 0, battles) -
+    seed боя зависит только от base_seed и номера боя.
+    """
+
+    def __init__(self, processes: Optional[int] = None, method: Optional[str] = None):
+        self.method = method or start_method()
+        context = multiprocessing.get_context(self.method)
+        if self.method == 'forkserver':
+            context.set_forkserver_preload(list(PRELOAD_MODULES))
+        self.processes = processes or os.cpu_count() or 1
+        started = time.perf_counter()
+        self._pool = context.Pool(self.processes)
+        self.startup = time.perf_counter() - started  # запуск пула без ожидания готовности воркеров
+        self.jobs = 0
+
+    def wait_ready(self) -> float:
+        """Ждет, пока воркеры отвечают; возвращает время ожидания в секундах."""
+        started = time.perf_counter()
+        self._pool.map(_ping, range(self.processes), chunksize=1)
+        return time.perf_counter() - started
+
+    def _tasks(self, scenario: Scenario, battles: int, base_seed: int,
+               chunk: Optional[int]) -> List[Tuple[str, int, int, int]]:
+        if chunk is None:
+            chunk = max(1, -(-battles // self.processes))  # поровну между воркерами
+        key = scenario_key(scenario)
+        return [(key, base_seed, start, min(start + chunk, battles)) for start in range(0, battles, chunk)]
+
+    def simulate(self, scenario: Scenario, battles: int, base_seed: int = 0,
+                 chunk: Optional[int] = None) -> ScenarioResult:
+        """Проводит battles боев сценария; по умолчанию бои делятся поровну между воркерами."""
+        result = ScenarioResult()
+        for part in self._pool.imap(_run_unit, self._tasks(scenario, battles, base_seed, chunk)):
+            result.merge(ScenarioResult.from_dict(part))
+        self.jobs += 1
+        return result
+
+    def simulate_many(self, jobs: List[Tuple[Scenario, int]], base_seed: int = 0) -> List[ScenarioResult]:
+        """Несколько заданий (сценарий, число боев) за один проход пула."""
+        tasks = [self._tasks(scenario, battles, base_seed, None) for scenario, battles in jobs]
+        parts = self._pool.imap(_run_unit, [task for job in tasks for task in job])
+        results = []
+        for job in tasks:
+            result = ScenarioResult()
+            for _ in job:
+                result.merge(ScenarioResult.from_dict(next(parts)))
+            results.append(result)
+        self.jobs += len(jobs)
+        return results
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def __enter__(self) -> 'WarmPool':
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.terminate()
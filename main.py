@@ -123,6 +123,33 @@ def set_random_seed():
             print("Пожалуйста, введите корректное число")
 
 
+def configure_display():
+    """Выбирает скорость показа боя; возвращает ConsoleRenderer."""
+    from game.render import ConsoleRenderer
+
+    print("\n=== СКОРОСТЬ БОЯ ===")
+    print("1. Мгновенно")
+    print("2. Несколько ходов в секунду")
+    print("3. По шагам (Enter - следующий ход)")
+
+    while True:
+        try:
+            choice = int(input("Введите номер варианта (1-3): "))
+            if choice == 1:
+                return ConsoleRenderer()
+            elif choice == 2:
+                speed = float(input("Ходов в секунду: "))
+                if speed > 0:
+                    return ConsoleRenderer(speed=speed)
+                print("Скорость должна быть больше нуля")
+            elif choice == 3:
+                return ConsoleRenderer(step=True)
+            else:
+                print("Пожалуйста, введите число от 1 до 3")
+        except ValueError:
+            print("Пожалуйста, введите корректное число")
+
+
 def display_party_info(party: list):
     """Отображает информацию о пати."""
     print("\n=== ВАША ПАТИ ===")
@@ -149,6 +176,9 @@ def main():
     display_party_info(party)
     print(f"\nБосс: {boss}")
 
+    # Скорость показа боя
+    renderer = configure_display()
+
     # Подтверждение начала боя
     input("\nНажмите Enter чтобы начать бой...")
 
@@ -156,7 +186,7 @@ def main():
     from game.battle import Battle
 
     # Создаем и начинаем бой
-    battle = Battle(party, boss)
+    battle = Battle(party, boss, renderer=renderer)
     battle.start()
 
 
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+import game.campaign as campaign_module
+from game.campaign import Campaign, CampaignRunner
+from game.simulation import Scenario
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _campaign() -> Campaign:
+    scenarios = [Scenario([("Warrior", "Артур", 5), ("Mage", "Мерлин", 5), ("Healer", "Эльза", 5)], ("Дракон", 8)),
+                 Scenario([("Warrior", "Бран", 3), ("Warrior", "Гвен", 4), ("Mage", "Ида", 6)], ("Лич", 10))]
+    return Campaign(scenarios, battles_per_scenario=30, base_seed=11, unit_size=10)
+
+
+def _straight_summary(tmp_path):
+    runner = CampaignRunner(str(tmp_path / "straight.json"), _campaign())
+    assert runner.run()
+    return runner.summary()
+
+
+@pytest.mark.parametrize("first_units", [1, 2, 3, 5])
+def test_resumed_campaign_matches_straight_run(tmp_path, first_units):
+    path = str(tmp_path / "campaign.json")
+    assert not CampaignRunner(path, _campaign()).run(max_units=first_units)
+    resumed = CampaignRunner(path)
+    assert resumed.next_unit == first_units
+    assert resumed.run()
+    assert resumed.summary() == _straight_summary(tmp_path)
+
+
+def test_failed_write_keeps_previous_checkpoint(tmp_path, monkeypatch):
+    path = str(tmp_path / "campaign.json")
+    CampaignRunner(path, _campaign()).run(max_units=2)
+    with open(path, encoding="utf-8") as f:
+        saved = f.read()
+
+    def broken_dump(data, f, **kwargs):
+        f.write(json.dumps(data)[:50])  # запись оборвалась на середине
+        raise OSError("диск заполнен")
+
+    monkeypatch.setattr(campaign_module.json, "dump", broken_dump)
+    with pytest.raises(OSError):
+        CampaignRunner(path).run(max_units=1)
+    monkeypatch.undo()
+
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == saved
+    assert os.listdir(tmp_path) == ["campaign.json"]  # временный файл убран
+    resumed = CampaignRunner(path)
+    assert resumed.next_unit == 2
+    resumed.run()
+    assert resumed.summary() == _straight_summary(tmp_path)
+
+
+def test_crash_inside_atomic_write_resumes_from_previous_checkpoint(tmp_path):
+    # Процесс падает (os._exit) между записью временного файла и os.replace
+    path = str(tmp_path / "campaign.json")
+    CampaignRunner(path, _campaign()).run(max_units=2)
+    script = textwrap.dedent(f"""
+        import os
+        import game.campaign as campaign_module
+        from game.campaign import CampaignRunner
+        campaign_module.os.replace = lambda src, dst: os._exit(3)
+        CampaignRunner({path!r}).run()
+    """)
+    process = subprocess.run([sys.executable, "-c", script], cwd=ROOT)
+    assert process.returncode == 3
+    leftovers = [name for name in os.listdir(tmp_path) if name != "campaign.json"]
+    assert leftovers and all(name.startswith(".checkpoint-") for name in leftovers)
+
+    resumed = CampaignRunner(path)
+    assert resumed.next_unit == 2
+    resumed.run()
+    assert resumed.summary() == _straight_summary(tmp_path)
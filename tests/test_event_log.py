@@ -0,0 +1,37 @@
+import pytest
+
+from game.event_log import EventLogWriter, read_events
+from game.simulation import Scenario, run_battle
+from game.tracing import TraceSampler
+
+SCENARIO = Scenario([("Warrior", "Артур", 6), ("Mage", "Мерлин", 6), ("Healer", "Эльза", 6)], ("Дракон", 12))
+SEEDS = range(5)
+
+
+def _export(path, trace_factory):
+    with EventLogWriter(str(path)) as writer:
+        for seed in SEEDS:
+            run_battle(SCENARIO, seed, observers=[writer], trace=trace_factory())
+    return list(read_events(str(path)))
+
+
+def _promote_at(round_number):
+    return lambda: TraceSampler(predicate=lambda battle: battle.round_number >= round_number, ring_size=4096)
+
+
+@pytest.mark.parametrize("trace_factory", [
+    lambda: TraceSampler(predicate=lambda battle: False, ring_size=4096),  # лог только в кольце
+    _promote_at(3),  # повышение до полного лога посреди боя
+    lambda: TraceSampler(every=1),
+], ids=["ring", "promoted", "sampled"])
+def test_messages_match_full_log(tmp_path, trace_factory):
+    expected = _export(tmp_path / "full.jsonl", lambda: None)
+    events = _export(tmp_path / "traced.jsonl", trace_factory)
+    assert all(event["messages"] for event in expected if event["type"] != "turn")
+    assert events == expected
+
+
+def test_export_rejects_battle_without_log(tmp_path):
+    with EventLogWriter(str(tmp_path / "off.jsonl")) as writer:
+        with pytest.raises(ValueError):
+            run_battle(SCENARIO, 0, observers=[writer], trace=TraceSampler())
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from game import rng
+from game.skill_specs import COMPILED_SKILLS
+
+np = pytest.importorskip("numpy")
+
+
+class RecordingRandom(random.Random):
+    """Источник, запоминающий броски randint."""
+
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.rolls = []
+
+    def randint(self, a, b):
+        value = super().randint(a, b)
+        self.rolls.append(value)
+        return value
+
+
+class Dummy:
+    """Участник без критов, ограничений HP и наблюдателей."""
+    _events = None
+    _state_watcher = None
+
+    def __init__(self, name, value=10):
+        self.name = name
+        self.hp = 1000
+        self.mp = 1000
+        self.strength = self.agility = self.intellect = value
+        self.active_effects = []
+        self.stunned = False
+        self.is_alive = True
+
+
+def _skills(shape):
+    return [skill for skill in COMPILED_SKILLS.values()
+            if skill.formula is not None and skill.kind in ('damage', 'heal') and skill.target_shape == shape]
+
+
+def _loss(kind, before, after):
+    return before - after if kind == 'damage' else after - before
+
+
+@pytest.mark.parametrize("skill", _skills('single'), ids=lambda skill: skill.skill_id)
+def test_batch_matches_object_resolve_single(skill):
+    stat_values, totals, rolls = [], [], []
+    for seed in range(200):
+        user, target = Dummy("user", 5 + seed % 17), Dummy("target")
+        source = RecordingRandom(seed)
+        with rng.use_source(source):
+            skill.resolve(user, (target,))
+        stat_values.append(getattr(user, skill.stat) if skill.stat else 0)
+        rolls.append(source.rolls[0])
+        totals.append(_loss(skill.kind, 1000, target.hp))
+    amount, total = skill.resolve_batch(np.array(stat_values), np.array(rolls))
+    assert total.tolist() == totals
+    assert (total == amount * (skill.hits if skill.kind == 'damage' else 1)).all()
+
+
+@pytest.mark.parametrize("skill", _skills('all'), ids=lambda skill: skill.skill_id)
+def test_batch_matches_object_resolve_area(skill):
+    user = Dummy("user", 12)
+    targets = [Dummy(f"target {i}") for i in range(4)]
+    source = RecordingRandom(7)
+    with rng.use_source(source):
+        skill.resolve(user, targets)
+    stat = getattr(user, skill.stat) if skill.stat else 0
+    _, total = skill.resolve_batch(np.full(len(targets), stat), np.array(source.rolls))
+    assert total.tolist() == [_loss(skill.kind, 1000, target.hp) for target in targets]
+
+
+def test_batch_respects_hits_and_scalars():
+    missiles = COMPILED_SKILLS['arcane_missile']
+    assert missiles.hits > 1
+    amount, total = missiles.resolve_batch(10, 4)
+    assert (amount, total) == (14, 14 * missiles.hits)
+
+
+def test_draw_rolls_stays_in_range():
+    skill = COMPILED_SKILLS['arcane_missile']
+    rolls = skill.draw_rolls(np.random.default_rng(0), 10000)
+    low, high = skill.roll
+    assert rolls.min() == low and rolls.max() == high
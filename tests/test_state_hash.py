@@ -0,0 +1,64 @@
+import pytest
+
+from game.battle import Battle, BattleObserver
+from game.simulation import Scenario, run_battle
+from game.state_hash import StateHasher
+
+SCENARIOS = [
+    Scenario([("Warrior", "Артур", 8), ("Mage", "Мерлин", 8), ("Healer", "Эльза", 8)], ("Дракон", 18)),
+    Scenario([("Mage", "Ида", 10), ("Mage", "Кай", 10), ("Warrior", "Бран", 10), ("Healer", "Лея", 10)],
+             ("Лич", 20)),
+]
+
+
+class HashCheck(BattleObserver):
+    """Сверяет инкрементальный хеш с пересчитанным с нуля после каждого хода."""
+
+    def __init__(self):
+        self.hasher = None
+        self.turns = 0
+        self.minion_turns = 0  # ходы, после которых у босса были миньоны
+        self.minion_effect_turns = 0  # ... и на ком-то из них висел эффект или оглушение
+
+    def on_battle_start(self, battle):
+        self.hasher = StateHasher(battle)
+        assert self.hasher.digest() == self.hasher.recompute()
+
+    def on_turn_end(self, battle, actor):
+        assert self.hasher.digest() == self.hasher.recompute(), f"ход {self.turns + 1}, {actor.name}"
+        self.turns += 1
+        self.minion_turns += bool(battle.boss.minions)
+        self.minion_effect_turns += any(minion.active_effects or minion.stunned for minion in battle.boss.minions)
+
+    def on_battle_end(self, battle):
+        assert self.hasher.digest() == self.hasher.recompute()
+        self.hasher.detach()
+
+
+def target_minions(battle: Battle, character) -> str:
+    """Политика пати: все бьют живых миньонов, чтобы на них ложились яд, оглушение и щиты."""
+    for minion in battle.boss.minions:
+        if minion.is_alive:
+            for skill_name, skill in character.skills.items():
+                if not character.is_skill_on_cooldown(skill_name) and character.mp >= skill.mp_cost:
+                    return character.use_skill(minion, skill_name)
+            return character.basic_attack(minion)
+    return battle._choose_party_action(character)
+
+
+class MinionPolicy(BattleObserver):
+    def on_battle_start(self, battle):
+        battle.party_policy = target_minions
+
+
+@pytest.mark.parametrize("policy", [None, MinionPolicy()], ids=["default", "target_minions"])
+def test_incremental_digest_matches_recompute(policy):
+    check = HashCheck()
+    observers = [policy, check] if policy is not None else [check]
+    for scenario in SCENARIOS:
+        for seed in range(40):
+            run_battle(scenario, seed, observers=observers)
+    assert check.turns > 600
+    assert check.minion_turns > 100
+    if policy is not None:
+        assert check.minion_effect_turns > 0